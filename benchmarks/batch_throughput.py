@@ -0,0 +1,95 @@
+"""Batch text-to-SQL throughput: one-at-a-time vs. bounded-concurrency fan-out.
+
+Uses a local mock LLM provider with a fixed latency, so no API calls are made.
+The configuration module is still imported, so OPENAI_API_KEY and DATABASE_URL
+must be set (any value works). Run from the repository root:
+
+    python -m benchmarks.batch_throughput --questions 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.core.base import BaseLLMProvider, BaseResponse
+from src.core.db import DatabaseType
+from src.sql.generator import SQLGenerator
+from src.sql.validator import SQLValidator
+from src.utils.batch import fan_out
+from src.utils.deadline import UNLIMITED, Deadline
+from src.utils.rate_limit import RateLimiter
+
+METADATA = {
+    "orders": {
+        "columns": {
+            "id": {"type": "INTEGER"},
+            "customer_id": {"type": "INTEGER"},
+            "total": {"type": "NUMERIC"},
+        },
+        "primary_key": ["id"],
+        "foreign_keys": [],
+    }
+}
+
+
+class MockLLMProvider(BaseLLMProvider):
+    def __init__(self, latency: float, requests_per_minute: float):
+        self.latency = latency
+        self.rate_limiter = RateLimiter("mock", requests_per_minute)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
+        await self.rate_limiter.acquire()
+        await asyncio.sleep(self.latency)
+        return BaseResponse(success=True, data={"sql": "SELECT total FROM orders"})
+
+
+async def run(questions: list[str], concurrency: int, provider) -> float:
+    generator = SQLGenerator(provider)
+    validator = SQLValidator()
+
+    async def answer(index: int, question: str) -> bool:
+        result = await generator.generate_sql(question, METADATA)
+        validation = await validator.validate_sql(result.data["sql"], METADATA)
+        return validation.success
+
+    start = time.perf_counter()
+    async for _ in fan_out(questions, answer, concurrency):
+        pass
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rpm", type=float, default=0, help="0 disables the limit")
+    args = parser.parse_args()
+
+    questions = [f"Total of order number {i}" for i in range(args.questions)]
+    for concurrency in (1, args.concurrency):
+        provider = MockLLMProvider(args.latency, args.rpm)
+        elapsed = await run(questions, concurrency, provider)
+        print(
+            f"concurrency {concurrency:>3}: {elapsed:6.2f} s  "
+            f"{len(questions) / elapsed:8.1f} questions/s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
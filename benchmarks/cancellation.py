@@ -0,0 +1,144 @@
+"""LLM time spent on requests whose client has already given up.
+
+A mock LLM answers after a long-tailed latency while each client waits a
+random time before giving up (a disconnect or its own timeout). Without
+propagation the handler carries on after the client has gone, as it did
+before request deadlines; with it, the request's deadline cancels the LLM
+call. The report shows the LLM time spent in all, and how much of it came
+after the client had gone. No API calls are made, but the configuration
+module is imported, so OPENAI_API_KEY and DATABASE_URL must be set (any
+value works). Run from the repository root:
+
+    python -m benchmarks.cancellation --requests 400 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from loguru import logger
+
+from src.core.base import BaseLLMProvider, BaseResponse
+from src.core.db import DatabaseType
+from src.sql.generator import SQLGenerator
+from src.utils.batch import fan_out
+from src.utils.deadline import UNLIMITED, Deadline
+
+METADATA = {
+    "orders": {
+        "columns": {
+            "id": {"type": "INTEGER"},
+            "total": {"type": "NUMERIC"},
+        },
+        "primary_key": ["id"],
+        "foreign_keys": [],
+    }
+}
+
+
+class SlowLLMProvider(BaseLLMProvider):
+    """Answers after a lognormal latency, recording when each prompt finished"""
+
+    def __init__(self, latency: float, seed: int):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.busy_seconds = 0.0
+        # Prompt -> time.monotonic() when its call ended (answered or cancelled)
+        self.finished: dict[str, float] = {}
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
+        start = time.perf_counter()
+        try:
+            await asyncio.sleep(self.latency * self.rng.lognormvariate(0, 0.8))
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+            self.finished[prompt] = time.monotonic()
+        return BaseResponse(success=True, data={"sql": "SELECT total FROM orders"})
+
+
+async def run(args: argparse.Namespace, propagate: bool) -> None:
+    provider = SlowLLMProvider(args.latency, seed=7)
+    generator = SQLGenerator(provider, timeout=0)
+    rng = random.Random(3)
+    patience = [
+        args.latency * rng.uniform(0.5, args.max_patience) for _ in range(args.requests)
+    ]
+    # Question -> when its client gave up
+    abandoned: dict[str, float] = {}
+
+    async def request(index: int, question: str) -> None:
+        deadline = Deadline.after(patience[index])
+        call = generator.generate_valid_sql(
+            question, METADATA, deadline=deadline if propagate else UNLIMITED
+        )
+        if propagate:
+            result = await call
+        else:
+            # The handler runs on; only the client stops waiting at its deadline
+            task = asyncio.ensure_future(call)
+            try:
+                async with deadline.timeout():
+                    result = await asyncio.shield(task)
+            except TimeoutError:
+                result = None
+                await task
+        if result is None or not result.success:
+            abandoned[question] = deadline.expires_at
+
+    questions = [f"Total of order number {i}" for i in range(args.requests)]
+    start = time.perf_counter()
+    async for _ in fan_out(questions, request, args.concurrency):
+        pass
+    elapsed = time.perf_counter() - start
+    # LLM time spent after the client had given up
+    wasted = sum(
+        max(0.0, provider.finished[question] - gave_up)
+        for question, gave_up in abandoned.items()
+    )
+    print(
+        f"{'on' if propagate else 'off':>12}"
+        f"{1 - len(abandoned) / args.requests:>10.1%}"
+        f"{provider.busy_seconds:>12.1f}{wasted:>12.2f}{elapsed:>10.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument(
+        "--max-patience",
+        type=float,
+        default=3.0,
+        help="clients give up after 0.5 to this many median latencies",
+    )
+    args = parser.parse_args()
+    logger.remove()
+
+    print(
+        f"{'propagation':>12}{'answered':>10}{'LLM s':>12}"
+        f"{'wasted s':>12}{'wall s':>10}"
+    )
+    for propagate in (False, True):
+        await run(args, propagate)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""Memory and throughput of query results: one dict per row vs. ColumnarResult.
+
+Driver rows are simulated as tuples (what asyncpg Records and Trino pages
+provide), so no database is needed. The configuration module is still
+imported, so OPENAI_API_KEY and DATABASE_URL must be set (any value works).
+Run from the repository root:
+
+    python -m benchmarks.columnar_results --rows 500000
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from loguru import logger
+
+from src.api.serializers import (
+    arrow_available,
+    pa,
+    pq,
+    result_arrow_ipc,
+    result_csv,
+    result_json,
+    result_json_columns,
+    result_parquet,
+)
+from src.core.results import ColumnarResult
+
+COLUMNS = ["id", "customer_id", "amount", "created_at", "region", "status"]
+REGIONS = ["eu-west", "eu-central", "us-east", "us-west", "apac"]
+STATUSES = ["settled", "pending", "refunded"]
+
+
+def driver_rows(count: int) -> list[tuple]:
+    random.seed(7)
+    start = datetime.datetime(2024, 1, 1)
+    return [
+        (
+            i,
+            random.randrange(50_000),
+            round(random.uniform(1, 500), 2),
+            start + datetime.timedelta(minutes=i),
+            # Drivers decode a new str object per value, even for repeats
+            "".join(random.choice(REGIONS)),
+            "".join(random.choice(STATUSES)),
+        )
+        for i in range(count)
+    ]
+
+
+def dict_rows(rows: list[tuple]) -> list[dict]:
+    """The previous execute_query path"""
+    return [dict(zip(COLUMNS, row, strict=False)) for row in rows]
+
+
+def measure(build) -> tuple[object, float, int]:
+    """Result, seconds and bytes still allocated after build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, elapsed, size
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+    logger.remove()
+
+    # Driver rows are freed inside each build, so only the result is counted
+    dicts, _, dict_bytes = measure(lambda: dict_rows(driver_rows(args.rows)))
+    columnar, _, columnar_bytes = measure(
+        lambda: ColumnarResult.from_tuples(COLUMNS, driver_rows(args.rows))
+    )
+
+    rows = driver_rows(args.rows)
+    dict_build = timed(lambda: dict_rows(rows))
+    columnar_build = timed(lambda: ColumnarResult.from_tuples(COLUMNS, rows))
+    dict_json = timed(lambda: json.dumps({"rows": dicts}, default=str))
+    columnar_json = timed(lambda: b"".join(result_json({}, columnar, 10_000)))
+    columns_json = timed(lambda: b"".join(result_json_columns({}, columnar)))
+    columnar_csv = timed(lambda: b"".join(result_csv(columnar, 10_000)))
+
+    print(f"{args.rows:,} rows, {len(COLUMNS)} columns")
+    print(f"{'':<22}{'dict rows':>12}{'columnar':>12}")
+    print(
+        f"{'memory (MiB)':<22}{dict_bytes / 2**20:>12.1f}"
+        f"{columnar_bytes / 2**20:>12.1f}"
+    )
+    print(
+        f"{'bytes per row':<22}{dict_bytes / args.rows:>12.0f}"
+        f"{columnar_bytes / args.rows:>12.0f}"
+    )
+    for label, dict_time, columnar_time in [
+        ("build (ms)", dict_build, columnar_build),
+        ("JSON encode (ms)", dict_json, columnar_json),
+    ]:
+        print(f"{label:<22}{dict_time * 1000:>12.0f}{columnar_time * 1000:>12.0f}")
+    print(f"{'JSON columns (ms)':<22}{'':>12}{columns_json * 1000:>12.0f}")
+    print(f"{'CSV encode (ms)':<22}{'':>12}{columnar_csv * 1000:>12.0f}")
+    if arrow_available():
+        payloads = {
+            "JSON": (b"".join(result_json({}, columnar, 10_000)), json.loads),
+            "Arrow IPC": (
+                result_arrow_ipc(columnar),
+                lambda data: pa.ipc.open_stream(data).read_all(),
+            ),
+            "Parquet": (
+                result_parquet(columnar, "zstd"),
+                lambda data: pq.read_table(pa.BufferReader(data)),
+            ),
+        }
+        encode = {
+            "Arrow IPC": timed(lambda: result_arrow_ipc(columnar)),
+            "Parquet": timed(lambda: result_parquet(columnar, "zstd")),
+        }
+        print()
+        print(f"{'format':<22}{'encode ms':>12}{'decode ms':>12}{'MiB':>12}")
+        for label, (data, decode) in payloads.items():
+            encoded = encode.get(label, columnar_json)
+            decoded = timed(lambda data=data, decode=decode: decode(data))
+            print(
+                f"{label:<22}{encoded * 1000:>12.0f}{decoded * 1000:>12.0f}"
+                f"{len(data) / 2**20:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Cost gate decisions and EXPLAIN latency (cold vs. cached) on PostgreSQL.
+
+Creates a throwaway fact table in a scratch schema of a PostgreSQL database and
+runs representative queries through the gate, so point it at a development
+database. Run from the repository root:
+
+    python -m benchmarks.cost_gate --rows 1000000 --max-rows 10000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from src.db.postgres_db import PostgreSQLDatabase
+from src.sql.cost_gate import CostGate
+from src.utils.config import DATABASE_URL
+
+SCHEMA = "tabletalk_cost_gate_bench"
+TABLE = f"{SCHEMA}.events"
+
+QUERIES = {
+    "point lookup": f"SELECT * FROM {TABLE} WHERE id = 42",
+    "filtered range": (
+        f"SELECT * FROM {TABLE} WHERE event_date = DATE '2024-01-01' LIMIT 100"
+    ),
+    "full scan": f"SELECT * FROM {TABLE}",
+    "no partition filter": f"SELECT COUNT(*) FROM {TABLE} WHERE region = 'eu'",
+    "self join": (
+        f"SELECT a.id FROM {TABLE} a JOIN {TABLE} b ON b.region = a.region "
+        "WHERE a.event_date > DATE '2024-01-01' AND b.event_date > DATE '2024-01-01'"
+    ),
+}
+
+
+async def create_table(database: PostgreSQLDatabase, rows: int) -> None:
+    async with database.engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(
+            text(
+                f"CREATE TABLE {TABLE} (id BIGINT PRIMARY KEY, event_date DATE, "
+                "region TEXT, payload TEXT)"
+            )
+        )
+        await conn.execute(
+            text(
+                f"INSERT INTO {TABLE} SELECT i, DATE '2024-01-01' + (i % 365), "
+                "(ARRAY['eu', 'us', 'apac'])[1 + i % 3], md5(i::text) "
+                f"FROM generate_series(1, {rows}) AS i"
+            )
+        )
+        await conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+async def timed(coro) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = await coro
+    return (time.perf_counter() - start) * 1000, result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-rows", type=int, default=10_000)
+    parser.add_argument("--max-cost", type=float, default=1_000_000)
+    args = parser.parse_args()
+
+    database = PostgreSQLDatabase(args.url)
+    await database.initialize()
+    try:
+        await create_table(database, args.rows)
+        gate = CostGate(
+            database,
+            max_rows=args.max_rows,
+            max_cost=args.max_cost,
+            partitioned_tables={TABLE: frozenset({"event_date"})},
+        )
+
+        print(f"{'query':<22}{'decision':<12}{'cold':>10}{'cached':>10}  detail")
+        for label, sql in QUERIES.items():
+            cold_ms, result = await timed(gate.check(sql))
+            cached_ms, _ = await timed(gate.check(sql))
+            if not result.success:
+                decision, detail = "rejected", result.error
+            elif result.data["rewritten"]:
+                decision, detail = "rewritten", result.data["estimates"]
+            else:
+                decision, detail = "allowed", result.data["estimates"]
+            print(
+                f"{label:<22}{decision:<12}{cold_ms:>7.1f} ms{cached_ms:>7.1f} ms"
+                f"  {detail}"
+            )
+    finally:
+        async with database.engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await database.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+"""Few-shot example retrieval latency against the number of stored examples.
+
+Fills an in-memory ExampleStore with distinct synthetic (question, SQL) pairs,
+then times searches for unseen paraphrases, with the table check the
+generator applies. Needs NumPy (pip install "TableTalk[examples]") and, since
+the configuration module is imported, OPENAI_API_KEY and DATABASE_URL (any
+value works). Run from the repository root:
+
+    python -m benchmarks.example_retrieval --examples 100000 --searches 2000
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+
+from loguru import logger
+
+from src.sql.example_store import ExampleStore
+
+METRICS = [
+    "total revenue",
+    "average order value",
+    "number of orders",
+    "refund amount",
+    "distinct customers",
+    "shipping cost",
+    "gross margin",
+    "discount total",
+    "late deliveries",
+    "support tickets",
+    "active subscriptions",
+    "churned accounts",
+    "page views",
+    "signups",
+    "invoice total",
+    "payment failures",
+    "units sold",
+    "returns",
+    "inventory level",
+    "average rating",
+]
+ENTITIES = [
+    "customer",
+    "product",
+    "warehouse",
+    "supplier",
+    "campaign",
+    "employee",
+    "region",
+    "store",
+    "category",
+    "brand",
+    "channel",
+    "plan",
+    "country",
+    "city",
+    "carrier",
+    "device",
+    "segment",
+    "team",
+    "partner",
+    "currency",
+    "language",
+    "tier",
+    "vendor",
+    "promotion",
+    "department",
+]
+GROUPINGS = [
+    "per day",
+    "per week",
+    "per month",
+    "per quarter",
+    "per year",
+    "by status",
+    "by source",
+    "by payment method",
+    "by age group",
+    "by gender",
+    "by weekday",
+    "by hour",
+    "by acquisition cohort",
+    "by price band",
+    "by sales rep",
+]
+PERIODS = [
+    "last week",
+    "last month",
+    "last quarter",
+    "last year",
+    "this week",
+    "this month",
+    "this quarter",
+    "this year",
+    "since launch",
+    "during the holidays",
+    "over the weekend",
+    "in the summer",
+]
+
+
+def synthesize(count: int, seed: int = 11) -> list[tuple[str, str]]:
+    combos = list(itertools.product(METRICS, ENTITIES, GROUPINGS, PERIODS))
+    random.Random(seed).shuffle(combos)
+    pairs = []
+    for metric, entity, grouping, period in combos[:count]:
+        table = entity.replace(" ", "_") + "s"
+        question = f"Show {metric} for each {entity} {grouping} {period}"
+        sql = f"SELECT {entity}_id, COUNT(*) FROM {table} GROUP BY {entity}_id"
+        pairs.append((question, sql))
+    return pairs
+
+
+def paraphrase(rng: random.Random) -> str:
+    return (
+        f"what was the {rng.choice(METRICS)} of every {rng.choice(ENTITIES)} "
+        f"{rng.choice(GROUPINGS)} {rng.choice(PERIODS)}"
+    )
+
+
+async def fill(store: ExampleStore, pairs: list[tuple[str, str]]) -> None:
+    for question, sql in pairs:
+        await store.add(question, sql)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--examples", type=int, default=100_000)
+    parser.add_argument("--searches", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    logger.remove()
+
+    tables = {entity.replace(" ", "_") + "s" for entity in ENTITIES}
+    # Scaled-down sizes show how lookups grow with the store
+    sizes = sorted({min(args.examples, n) for n in (1000, 10_000)} | {args.examples})
+    rng = random.Random(3)
+    queries = [paraphrase(rng) for _ in range(args.searches)]
+
+    print(f"{'examples':>10}{'fill s':>10}{'p50 µs':>10}{'p95 µs':>10}{'max µs':>10}")
+    for size in sizes:
+        store = ExampleStore(max_examples=size)
+        start = time.perf_counter()
+        asyncio.run(fill(store, synthesize(size)))
+        fill_seconds = time.perf_counter() - start
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            store.search(query, args.k, table_exists=tables.__contains__)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95)]
+        print(
+            f"{size:>10}{fill_seconds:>10.1f}{statistics.median(timings):>10.0f}"
+            f"{p95:>10.0f}{timings[-1]:>10.0f}"
+        )
+
+    print(f"\nTop {args.k} for: {queries[0]}")
+    for example in store.search(queries[0], args.k, table_exists=tables.__contains__):
+        print(f"  {example.question}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Tail latency of LLM routing with and without hedged requests.
+
+Simulates a fast primary provider with occasional long stalls and a slower but
+steady fallback, so no API calls are made. The configuration module is still
+imported, so OPENAI_API_KEY and DATABASE_URL must be set (any value works).
+Run from the repository root:
+
+    python -m benchmarks.llm_hedging --requests 500 --stall-rate 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from src.core.base import BaseLLMProvider, BaseResponse
+from src.core.db import DatabaseType
+from src.core.llm_provider import LLMConfig
+from src.llm.router import ProviderRouter
+from src.utils.deadline import UNLIMITED, Deadline
+
+
+class SimulatedProvider(BaseLLMProvider):
+    def __init__(self, name: str, latency: float, stall_rate: float, stall: float):
+        self.config = LLMConfig(model=name, timeout=60)
+        self.latency = latency
+        self.stall_rate = stall_rate
+        self.stall = stall
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
+        stalled = random.random() < self.stall_rate
+        await asyncio.sleep(self.stall if stalled else self.latency)
+        return BaseResponse(success=True, data={"sql": "SELECT 1"})
+
+
+async def run(args: argparse.Namespace, hedge: bool) -> list[float]:
+    random.seed(args.seed)
+    router = ProviderRouter(
+        {
+            "primary": SimulatedProvider(
+                "primary", args.latency, args.stall_rate, args.stall
+            ),
+            "fallback": SimulatedProvider("fallback", args.latency * 3, 0.0, 0.0),
+        },
+        hedge=hedge,
+        hedge_min_delay=args.latency,
+    )
+
+    async def one() -> float:
+        start = time.perf_counter()
+        await router.generate_sql("question", {})
+        return time.perf_counter() - start
+
+    # A few requests at a time keeps the run short without hiding the tail
+    latencies = []
+    for offset in range(0, args.requests, 10):
+        batch = min(10, args.requests - offset)
+        latencies.extend(await asyncio.gather(*(one() for _ in range(batch))))
+    return sorted(latencies)
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--stall-rate", type=float, default=0.05)
+    parser.add_argument("--stall", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for hedge in (False, True):
+        latencies = await run(args, hedge)
+        print(
+            f"hedge={'on ' if hedge else 'off'}  "
+            f"p50 {percentile(latencies, 0.5):6.3f} s  "
+            f"p95 {percentile(latencies, 0.95):6.3f} s  "
+            f"p99 {percentile(latencies, 0.99):6.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
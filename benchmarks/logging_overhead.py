@@ -0,0 +1,97 @@
+"""Per-request logging cost: the previous setup against configure_logging.
+
+Replays the records one /api/query request emits (query, prompt, validation,
+generated SQL) through each configuration, writing to os.devnull. Reports
+CPU time per request on the calling thread (what a request pays) and for the
+whole process (including the writer thread). The configuration module is
+imported, so OPENAI_API_KEY and DATABASE_URL must be set (any value works).
+Run from the repository root:
+
+    python -m benchmarks.logging_overhead --requests 20000
+"""
+
+import argparse
+import os
+import time
+
+from loguru import logger
+
+from src.utils.logger import configure_logging
+
+QUERY = "Top ten customers by revenue over the last thirty days"
+SQL = (
+    "SELECT c.name, SUM(o.total) AS revenue FROM customers c JOIN orders o "
+    "ON o.customer_id = c.id WHERE o.created_at >= NOW() - INTERVAL '30 days' "
+    "GROUP BY c.name ORDER BY revenue DESC LIMIT 10"
+)
+# Prompts carry the pruned schema, typically a few kilobytes
+PROMPT = f"Convert to SQL: {QUERY}\n" + "table orders (id INTEGER, ...)\n" * 120
+
+PREVIOUS_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+    "<level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+
+
+def eager_request(log) -> None:
+    """The previous call sites: f-strings built whatever the level"""
+    log.info(f"Processing query: {QUERY}")
+    log.debug(f"Sending request to OpenAI with prompt: {PROMPT}")
+    log.info("Successfully generated SQL query")
+    log.debug(f"Generated SQL: {SQL}")
+    log.debug(f"Validating SQL query: {SQL}")
+    log.debug("SQL validation successful")
+    log.info(f"Successfully generated SQL (cached={False}): {SQL}")
+
+
+def lazy_request(log) -> None:
+    log.info("Processing query: {}", QUERY)
+    log.debug("Sending request to OpenAI with prompt: {}", PROMPT)
+    log.info("Successfully generated SQL query")
+    log.debug("Generated SQL: {}", SQL)
+    log.debug("Validating SQL query: {}", SQL)
+    log.debug("SQL validation successful")
+    log.info("Successfully generated SQL (cached={}): {}", False, SQL)
+
+
+def run(label: str, request, log, requests: int) -> None:
+    thread_start = time.thread_time()
+    process_start = time.process_time()
+    for _ in range(requests):
+        request(log)
+    thread_us = (time.thread_time() - thread_start) / requests * 1e6
+    # Removing the handler drains its queue, so the writer's work is counted
+    logger.remove()
+    process_us = (time.process_time() - process_start) / requests * 1e6
+    print(f"{label:<34}{thread_us:>12.1f}{process_us:>12.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        print(f"{args.requests} requests, CPU microseconds per request")
+        print(f"{'':<34}{'request':>12}{'process':>12}")
+
+        logger.remove()
+        logger.add(devnull, format=PREVIOUS_FORMAT, level="DEBUG", enqueue=True)
+        run("previous (DEBUG, enqueue, eager)", eager_request, logger, args.requests)
+
+        configs = [
+            ("DEBUG text, lazy", lazy_request, "DEBUG", "text", 1.0),
+            ("INFO text, eager", eager_request, "INFO", "text", 1.0),
+            ("INFO text, lazy", lazy_request, "INFO", "text", 1.0),
+            ("INFO json, lazy", lazy_request, "INFO", "json", 1.0),
+            ("INFO json, lazy, 10% sampled", lazy_request, "INFO", "json", 0.1),
+        ]
+        for label, request, level, log_format, sample_rate in configs:
+            configure_logging(level, log_format, sample_rate, stream=devnull)
+            run(label, request, logger.bind(sampled=True), args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""PostgreSQL pool warm-up and prepared statement reuse under a request burst.
+
+Fires a burst of concurrent queries at a freshly initialised database, with
+and without warm-up and the per-connection statement cache, and reports query
+latency plus the checkouts counted by db_pool_wait_seconds. Point it at a
+development database. Run from the repository root:
+
+    python -m benchmarks.postgres_pool --burst 50 --pool-size 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from loguru import logger
+
+from src.db.postgres_db import PostgreSQLDatabase, pool_wait
+from src.utils.config import DATABASE_URL
+
+QUERY = (
+    "SELECT c.relname, n.nspname FROM pg_class c "
+    "JOIN pg_namespace n ON n.oid = c.relnamespace WHERE c.relkind = 'r'"
+)
+
+
+async def burst(database: PostgreSQLDatabase, size: int) -> list[float]:
+    async def one() -> float:
+        start = time.perf_counter()
+        await database.execute_columnar(QUERY)
+        return (time.perf_counter() - start) * 1000
+
+    return await asyncio.gather(*(one() for _ in range(size)))
+
+
+async def run(url: str, label: str, burst_size: int, **options) -> None:
+    database = PostgreSQLDatabase(url, **options)
+    await database.initialize()
+    try:
+        waits_before = pool_wait.count(pool="query")
+        first = sorted(await burst(database, burst_size))
+        repeat = sorted(await burst(database, burst_size))
+        checkouts = pool_wait.count(pool="query") - waits_before
+    finally:
+        await database.shutdown()
+
+    def p95(values: list[float]) -> float:
+        return values[int(len(values) * 0.95) - 1]
+
+    print(
+        f"{label:<26}{statistics.median(first):>9.1f}{p95(first):>9.1f}"
+        f"{statistics.median(repeat):>9.1f}{p95(repeat):>9.1f}{checkouts:>11}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+    logger.remove()
+
+    print(f"{args.burst} concurrent queries, pool size {args.pool_size} (ms)")
+    print(f"{'':<26}{'first burst':>18}{'second burst':>18}")
+    print(f"{'':<26}{'p50':>9}{'p95':>9}{'p50':>9}{'p95':>9}{'checkouts':>11}")
+    configs = [
+        ("cold, no statement cache", 0, 0),
+        ("warmed, no statement cache", args.pool_size, 0),
+        ("warmed, statement cache", args.pool_size, 100),
+    ]
+    for label, warmup, statement_cache_size in configs:
+        await run(
+            args.url,
+            label,
+            args.burst,
+            pool_size=args.pool_size,
+            max_overflow=0,
+            warmup=warmup,
+            statement_cache_size=statement_cache_size,
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Prompt prefix reuse: latency and cached prompt tokens across questions.
+
+Sends a series of different questions against one schema, so every request
+shares the system prefix (instructions plus compiled schema). The first
+request pays for the whole prompt; later ones should show OpenAI cached
+tokens (prefixes of 1024+ tokens) or, for Ollama, fewer evaluated tokens and
+a lower latency while the model stays loaded. Calls a real LLM provider, so
+it needs OPENAI_API_KEY (or a running Ollama for --provider ollama). Run from
+the repository root:
+
+    python -m benchmarks.prompt_prefix_cache --provider openai --tables 60
+"""
+
+import argparse
+import asyncio
+import time
+
+from loguru import logger
+
+from benchmarks.schema_pruning import QUESTIONS, build_schema
+from src.llm.ollama_provider import OllamaProvider
+from src.llm.openai_provider import OpenAIProvider
+from src.llm.usage import prompt_tokens
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--provider", choices=["openai", "ollama"], default="openai")
+    parser.add_argument("--tables", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=2)
+    args = parser.parse_args()
+    logger.remove()
+
+    provider = OpenAIProvider() if args.provider == "openai" else OllamaProvider()
+    metadata = build_schema(args.tables)
+    await provider.initialize()
+    try:
+        print(f"{'request':<8}{'ms':>10}{'prompt tokens':>15}{'cached':>10}")
+        for index in range(args.rounds * len(QUESTIONS)):
+            question = QUESTIONS[index % len(QUESTIONS)]
+            hits = prompt_tokens.value(provider=args.provider, cache="hit")
+            misses = prompt_tokens.value(provider=args.provider, cache="miss")
+            start = time.perf_counter()
+            response = await provider.generate_sql(question, metadata)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if not response.success:
+                print(f"{index + 1:<8}failed: {response.error}")
+                continue
+            cached = prompt_tokens.value(provider=args.provider, cache="hit") - hits
+            total = (
+                prompt_tokens.value(provider=args.provider, cache="miss")
+                - misses
+                + cached
+            )
+            print(f"{index + 1:<8}{elapsed_ms:>10.0f}{total:>15.0f}{cached:>10.0f}")
+    finally:
+        await provider.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
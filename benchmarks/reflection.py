@@ -0,0 +1,100 @@
+"""Reflection time vs. schema size: full MetaData.reflect vs. incremental reflection.
+
+Creates throwaway tables in a scratch schema of a PostgreSQL database, so point
+it at a development database. Run from the repository root:
+
+    python -m benchmarks.reflection --sizes 50,200,800
+"""
+
+import argparse
+import asyncio
+import time
+
+import sqlalchemy as sa
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.metadata import MetadataManager
+from src.db.metadata_cache import CacheEntry, MetadataCache
+from src.utils.config import DATABASE_URL
+
+SCHEMA = "tabletalk_reflection_bench"
+
+
+async def create_schema(engine, size: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        for i in range(size):
+            parent = (
+                f", parent_id INTEGER REFERENCES {SCHEMA}.t_{i - 1}(id)" if i else ""
+            )
+            columns = ", ".join(f"c_{j} VARCHAR(64)" for j in range(10))
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {SCHEMA}.t_{i} "
+                    f"(id INTEGER PRIMARY KEY, {columns}{parent})"
+                )
+            )
+
+
+async def timed(coro) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = await coro
+    return (time.perf_counter() - start) * 1000, result
+
+
+async def full_reflect(engine) -> None:
+    """The previous code path: reflect every table on every cache miss"""
+    metadata = sa.MetaData(schema=SCHEMA)
+    async with engine.connect() as conn:
+        await conn.run_sync(metadata.reflect)
+
+
+async def bench_size(engine, size: int) -> dict[str, float]:
+    await create_schema(engine, size)
+    manager = MetadataManager(engine, cache=MetadataCache(), schema=SCHEMA)
+
+    full_ms, _ = await timed(full_reflect(engine))
+    cold_ms, (value, catalog) = await timed(manager._load(None, None))
+    previous = CacheEntry(value, "", time.time(), catalog)
+    unchanged_ms, _ = await timed(manager._load(None, previous))
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"ALTER TABLE {SCHEMA}.t_0 ADD COLUMN extra TEXT"))
+    one_changed_ms, _ = await timed(manager._load(None, previous))
+    targeted_ms, _ = await timed(manager._load(["t_0", "t_1", "t_2"], None))
+
+    return {
+        "full": full_ms,
+        "incremental cold": cold_ms,
+        "incremental unchanged": unchanged_ms,
+        "incremental 1 changed": one_changed_ms,
+        "targeted 3 tables": targeted_ms,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--sizes", default="50,200,800")
+    args = parser.parse_args()
+
+    url = args.url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    engine = create_async_engine(url)
+    try:
+        sizes = [int(size) for size in args.sizes.split(",")]
+        rows = {size: await bench_size(engine, size) for size in sizes}
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+    paths = list(next(iter(rows.values())))
+    print(f"{'tables':>8} " + " ".join(f"{path:>22}" for path in paths))
+    for size, timings in rows.items():
+        print(f"{size:>8} " + " ".join(f"{timings[p]:>19.1f} ms" for p in paths))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""Success rate against latency for the validate-and-repair loop.
+
+A mock LLM answers after a fixed latency and returns SQL that fails
+validation (an unknown table) with a given probability, whether it is a
+first answer or a repair. Each GENERATION_MAX_ATTEMPTS setting answers the
+same questions; repairs raise the success rate and add latency only to the
+questions that needed them. No API calls are made, but the configuration
+module is imported, so OPENAI_API_KEY and DATABASE_URL must be set (any value
+works). Run from the repository root:
+
+    python -m benchmarks.repair_loop --questions 500 --failure-rate 0.3
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from loguru import logger
+
+from src.core.base import BaseLLMProvider, BaseResponse
+from src.core.db import DatabaseType
+from src.sql.generator import SQLGenerator
+from src.utils.batch import fan_out
+from src.utils.deadline import UNLIMITED, Deadline
+
+METADATA = {
+    "orders": {
+        "columns": {
+            "id": {"type": "INTEGER"},
+            "customer_id": {"type": "INTEGER"},
+            "total": {"type": "NUMERIC"},
+        },
+        "primary_key": ["id"],
+        "foreign_keys": [],
+    }
+}
+
+
+class FlakyLLMProvider(BaseLLMProvider):
+    def __init__(self, latency: float, failure_rate: float, seed: int):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
+        # Repair prompts are longer, so they take a little more time
+        await asyncio.sleep(self.latency * (1 + 0.1 * len(feedback or [])))
+        table = "order_lines" if self.rng.random() < self.failure_rate else "orders"
+        return BaseResponse(success=True, data={"sql": f"SELECT total FROM {table}"})
+
+
+async def run(args: argparse.Namespace, max_attempts: int) -> None:
+    provider = FlakyLLMProvider(args.latency, args.failure_rate, seed=5)
+    generator = SQLGenerator(provider, max_attempts=max_attempts, timeout=args.timeout)
+    timings: list[float] = []
+    valid = 0
+
+    async def answer(index: int, question: str) -> None:
+        nonlocal valid
+        start = time.perf_counter()
+        result = await generator.generate_valid_sql(question, METADATA)
+        timings.append(time.perf_counter() - start)
+        valid += result.success
+
+    questions = [f"Total of order number {i}" for i in range(args.questions)]
+    async for _ in fan_out(questions, answer, args.concurrency):
+        pass
+    timings.sort()
+    print(
+        f"{max_attempts:>9}{valid / len(questions):>10.1%}"
+        f"{statistics.median(timings) * 1000:>10.0f}"
+        f"{timings[int(len(timings) * 0.95)] * 1000:>10.0f}"
+        f"{timings[-1] * 1000:>10.0f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=0, help="0: no deadline")
+    args = parser.parse_args()
+    logger.remove()
+
+    print(f"{'attempts':>9}{'valid':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for max_attempts in (1, 2, 3, 4):
+        await run(args, max_attempts)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
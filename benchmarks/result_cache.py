@@ -0,0 +1,87 @@
+"""Memory per cached result: list of row dicts vs. the columnar form, plus hit cost.
+
+Builds a synthetic dashboard-style result (ids, amounts, timestamps and a few
+low-cardinality labels), so no database is needed. The configuration module is
+still imported, so OPENAI_API_KEY and DATABASE_URL must be set (any value
+works). Run from the repository root:
+
+    python -m benchmarks.result_cache --rows 200000
+"""
+
+import argparse
+import datetime
+import random
+import time
+import tracemalloc
+
+from loguru import logger
+
+from src.core.results import ColumnarResult
+from src.db.result_cache import ResultCache
+
+REGIONS = ["eu-west", "eu-central", "us-east", "us-west", "apac"]
+STATUSES = ["settled", "pending", "refunded"]
+
+
+def make_rows(count: int) -> list[dict]:
+    random.seed(7)
+    start = datetime.datetime(2024, 1, 1)
+    return [
+        {
+            "id": i,
+            "customer_id": random.randrange(50_000),
+            "amount": round(random.uniform(1, 500), 2),
+            "created_at": start + datetime.timedelta(minutes=i),
+            # Drivers return a new str object per row, even for repeated values
+            "region": "".join(random.choice(REGIONS)),
+            "status": "".join(random.choice(STATUSES)),
+        }
+        for i in range(count)
+    ]
+
+
+def traced(build) -> tuple[object, int]:
+    """Result of build() and the bytes it left allocated"""
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    logger.remove()
+
+    rows, dict_bytes = traced(lambda: make_rows(args.rows))
+    # The row dicts are freed once converted, so only the columnar form remains
+    result, columnar_bytes = traced(
+        lambda: ColumnarResult.from_rows(make_rows(args.rows))
+    )
+    start = time.perf_counter()
+    ColumnarResult.from_rows(rows)
+    convert_ms = (time.perf_counter() - start) * 1000
+
+    cache = ResultCache(max_bytes=4 * result.nbytes)
+    cache.put("dashboard", result, ["payments"])
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get("dashboard")
+    hit_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    print(f"rows                 {args.rows:>12,}")
+    print(f"list of dicts        {dict_bytes / 2**20:>9.1f} MiB")
+    print(f"columnar             {columnar_bytes / 2**20:>9.1f} MiB")
+    print(f"  estimated nbytes   {result.nbytes / 2**20:>9.1f} MiB")
+    print(
+        f"bytes per row        {dict_bytes / args.rows:>9.0f} vs "
+        f"{columnar_bytes / args.rows:.0f}"
+    )
+    print(f"conversion           {convert_ms:>9.1f} ms")
+    print(f"cache hit            {hit_us:>9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
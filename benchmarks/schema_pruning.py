@@ -0,0 +1,140 @@
+"""Compare prompt size and render latency: full schema dump vs. pruned schema.
+
+Run from the repository root:
+
+    python -m benchmarks.schema_pruning --tables 1200 --iterations 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from src.core.prompts import PromptManager, estimate_tokens
+from src.sql.schema_retriever import SchemaRetriever
+
+DOMAINS = [
+    "customer",
+    "order",
+    "invoice",
+    "payment",
+    "product",
+    "shipment",
+    "warehouse",
+    "supplier",
+    "employee",
+    "campaign",
+    "ticket",
+    "subscription",
+]
+
+QUESTIONS = [
+    "Total payment amount per customer last month",
+    "Which products were shipped from each warehouse?",
+    "List open support tickets by employee",
+    "Count active subscriptions per campaign",
+    "Top suppliers by invoice total",
+]
+
+
+def build_schema(table_count: int, seed: int = 7) -> dict:
+    """Synthesize a warehouse-like schema with FK chains between tables"""
+    rng = random.Random(seed)
+    metadata = {}
+    names = [
+        f"{DOMAINS[i % len(DOMAINS)]}_{i // len(DOMAINS)}" for i in range(table_count)
+    ]
+    for index, name in enumerate(names):
+        columns = {
+            "id": {
+                "type": "INTEGER",
+                "nullable": False,
+                "primary_key": True,
+                "foreign_key": False,
+            }
+        }
+        for column_index in range(rng.randint(6, 30)):
+            columns[f"{rng.choice(DOMAINS)}_attr_{column_index}"] = {
+                "type": rng.choice(
+                    ["INTEGER", "VARCHAR", "TIMESTAMP", "NUMERIC(12, 2)"]
+                ),
+                "nullable": True,
+                "primary_key": False,
+                "foreign_key": False,
+            }
+        foreign_keys = []
+        for target in rng.sample(names[:index], k=min(index, rng.randint(0, 3))):
+            column = f"{target}_id"
+            columns[column] = {
+                "type": "INTEGER",
+                "nullable": True,
+                "primary_key": False,
+                "foreign_key": True,
+            }
+            foreign_keys.append(
+                {"column": column, "references": {"table": target, "column": "id"}}
+            )
+        metadata[name] = {
+            "columns": columns,
+            "primary_key": ["id"],
+            "foreign_keys": foreign_keys,
+        }
+    return metadata
+
+
+def render(prompt_manager: PromptManager, question: str, metadata: dict) -> str:
+    messages = prompt_manager.build_messages(question, metadata, "postgresql")
+    return "\n".join(message["content"] for message in messages)
+
+
+def timed(func, iterations: int) -> tuple[float, float]:
+    """Return (p50, p95) latency in milliseconds"""
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(QUESTIONS[i % len(QUESTIONS)])
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=1200)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--token-budget", type=int, default=6000)
+    args = parser.parse_args()
+
+    metadata = build_schema(args.tables)
+    prompt_manager = PromptManager()
+
+    start = time.perf_counter()
+    retriever = SchemaRetriever(
+        metadata, top_k=args.top_k, token_budget=args.token_budget
+    )
+    build_ms = (time.perf_counter() - start) * 1000
+
+    full_tokens = estimate_tokens(render(prompt_manager, QUESTIONS[0], metadata))
+    pruned_tokens = [
+        estimate_tokens(render(prompt_manager, q, retriever.retrieve(q)))
+        for q in QUESTIONS
+    ]
+
+    full_p50, full_p95 = timed(
+        lambda q: render(prompt_manager, q, metadata), args.iterations
+    )
+    pruned_p50, pruned_p95 = timed(
+        lambda q: render(prompt_manager, q, retriever.retrieve(q)), args.iterations
+    )
+
+    print(f"tables:               {args.tables}")
+    print(f"index build:          {build_ms:.1f} ms (once per metadata snapshot)")
+    print(f"full prompt tokens:   ~{full_tokens}")
+    print(f"pruned prompt tokens: ~{int(statistics.mean(pruned_tokens))} (mean)")
+    print(f"full render:          p50 {full_p50:.2f} ms  p95 {full_p95:.2f} ms")
+    print(f"pruned render:        p50 {pruned_p50:.2f} ms  p95 {pruned_p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
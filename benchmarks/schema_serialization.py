@@ -0,0 +1,73 @@
+"""Schema text per request: json.dumps of the metadata vs. the schema compiler.
+
+Uses the synthetic schema from benchmarks.schema_pruning and reports prompt
+tokens (estimated) and serialization time for the full schema and for the
+pruned per-question subsets. "cold" compiles a snapshot nobody has seen yet;
+"warm" is every later request for the same schema version. Run from the
+repository root:
+
+    python -m benchmarks.schema_serialization --tables 1200 --iterations 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.schema_pruning import QUESTIONS, build_schema
+from src.core.prompts import estimate_tokens
+from src.core.schema_compiler import SchemaCompiler
+from src.sql.schema_retriever import SchemaRetriever
+
+
+def timed(func, inputs: list[dict], iterations: int) -> float:
+    """Median serialization time in microseconds"""
+    samples = []
+    for i in range(iterations):
+        metadata = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        func(metadata)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def report(label: str, inputs: list[dict], iterations: int) -> None:
+    json_tokens = statistics.mean(estimate_tokens(json.dumps(m)) for m in inputs)
+    compiled_tokens = statistics.mean(
+        estimate_tokens(SchemaCompiler().compile(m)) for m in inputs
+    )
+    json_us = timed(json.dumps, inputs, iterations)
+    cold_us = timed(lambda m: SchemaCompiler().compile(m), inputs, iterations)
+    compiler = SchemaCompiler()
+    for metadata in inputs:
+        compiler.compile(metadata)
+    warm_us = timed(compiler.compile, inputs, iterations)
+    print(
+        f"{label:<8}{json_tokens:>12.0f}{compiled_tokens:>12.0f}"
+        f"{json_us:>12.1f}{cold_us:>12.1f}{warm_us:>12.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=1200)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--token-budget", type=int, default=6000)
+    args = parser.parse_args()
+
+    metadata = build_schema(args.tables)
+    retriever = SchemaRetriever(
+        metadata, top_k=args.top_k, token_budget=args.token_budget
+    )
+    pruned = [retriever.retrieve(question) for question in QUESTIONS]
+
+    print(f"{args.tables} tables; tokens are estimates, times are p50 in us")
+    print(f"{'':<8}{'tokens':>24}{'serialization':>36}")
+    print(f"{'':<8}{'json':>12}{'compiled':>12}{'json':>12}{'cold':>12}{'warm':>12}")
+    report("full", [metadata], max(1, args.iterations // 10))
+    report("pruned", pruned, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
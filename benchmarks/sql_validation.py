@@ -0,0 +1,126 @@
+"""SQL validation cost: sqlparse.parse + flatten walks vs. the single-pass analyzer.
+
+The corpus mirrors the shape of SQL the generator produces (joins, CTE chains,
+window functions, IN-subqueries, UNION ALL reports) at increasing lengths. No
+database or LLM is needed, but the configuration module is still imported, so
+OPENAI_API_KEY and DATABASE_URL must be set (any value works). Run from the
+repository root:
+
+    python -m benchmarks.sql_validation --repeat 200
+"""
+
+import argparse
+import asyncio
+import time
+
+import sqlparse
+from loguru import logger
+
+from src.sql.validator import SQLValidator
+
+TABLES = ["customers", "orders", "order_items", "products", "events", "payments"]
+METADATA = {
+    name: {"columns": {"id": {"type": "INTEGER"}}, "primary_key": ["id"]}
+    for name in TABLES
+}
+
+SHORT = [
+    "SELECT COUNT(*) FROM customers",
+    "SELECT id, name FROM customers WHERE created_at >= NOW() - INTERVAL '30 days'",
+    "SELECT c.name, SUM(o.total) AS revenue FROM customers c JOIN orders o "
+    "ON o.customer_id = c.id GROUP BY c.name ORDER BY revenue DESC LIMIT 10",
+]
+
+MEDIUM = [
+    "WITH monthly AS (SELECT DATE_TRUNC('month', o.created_at) AS month, "
+    "SUM(oi.quantity * p.price) AS revenue FROM orders o "
+    "JOIN order_items oi ON oi.order_id = o.id "
+    "JOIN products p ON p.id = oi.product_id GROUP BY 1) "
+    "SELECT month, revenue, LAG(revenue) OVER (ORDER BY month) AS previous, "
+    "revenue - LAG(revenue) OVER (ORDER BY month) AS change FROM monthly "
+    "ORDER BY month",
+    "SELECT p.name, EXTRACT(YEAR FROM o.created_at) AS year, COUNT(*) AS orders "
+    "FROM products p LEFT JOIN order_items oi ON oi.product_id = p.id "
+    "LEFT JOIN orders o ON o.id = oi.order_id WHERE p.id IN "
+    "(SELECT product_id FROM order_items GROUP BY product_id "
+    "HAVING COUNT(*) > 5) GROUP BY p.name, year ORDER BY orders DESC",
+]
+
+
+def long_query(branches: int) -> str:
+    """UNION ALL report over a CTE chain, as produced for wide dashboards"""
+    ctes = ", ".join(
+        f"step_{i} AS (SELECT customer_id, SUM(amount) AS total_{i} "
+        f"FROM payments WHERE status = 'settled' AND amount > {i} "
+        f"GROUP BY customer_id)"
+        for i in range(branches)
+    )
+    selects = " UNION ALL ".join(
+        f"SELECT c.id, c.name, s.total_{i} AS total FROM customers c "
+        f"JOIN step_{i} s ON s.customer_id = c.id"
+        for i in range(branches)
+    )
+    return f"WITH {ctes} {selects}"
+
+
+def legacy_validate(sql: str, dangerous: set[str]) -> bool:
+    """The previous validator: parse, then two flatten() walks of statement 0"""
+    parsed = sqlparse.parse(sql)
+    if not parsed:
+        return False
+    if any(
+        token.ttype in sqlparse.tokens.Keyword and token.value.upper() in dangerous
+        for token in parsed[0].flatten()
+    ):
+        return False
+    for token in parsed[0].flatten():
+        if token.ttype is None and isinstance(token, sqlparse.sql.Identifier):
+            pass
+    return True
+
+
+async def timed(func, queries: list[str], repeat: int) -> float:
+    """Mean microseconds per validation"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sql in queries:
+            result = func(sql)
+            if asyncio.iscoroutine(result):
+                await result
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    # Measure validation, not log formatting (the legacy path logs nothing here)
+    logger.remove()
+
+    corpus = {
+        "short": SHORT,
+        "medium": MEDIUM,
+        "long (8 branches)": [long_query(8)],
+        "very long (32 branches)": [long_query(32)],
+    }
+    dangerous = SQLValidator().dangerous_keywords
+    uncached = SQLValidator(cache_size=0)
+    cached = SQLValidator()
+
+    print(f"{'corpus':<24}{'chars':>7}{'legacy':>12}{'single-pass':>13}{'cached':>10}")
+    for label, queries in corpus.items():
+        chars = sum(map(len, queries)) // len(queries)
+        legacy = await timed(
+            lambda sql: legacy_validate(sql, dangerous), queries, args.repeat
+        )
+        single = await timed(
+            lambda sql: uncached.validate_sql(sql, METADATA), queries, args.repeat
+        )
+        hit = await timed(
+            lambda sql: cached.validate_sql(sql, METADATA), queries, args.repeat
+        )
+        print(f"{label:<24}{chars:>7}{legacy:>10.0f}us{single:>11.0f}us{hit:>8.0f}us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
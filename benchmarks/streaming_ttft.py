@@ -0,0 +1,89 @@
+"""Time to first SQL token: blocking generate_sql vs. generate_sql_stream.
+
+Calls a real LLM provider, so it needs OPENAI_API_KEY (or a running Ollama
+for --provider ollama). Run from the repository root:
+
+    python -m benchmarks.streaming_ttft --provider openai --runs 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.llm.ollama_provider import OllamaProvider
+from src.llm.openai_provider import OpenAIProvider
+
+METADATA = {
+    "customers": {
+        "columns": {"id": {"type": "INTEGER"}, "name": {"type": "TEXT"}},
+        "primary_key": ["id"],
+        "foreign_keys": [],
+    },
+    "orders": {
+        "columns": {
+            "id": {"type": "INTEGER"},
+            "customer_id": {"type": "INTEGER"},
+            "total": {"type": "NUMERIC"},
+            "created_at": {"type": "TIMESTAMP"},
+        },
+        "primary_key": ["id"],
+        "foreign_keys": [
+            {
+                "column": "customer_id",
+                "references": {"table": "customers", "column": "id"},
+            }
+        ],
+    },
+}
+QUESTION = "Top 10 customers by total order value in the last 90 days"
+
+
+def percentile(values: list[float], q: float) -> float:
+    return (
+        statistics.quantiles(values, n=100)[int(q) - 1]
+        if len(values) > 1
+        else values[0]
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--provider", choices=("openai", "ollama"), default="openai")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    provider = OpenAIProvider() if args.provider == "openai" else OllamaProvider()
+    await provider.initialize()
+    blocking, first_token, streamed = [], [], []
+    try:
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            response = await provider.generate_sql(QUESTION, METADATA)
+            if not response.success:
+                raise RuntimeError(response.error)
+            blocking.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            ttft = None
+            async for _delta in provider.generate_sql_stream(QUESTION, METADATA):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+            first_token.append(ttft)
+            streamed.append(time.perf_counter() - start)
+    finally:
+        await provider.shutdown()
+
+    for label, values in (
+        ("blocking, full response", blocking),
+        ("streaming, first token", first_token),
+        ("streaming, full response", streamed),
+    ):
+        print(
+            f"{label:<26} p50 {percentile(values, 50):6.3f} s  "
+            f"p95 {percentile(values, 95):6.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
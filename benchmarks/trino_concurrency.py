@@ -0,0 +1,119 @@
+"""Tail latency of N concurrent Trino queries: blocking client vs. pooled backend.
+
+Starts a local stub of Trino's REST protocol that answers every statement after
+a fixed delay, so no real cluster is needed. Run from the repository root:
+
+    python -m benchmarks.trino_concurrency --queries 32 --delay 0.2
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import threading
+import time
+
+from aiohttp import web
+
+from src.db.trino_db import TrinoDatabase
+
+
+class StubTrinoServer:
+    """Minimal /v1/statement endpoint returning one row after a delay"""
+
+    def __init__(self, delay: float, port: int):
+        self.delay = delay
+        self.port = port
+        self._ids = itertools.count()
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+
+    async def _statement(self, request: web.Request) -> web.Response:
+        await request.text()
+        await asyncio.sleep(self.delay)
+        query_id = f"stub_{next(self._ids)}"
+        return web.json_response(
+            {
+                "id": query_id,
+                "infoUri": f"http://127.0.0.1:{self.port}/ui/{query_id}",
+                "columns": [
+                    {
+                        "name": "value",
+                        "type": "integer",
+                        "typeSignature": {"rawType": "integer", "arguments": []},
+                    }
+                ],
+                "data": [[1]],
+                "stats": {"state": "FINISHED"},
+            }
+        )
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_post("/v1/statement", self._statement)
+        runner = web.AppRunner(app)
+        self._loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", self.port)
+        self._loop.run_until_complete(site.start())
+        self._started.set()
+        self._loop.run_forever()
+
+    def start(self) -> None:
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._started.wait()
+
+
+async def blocking_query(database: TrinoDatabase) -> None:
+    """The previous implementation: synchronous cursor on the event loop"""
+    cursor = database.connection.cursor()
+    cursor.execute("SELECT 1")
+    cursor.fetchall()
+
+
+async def run(database: TrinoDatabase, queries: int, blocking: bool) -> list[float]:
+    """Latency of each query measured from the moment all were submitted"""
+    start = time.perf_counter()
+
+    async def one() -> float:
+        if blocking:
+            await blocking_query(database)
+        else:
+            await database.execute_query("SELECT 1")
+        return (time.perf_counter() - start) * 1000
+
+    return sorted(await asyncio.gather(*(one() for _ in range(queries))))
+
+
+def summarize(label: str, samples: list[float]) -> None:
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"{label:<10} p50 {statistics.median(samples):8.1f} ms  "
+        f"p95 {p95:8.1f} ms  max {samples[-1]:8.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--port", type=int, default=18080)
+    args = parser.parse_args()
+
+    StubTrinoServer(args.delay, args.port).start()
+    database = TrinoDatabase(
+        f"trino://bench@127.0.0.1:{args.port}/memory/default",
+        pool_size=args.pool_size,
+    )
+    await database.initialize()
+    try:
+        print(f"{args.queries} concurrent queries, {args.delay * 1000:.0f} ms each")
+        summarize("blocking", await run(database, args.queries, blocking=True))
+        summarize("pooled", await run(database, args.queries, blocking=False))
+    finally:
+        await database.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,12 +1,9 @@
-from fastapi import FastAPI, HTTPException
-from sqlalchemy import text
+from fastapi import FastAPI
 
-from src.api.models import QueryRequest, QueryResponse
-from src.db.connection import DatabaseConnection
-from src.db.metadata import MetadataManager
-from src.llm.openai_provider import OpenAIProvider
-from src.sql.generator import SQLGenerator
-from src.sql.validator import SQLValidator
+from src.api.middleware import CancelOnDisconnectMiddleware, RequestIdMiddleware
+from src.api.routes import router
+from src.api.state import lifespan
+from src.utils.config import LOG_LEVEL
 from src.utils.logger import get_logger
 
 # Configure logger
@@ -16,93 +13,15 @@ app = FastAPI(
     title="Text2SQL API",
     description="Natural Language to SQL Query Converter",
     version="1.0.0",
+    lifespan=lifespan,
 )
-
-# Initialize components
-db_connection = DatabaseConnection()
-llm_provider = OpenAIProvider()
-sql_generator = SQLGenerator(llm_provider)
-sql_validator = SQLValidator()
-
-
-@app.on_event("startup")
-async def startup_event():
-    logger.info("FastAPI server starting up...")
-    try:
-        await db_connection.initialize()
-        logger.info("Database connection initialized")
-        await llm_provider.initialize()
-        logger.info("LLM provider initialized")
-    except Exception as e:
-        logger.error(f"Startup failed: {str(e)}")
-        raise RuntimeError("Failed to initialize application") from e
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("FastAPI server shutting down...")
-    try:
-        await db_connection.shutdown()
-        await llm_provider.shutdown()
-    except Exception as e:
-        logger.error(f"Shutdown error: {str(e)}")
-        raise RuntimeError("Failed to shutdown application") from e
-
-
-@app.get("/health")
-async def health_check():
-    logger.debug("Health check endpoint called")
-    try:
-        # Test database connection using SQLAlchemy text()
-        async with db_connection.engine.connect() as conn:
-            await conn.execute(text("SELECT 1"))
-        return {"status": "healthy", "database": "connected"}
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        raise HTTPException(
-            status_code=500, detail=f"Health check failed: {str(e)}"
-        ) from e
-
-
-@app.post("/api/query", response_model=QueryResponse)
-async def process_query(request: QueryRequest):
-    try:
-        logger.info(f"Processing query: {request.query}")
-
-        # Initialize metadata manager and get current schema
-        metadata_manager = MetadataManager(db_connection.engine)
-        metadata = await metadata_manager.get_table_metadata()
-
-        if not metadata:
-            raise ValueError("No database metadata available")
-
-        # Generate SQL
-        generation_result = await sql_generator.generate_sql(
-            query=request.query, metadata=metadata, context=request.context
-        )
-
-        if not generation_result.success:
-            logger.error(f"SQL generation failed: {generation_result.error}")
-            return QueryResponse(success=False, error=generation_result.error)
-
-        # Validate SQL
-        validation_result = await sql_validator.validate_sql(
-            sql=generation_result.data["sql"], metadata=metadata
-        )
-
-        if not validation_result.success:
-            logger.error(f"SQL validation failed: {validation_result.error}")
-            return QueryResponse(success=False, error=validation_result.error)
-
-        logger.info(f"Successfully generated SQL: {generation_result.data['sql']}")
-        return QueryResponse(success=True, sql=generation_result.data["sql"])
-
-    except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) from e
+# Added last runs first: request IDs are set before a handler can be cancelled
+app.add_middleware(CancelOnDisconnectMiddleware)
+app.add_middleware(RequestIdMiddleware)
+app.include_router(router)
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=5000, log_level="debug")
+    uvicorn.run(app, host="0.0.0.0", port=5000, log_level=LOG_LEVEL.lower())
@@ -0,0 +1,118 @@
+"""ASGI middleware shared by every route."""
+
+import asyncio
+import uuid
+
+from loguru import logger
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.metrics import metrics
+
+REQUEST_ID_HEADER = "X-Request-ID"
+MAX_REQUEST_ID_LENGTH = 128
+
+requests_cancelled = metrics.counter(
+    "http_requests_cancelled_total",
+    "Requests whose handler was cancelled, by reason",
+)
+
+
+class RequestIdMiddleware:
+    """Tag every log record of a request with its request ID
+
+    The ID comes from the X-Request-ID header (one is generated when absent)
+    and is echoed on the response, so client, proxy and server logs can be
+    joined. Plain ASGI rather than BaseHTTPMiddleware, which runs every
+    request in an extra task group.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(REQUEST_ID_HEADER, request_id)
+            await send(message)
+
+        with logger.contextualize(request_id=request_id):
+            await self.app(scope, receive, send_with_request_id)
+
+
+class CancelOnDisconnectMiddleware:
+    """Cancel a request's handler as soon as its client disconnects
+
+    Without this, a handler keeps awaiting its LLM call or query after the
+    client has gone, and only notices when it sends the response. Here the
+    handler runs as its own task while a watcher reads the connection; on
+    disconnect the handler is cancelled, which aborts the in-flight LLM HTTP
+    request and cancels running queries on the database server. The request
+    body is passed through one message at a time, so uploads keep their
+    backpressure. Once the response is complete, background tasks are left
+    to finish.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages: asyncio.Queue[Message] = asyncio.Queue(maxsize=1)
+        disconnected = asyncio.Event()
+        response_complete = False
+
+        async def receive_from_client() -> Message:
+            if messages.empty() and disconnected.is_set():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def send_to_client(message: Message) -> None:
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.ensure_future(
+            self.app(scope, receive_from_client, send_to_client)
+        )
+
+        async def watch() -> None:
+            while True:
+                message = await receive()
+                if message["type"] != "http.disconnect":
+                    await messages.put(message)
+                    continue
+                disconnected.set()
+                if not messages.full():
+                    # Wakes a handler waiting on receive (e.g. a streaming response)
+                    messages.put_nowait(message)
+                if not response_complete:
+                    handler.cancel()
+                return
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not disconnected.is_set() or asyncio.current_task().cancelling():
+                raise
+            requests_cancelled.inc(reason="client_disconnected")
+            logger.info(
+                "Client disconnected; cancelled {} {}", scope["method"], scope["path"]
+            )
+        finally:
+            watcher.cancel()
@@ -1,16 +1,65 @@
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 
 class QueryRequest(BaseModel):
     query: str
     context: dict | None = None
     prompt_variables: dict | None = None
+    # Name from DATABASE_TARGETS; None is the default database
+    database: str | None = None
 
 
 class QueryResponse(BaseModel):
     success: bool
     sql: str | None = None
     error: str | None = None
+    cached: bool = False
+    warnings: list[str] = Field(default_factory=list)
+    # LLM answers needed; more than 1 means failed SQL was repaired
+    attempts: int = 0
+
+
+class BatchQueryRequest(BaseModel):
+    queries: list[QueryRequest] = Field(min_length=1)
+    concurrency: int | None = Field(default=None, gt=0)
+    # Every query in the batch runs against this database
+    database: str | None = None
+
+
+class BatchQueryResult(QueryResponse):
+    index: int
+
+
+class ExecuteRequest(BaseModel):
+    sql: str
+    database: str | None = None
+    # None: negotiated from the Accept header (NDJSON by default)
+    format: Literal["ndjson", "arrow"] | None = None
+    chunk_size: int | None = Field(default=None, gt=0)
+
+
+class ExecuteQueryRequest(BaseModel):
+    sql: str
+    database: str | None = None
+    # None: negotiated from the Accept header (JSON by default)
+    format: Literal["json", "csv", "arrow", "parquet"] | None = None
+    # JSON only: "rows" (one object per row) or "columns" (one list per column)
+    json_layout: Literal["rows", "columns"] = "rows"
+    use_cache: bool = True
+
+
+class ExecuteResponse(BaseModel):
+    success: bool
+    sql: str | None = None
+    columns: list[str] = Field(default_factory=list)
+    rows: list[dict] | None = None
+    # Per-column values when json_layout is "columns"
+    data: list[list] | None = None
+    row_count: int = 0
+    cached: bool = False
+    error: str | None = None
 
 
 class ErrorResponse(BaseModel):
@@ -1,51 +1,97 @@
+import asyncio
+import contextlib
+import json
+from collections.abc import AsyncIterator
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from sqlalchemy import text
 
-from src.api.models import QueryRequest, QueryResponse
-from src.db.connection import DatabaseConnection
-from src.db.metadata import MetadataManager
-from src.llm.openai_provider import OpenAIProvider
-from src.sql.generator import SQLGenerator
-from src.sql.validator import SQLValidator
+from src.api.models import (
+    BatchQueryRequest,
+    BatchQueryResult,
+    ExecuteQueryRequest,
+    ExecuteRequest,
+    ExecuteResponse,
+    QueryRequest,
+    QueryResponse,
+)
+from src.api.serializers import (
+    ARROW_FORMATS,
+    ARROW_STREAM_MEDIA_TYPE,
+    CSV_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    arrow_available,
+    arrow_stream,
+    ndjson_stream,
+    negotiate_format,
+    result_arrow_ipc,
+    result_csv,
+    result_json,
+    result_json_columns,
+    result_parquet,
+    sse_event,
+)
+from src.api.state import AppState, Services
+from src.core.base import BaseResponse
+from src.core.results import ColumnarResult
+from src.db.registry import DatabaseTarget
+from src.sql.analyzer import analyze_sql
+from src.utils.batch import fan_out
+from src.utils.config import (
+    BATCH_CONCURRENCY,
+    BATCH_MAX_QUERIES,
+    PARQUET_COMPRESSION,
+    REQUEST_TIMEOUT,
+    STREAM_CHUNK_SIZE,
+)
+from src.utils.deadline import UNLIMITED, Deadline
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics
 
 router = APIRouter()
 logger = get_logger(__name__)
+# Per-request events, kept at LOG_SAMPLE_RATE
+sampled_logger = get_logger(__name__, sampled=True)
 
-# Database connection instance
-db_connection = DatabaseConnection()
 
+def request_deadline(
+    x_request_timeout: Annotated[float | None, Header()] = None,
+) -> Deadline:
+    """REQUEST_TIMEOUT seconds from now, or the X-Request-Timeout header if shorter
 
-async def get_metadata_manager():
-    """Dependency for metadata manager"""
-    return MetadataManager(db_connection.engine)
+    Created when the request arrives and passed to every stage (metadata,
+    generation, the cost gate, query execution), each of which gets the time
+    left and is cancelled when it runs out.
+    """
+    deadline = Deadline.after(REQUEST_TIMEOUT)
+    if x_request_timeout is not None and x_request_timeout > 0:
+        deadline = deadline.within(x_request_timeout)
+    return deadline
 
 
-async def get_llm_provider():
-    """Dependency for LLM provider"""
-    return OpenAIProvider()
+RequestDeadline = Annotated[Deadline, Depends(request_deadline)]
 
 
-async def get_sql_generator(
-    llm_provider: Annotated[OpenAIProvider, Depends(get_llm_provider)],
-):
-    """Dependency for SQL generator"""
-    return SQLGenerator(llm_provider)
-
-
-async def get_sql_validator():
-    """Dependency for SQL validator"""
-    return SQLValidator()
+def deadline_exceeded() -> HTTPException:
+    logger.error("Request deadline exceeded")
+    return HTTPException(status_code=504, detail="Request deadline exceeded")
 
 
 @router.get("/health")
-async def health_check():
-    """Basic health check endpoint"""
+async def health_check(state: Services):
+    logger.debug("Health check endpoint called")
     try:
-        # Test database connection
-        async with db_connection.engine.connect() as conn:
-            await conn.execute("SELECT 1")
+        # Test database connection using SQLAlchemy text()
+        async with (
+            state.databases.lease() as target,
+            target.connection.engine.connect() as conn,
+        ):
+            await conn.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -54,37 +100,503 @@ async def health_check():
         ) from e
 
 
-@router.post("/query", response_model=QueryResponse)
-async def process_query(
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Process metrics in the Prometheus text format"""
+    return metrics.render_prometheus()
+
+
+@router.get("/api/databases")
+async def list_databases(state: Services):
+    """Configured database targets and the ones currently open"""
+    return {"databases": state.databases.names, "active": state.databases.active}
+
+
+@contextlib.asynccontextmanager
+async def database_target(
+    state: AppState, name: str | None
+) -> AsyncIterator[DatabaseTarget]:
+    """Lease a database target for a request; 404 if it is not configured"""
+    try:
+        target = await state.databases.acquire(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown database: {name}") from e
+    try:
+        yield target
+    finally:
+        await state.databases.release(target)
+
+
+@router.post("/api/metadata/invalidate")
+async def invalidate_metadata(state: Services, database: str | None = None):
+    """Drop cached schema metadata so the next request re-reflects it"""
+    async with database_target(state, database) as target:
+        target.metadata_manager.invalidate_cache()
+    return {"status": "invalidated"}
+
+
+async def load_metadata(
+    target: DatabaseTarget, deadline: Deadline = UNLIMITED
+) -> tuple[dict, str | None]:
+    """Current schema metadata and its fingerprint (served from cache)"""
+    metadata_manager = target.metadata_manager
+    metadata = await metadata_manager.get_table_metadata(deadline=deadline)
+
+    if not metadata:
+        raise ValueError("No database metadata available")
+
+    return metadata, metadata_manager.get_schema_fingerprint()
+
+
+def generation_options(
+    request: QueryRequest, schema_fingerprint: str | None, target: DatabaseTarget
+) -> dict:
+    return {
+        "context": request.context,
+        "schema_fingerprint": schema_fingerprint,
+        "database_type": target.database_type,
+        # Few-shot examples are kept per database target
+        "database": target.name,
+    }
+
+
+def query_response(result: BaseResponse) -> QueryResponse:
+    """QueryResponse for the outcome of SQLGenerator.generate_valid_sql"""
+    attempts = result.data.get("attempts", 0)
+    if not result.success:
+        logger.error(f"SQL generation failed: {result.error}")
+        return QueryResponse(success=False, error=result.error, attempts=attempts)
+
+    sql, cached = result.data["sql"], result.data["cached"]
+    sampled_logger.info(
+        "Successfully generated SQL (cached={}, attempts={}): {}", cached, attempts, sql
+    )
+    return QueryResponse(
+        success=True,
+        sql=sql,
+        cached=cached,
+        warnings=result.data["warnings"],
+        attempts=attempts,
+    )
+
+
+async def answer_query(  # noqa: PLR0913
+    state: AppState,
     request: QueryRequest,
-    metadata_manager: Annotated[MetadataManager, Depends(get_metadata_manager)],
-    sql_generator: Annotated[SQLGenerator, Depends(get_sql_generator)],
-    sql_validator: Annotated[SQLValidator, Depends(get_sql_validator)],
+    metadata: dict,
+    schema_fingerprint: str | None,
+    target: DatabaseTarget,
+    *,
+    deadline: Deadline = UNLIMITED,
+) -> QueryResponse:
+    """Generate valid SQL (repairing failed attempts) for one natural language query"""
+    options = generation_options(request, schema_fingerprint, target)
+    result = await state.sql_generator.generate_valid_sql(
+        query=request.query, metadata=metadata, deadline=deadline, **options
+    )
+    return query_response(result)
+
+
+@router.post("/api/query", response_model=QueryResponse)
+async def process_query(
+    request: QueryRequest, state: Services, deadline: RequestDeadline
 ):
     try:
-        # Get metadata
-        metadata = await metadata_manager.get_table_metadata()
+        sampled_logger.info("Processing query: {}", request.query)
+        async with database_target(state, request.database) as target:
+            metadata, schema_fingerprint = await load_metadata(target, deadline)
+            return await answer_query(
+                state, request, metadata, schema_fingerprint, target, deadline=deadline
+            )
+
+    except HTTPException:
+        raise
+    except TimeoutError as e:
+        raise deadline_exceeded() from e
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
-        # Generate SQL
-        generation_result = await sql_generator.generate_sql(
-            query=request.query, metadata=metadata, context=request.context
+
+@router.post("/api/query/stream")
+async def process_query_stream(
+    request: QueryRequest, state: Services, request_deadline: RequestDeadline
+):
+    """Stream generated SQL as server-sent events
+
+    `delta` events carry {"text": ...} fragments as the LLM produces them.
+    If the streamed SQL fails validation and is repaired, a `repair` event
+    carries the whole corrected SQL ({"text": ..., "attempts": ...}), which
+    replaces the deltas. A final `result` event carries the QueryResponse
+    after validation, so clients must not run the SQL before it arrives.
+    """
+    try:
+        sampled_logger.info("Streaming query: {}", request.query)
+        async with database_target(state, request.database) as target:
+            metadata, schema_fingerprint = await load_metadata(target, request_deadline)
+            options = generation_options(request, schema_fingerprint, target)
+    except HTTPException:
+        raise
+    except TimeoutError as e:
+        raise deadline_exceeded() from e
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    async def events():
+        generator = state.sql_generator
+        # Streaming and repairs share one deadline
+        deadline = generator.deadline(request_deadline)
+        try:
+            sql = await generator.cached_sql(request.query, **options)
+            cached = sql is not None
+            if cached:
+                yield sse_event("delta", json.dumps({"text": sql}))
+            else:
+                parts = []
+                stream = generator.generate_sql_stream(
+                    request.query,
+                    metadata,
+                    schema_fingerprint=schema_fingerprint,
+                    database_type=options["database_type"],
+                    database=options["database"],
+                    deadline=deadline,
+                )
+                async with contextlib.aclosing(stream):
+                    while True:
+                        # Not around the yield: the timeout must not fire
+                        # while the response is being sent
+                        async with deadline.timeout():
+                            delta = await anext(stream, None)
+                        if delta is None:
+                            break
+                        parts.append(delta)
+                        yield sse_event("delta", json.dumps({"text": delta}))
+                sql = "".join(parts).strip()
+                if not sql:
+                    raise ValueError("LLM returned no SQL")
+
+            result = await generator.generate_valid_sql(
+                request.query,
+                metadata,
+                draft=sql,
+                cached=cached,
+                deadline=deadline,
+                **options,
+            )
+            if result.success and result.data["attempts"] > 1:
+                repair = {
+                    "text": result.data["sql"],
+                    "attempts": result.data["attempts"],
+                }
+                yield sse_event("repair", json.dumps(repair))
+            response = query_response(result)
+        except TimeoutError:
+            logger.error("SQL streaming exceeded the deadline")
+            response = QueryResponse(success=False, error="No SQL before the deadline")
+        except Exception as e:
+            # Headers are already sent, so failures become the result event
+            logger.error(f"Error streaming query: {str(e)}")
+            response = QueryResponse(success=False, error=str(e))
+        yield sse_event("result", response.model_dump_json())
+
+    return StreamingResponse(
+        events(),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/api/query/batch")
+async def process_query_batch(
+    batch: BatchQueryRequest, state: Services, deadline: RequestDeadline
+):
+    """Answer many queries concurrently, streaming NDJSON results as they finish
+
+    Metadata is loaded once for the whole batch, from the batch's database.
+    Each line is a BatchQueryResult whose `index` refers to the position in
+    `queries`. The whole batch shares one request deadline.
+    """
+    if len(batch.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds the limit of {BATCH_MAX_QUERIES} queries",
         )
+    try:
+        async with database_target(state, batch.database) as target:
+            metadata, schema_fingerprint = await load_metadata(target, deadline)
+    except HTTPException:
+        raise
+    except TimeoutError as e:
+        raise deadline_exceeded() from e
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    concurrency = min(batch.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    sampled_logger.info(
+        "Processing batch of {} queries (concurrency={})",
+        len(batch.queries),
+        concurrency,
+    )
+
+    async def answer(index: int, request: QueryRequest) -> BatchQueryResult:
+        try:
+            response = await answer_query(
+                state, request, metadata, schema_fingerprint, target, deadline=deadline
+            )
+        except Exception as e:
+            logger.error(f"Error processing batch query {index}: {str(e)}")
+            response = QueryResponse(success=False, error=str(e))
+        return BatchQueryResult(index=index, **response.model_dump())
+
+    async def results():
+        async for _, result in fan_out(batch.queries, answer, concurrency):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(results(), media_type=NDJSON_MEDIA_TYPE)
+
 
-        if not generation_result.success:
-            logger.error(f"SQL generation failed: {generation_result.error}")
-            raise HTTPException(status_code=400, detail=generation_result.error)
+def check_executable(sql: str) -> None:
+    """Allow exactly one read-only query (SELECT or WITH ... SELECT); 400 otherwise
 
-        # Validate SQL
-        validation_result = await sql_validator.validate_sql(
-            sql=generation_result.data["sql"], metadata=metadata
+    The validator only rejects known dangerous keywords, so anything else
+    (INSERT, CREATE, COPY, SET, CALL, DO, ...) is refused here. Queries also
+    run in a read-only transaction where the database supports one.
+    """
+    analysis = analyze_sql(sql)
+    if analysis.statement_count != 1 or not analysis.read_only:
+        logger.error("Refused to execute SQL that is not a single read-only query")
+        raise HTTPException(
+            status_code=400, detail="Only a single SELECT query can be executed"
         )
 
+
+async def prepare_execution(
+    state: AppState, target: DatabaseTarget, sql: str, deadline: Deadline = UNLIMITED
+) -> str:
+    """Validate SQL and pass it through the cost gate; returns the SQL to run
+
+    With the cost gate enabled, SQL whose EXPLAIN estimates exceed the
+    thresholds is rejected, or runs with an added LIMIT. Raises a 504 if
+    the deadline passes first.
+    """
+    check_executable(sql)
+    metadata_manager = target.metadata_manager
+    try:
+        metadata = await metadata_manager.get_table_metadata(deadline=deadline)
+        validation_result = await state.sql_validator.validate_sql(
+            sql=sql,
+            metadata=metadata,
+            schema_fingerprint=metadata_manager.get_schema_fingerprint(),
+        )
         if not validation_result.success:
             logger.error(f"SQL validation failed: {validation_result.error}")
             raise HTTPException(status_code=400, detail=validation_result.error)
 
-        return QueryResponse(success=True, sql=generation_result.data["sql"])
+        if target.cost_gate:
+            # EXPLAINs are shared by concurrent callers; only this wait is bounded
+            async with deadline.timeout():
+                gate_result = await target.cost_gate.check(sql)
+            if not gate_result.success:
+                raise HTTPException(status_code=400, detail=gate_result.error)
+            sql = gate_result.data["sql"]
+        return sql
+    except TimeoutError as e:
+        raise deadline_exceeded() from e
 
-    except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) from e
+
+async def run_query(
+    target: DatabaseTarget, sql: str, deadline: Deadline = UNLIMITED
+) -> ColumnarResult:
+    return await target.connection.execute_columnar(sql, deadline)
+
+
+def output_format(
+    requested: str | None, accept: str | None, supported: list[str], default: str
+) -> str:
+    """Format from the request body, else negotiated from the Accept header"""
+    result_format = requested or negotiate_format(accept, supported, default)
+    if result_format is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Acceptable formats: {', '.join(supported)}",
+        )
+    if result_format in ARROW_FORMATS and not arrow_available():
+        raise HTTPException(
+            status_code=400,
+            detail=f"{result_format} output requires pyarrow to be installed",
+        )
+    return result_format
+
+
+@router.post("/api/execute", response_model=ExecuteResponse)
+async def execute_query(
+    request: ExecuteQueryRequest,
+    state: Services,
+    deadline: RequestDeadline,
+    accept: Annotated[str | None, Header()] = None,
+):
+    """Validate and execute SQL, serving repeat queries from the result cache
+
+    Results are cached per normalized SQL and invalidated when a table they
+    read is modified (NOTIFY or modification counters), on schema changes,
+    or after RESULT_CACHE_TTL seconds.
+
+    The output format is `format` if given, otherwise negotiated from the
+    Accept header: JSON (default), CSV, an Arrow IPC stream or Parquet, all
+    encoded straight from the columnar result. JSON carries rows as objects,
+    or one value list per column with `json_layout: "columns"`. Other formats
+    report the row count and cache status in X-Row-Count and X-Result-Cached.
+    A 504 is returned (and the query cancelled) if the request deadline
+    passes before the result is ready.
+    """
+    result_format = output_format(
+        request.format, accept, ["json", "csv", "arrow", "parquet"], "json"
+    )
+    async with database_target(state, request.database) as target:
+        sql = await prepare_execution(state, target, request.sql, deadline)
+        try:
+            result, cached = await fetch_result(
+                state, target, sql, request.use_cache, deadline
+            )
+            return await result_response(request, result_format, sql, result, cached)
+        except TimeoutError as e:
+            raise deadline_exceeded() from e
+        except Exception as e:
+            logger.error(f"Error executing query: {str(e)}")
+            return ExecuteResponse(success=False, sql=sql, error=str(e))
+
+
+async def fetch_result(
+    state: AppState,
+    target: DatabaseTarget,
+    sql: str,
+    use_cache: bool,
+    deadline: Deadline = UNLIMITED,
+) -> tuple[ColumnarResult, bool]:
+    """Run SQL, through the result cache when it can be invalidated
+
+    A cached query's execution is shared by concurrent callers, so the
+    deadline bounds each caller's wait; the query is cancelled once every
+    caller has given up.
+    """
+    result_cache = state.result_cache
+    analysis = analyze_sql(sql)
+    tables = [table.name for table in analysis.base_tables()]
+    # Results of queries without tables cannot be invalidated (now(), ...)
+    if result_cache and use_cache and analysis.read_only and tables:
+        key = result_cache.make_key(analysis.normalized_sql, scope=target.name)
+        async with deadline.timeout():
+            return await result_cache.get_or_execute(
+                key, tables, lambda: run_query(target, sql), scope=target.name
+            )
+    return await run_query(target, sql, deadline), False
+
+
+async def result_response(
+    request: ExecuteQueryRequest,
+    result_format: str,
+    sql: str,
+    result: ColumnarResult,
+    cached: bool,
+) -> Response:
+    if result_format == "json":
+        header = {
+            "success": True,
+            "sql": sql,
+            "row_count": result.row_count,
+            "cached": cached,
+        }
+        body = (
+            result_json_columns(header, result)
+            if request.json_layout == "columns"
+            else result_json(header, result, STREAM_CHUNK_SIZE)
+        )
+        return StreamingResponse(body, media_type=JSON_MEDIA_TYPE)
+
+    headers = {
+        "X-Row-Count": str(result.row_count),
+        "X-Result-Cached": str(cached).lower(),
+    }
+    if result_format == "csv":
+        return StreamingResponse(
+            result_csv(result, STREAM_CHUNK_SIZE),
+            media_type=CSV_MEDIA_TYPE,
+            headers=headers,
+        )
+    if result_format == "parquet":
+        body = await asyncio.to_thread(result_parquet, result, PARQUET_COMPRESSION)
+        return Response(body, media_type=PARQUET_MEDIA_TYPE, headers=headers)
+    body = await asyncio.to_thread(result_arrow_ipc, result)
+    return Response(body, media_type=ARROW_STREAM_MEDIA_TYPE, headers=headers)
+
+
+class LeasedStreamingResponse(StreamingResponse):
+    """Streaming response that releases a database lease once it is done
+
+    The lease is released however the response ends: fully sent, failed, or
+    cut short by a client that disconnected before or during the body. The
+    body is closed first, so the query's cursor is gone before its
+    connection goes back to the pool.
+    """
+
+    def __init__(
+        self,
+        content: AsyncIterator[bytes],
+        lease: contextlib.AsyncExitStack,
+        media_type: str,
+    ):
+        super().__init__(content, media_type=media_type)
+        self.lease = lease
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                await self.lease.aclose()
+
+
+@router.post("/api/execute/stream")
+async def stream_query(
+    request: ExecuteRequest,
+    state: Services,
+    deadline: RequestDeadline,
+    accept: Annotated[str | None, Header()] = None,
+):
+    """Validate and execute SQL, streaming rows back as NDJSON or Arrow IPC
+
+    The format is `format` if given, otherwise negotiated from Accept. The
+    request deadline bounds the time to the first chunk of rows.
+    """
+    result_format = output_format(request.format, accept, ["ndjson", "arrow"], "ndjson")
+    # The lease outlives this handler: the response below releases it
+    async with contextlib.AsyncExitStack() as stack:
+        target = await stack.enter_async_context(
+            database_target(state, request.database)
+        )
+        sql = await prepare_execution(state, target, request.sql, deadline)
+        lease = stack.pop_all()
+
+    chunks = target.connection.stream_columnar(
+        sql, request.chunk_size or STREAM_CHUNK_SIZE, deadline
+    )
+    if result_format == "arrow":
+        body, media_type = arrow_stream(chunks), ARROW_STREAM_MEDIA_TYPE
+    else:
+        body, media_type = ndjson_stream(chunks), NDJSON_MEDIA_TYPE
+
+    async def logged(stream):
+        # Headers are already sent, so errors can only end the stream early
+        try:
+            async with contextlib.aclosing(stream):
+                async for data in stream:
+                    yield data
+        except Exception as e:
+            logger.error(f"Error while streaming query results: {str(e)}")
+            raise
+
+    return LeasedStreamingResponse(logged(body), lease, media_type=media_type)
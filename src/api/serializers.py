@@ -0,0 +1,234 @@
+"""Encoders that turn chunked query results into streamed response bodies."""
+
+import csv
+import io
+import json
+from array import array
+from collections.abc import AsyncIterator, Iterator
+
+from src.core.results import ColumnarResult
+from src.utils.logger import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow output is optional (pip install "TableTalk[arrow]")
+    pa = None
+    pq = None
+
+logger = get_logger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+SSE_MEDIA_TYPE = "text/event-stream"
+JSON_MEDIA_TYPE = "application/json"
+CSV_MEDIA_TYPE = "text/csv"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Accept header media types and the result formats they select
+MEDIA_TYPE_FORMATS = {
+    JSON_MEDIA_TYPE: "json",
+    NDJSON_MEDIA_TYPE: "ndjson",
+    CSV_MEDIA_TYPE: "csv",
+    ARROW_STREAM_MEDIA_TYPE: "arrow",
+    PARQUET_MEDIA_TYPE: "parquet",
+    "application/x-parquet": "parquet",
+}
+# Formats that are encoded with pyarrow
+ARROW_FORMATS = {"arrow", "parquet"}
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def negotiate_format(
+    accept: str | None, supported: list[str], default: str
+) -> str | None:
+    """Preferred supported format for an Accept header, honouring q-values
+
+    No header (or */*) selects the default; None means nothing acceptable.
+    """
+    if not accept:
+        return default
+    ranges = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(ranges):
+        if media_type in ("*/*", "application/*"):
+            return default
+        result_format = MEDIA_TYPE_FORMATS.get(media_type)
+        if result_format in supported:
+            return result_format
+    return None
+
+
+def sse_event(event: str, data: str) -> bytes:
+    """Encode one server-sent event; data is split so newlines survive"""
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {event}\n{lines}\n".encode()
+
+
+async def ndjson_stream(
+    chunks: AsyncIterator[ColumnarResult],
+) -> AsyncIterator[bytes]:
+    """One JSON object per row, flushed once per chunk"""
+    async for chunk in chunks:
+        columns = chunk.columns
+        yield "".join(
+            json.dumps(dict(zip(columns, row, strict=True)), default=str) + "\n"
+            for row in chunk.row_tuples()
+        ).encode()
+
+
+async def arrow_stream(
+    chunks: AsyncIterator[ColumnarResult],
+) -> AsyncIterator[bytes]:
+    """Arrow IPC stream with one record batch per chunk
+
+    The schema message and end-of-stream marker are always written, so a
+    result without rows is still a valid stream (of its columns, as text).
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+    async for chunk in chunks:
+        table = result_arrow_table(chunk)
+        if schema is None:
+            # All-NULL columns have no type yet; text accepts any later value
+            schema = pa.schema(
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                for field in table.schema
+            )
+            writer = pa.ipc.new_stream(sink, schema)
+        if table.schema != schema:
+            # Chunks are coerced to the schema inferred from the first one
+            table = table.cast(schema)
+        writer.write_table(table)
+        yield _drain(sink)
+
+    if writer is None:
+        # No chunks at all: a stream with an empty schema
+        writer = pa.ipc.new_stream(sink, pa.schema([]))
+    writer.close()
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def result_json(
+    header: dict, result: ColumnarResult, chunk_rows: int
+) -> Iterator[bytes]:
+    """JSON object with header fields plus "rows", encoded chunk by chunk
+
+    Rows are encoded straight from the columns; the full row list never exists.
+    """
+    opening = json.dumps({**header, "columns": result.columns})
+    yield f'{opening[:-1]}, "rows": ['.encode()
+    columns = result.columns
+    separator = ""
+    for chunk in _chunks(result.row_tuples(), chunk_rows):
+        # One dumps call per chunk; the row dicts live only until it returns
+        encoded = json.dumps(
+            [dict(zip(columns, row, strict=True)) for row in chunk], default=str
+        )
+        yield (separator + encoded[1:-1]).encode()
+        separator = ","
+    yield b"]}"
+
+
+def result_json_columns(header: dict, result: ColumnarResult) -> Iterator[bytes]:
+    """JSON object with header fields plus "data", one value list per column
+
+    Each column is encoded in a single dumps call (typed arrays via tolist),
+    which is several times faster than encoding row objects.
+    """
+    opening = json.dumps({**header, "columns": result.columns})
+    yield f'{opening[:-1]}, "data": ['.encode()
+    for i, column in enumerate(result.data):
+        values = column.tolist() if isinstance(column, array) else list(column)
+        yield (("," if i else "") + json.dumps(values, default=str)).encode()
+    yield b"]}"
+
+
+def result_csv(result: ColumnarResult, chunk_rows: int) -> Iterator[bytes]:
+    """CSV with a header row, encoded chunk by chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(result.columns)
+    for chunk in _chunks(result.row_tuples(), chunk_rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def result_arrow_table(result: ColumnarResult) -> "pa.Table":
+    """Arrow table over the result; typed-array columns share their buffers"""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    arrays = [_arrow_array(column) for column in result.data]
+    return pa.Table.from_arrays(arrays, names=result.columns)
+
+
+def result_arrow_ipc(result: ColumnarResult) -> bytes:
+    """Arrow IPC stream containing the whole result"""
+    table = result_arrow_table(result)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def result_parquet(result: ColumnarResult, compression: str) -> bytes:
+    """Parquet file containing the whole result"""
+    table = result_arrow_table(result)
+    sink = io.BytesIO()
+    pq.write_table(table, sink, compression=compression)
+    return sink.getvalue()
+
+
+def _arrow_array(column) -> "pa.Array":
+    if isinstance(column, array):
+        arrow_type = pa.int64() if column.typecode == "q" else pa.float64()
+        # Zero-copy: Arrow wraps the array's memory without converting values
+        return pa.Array.from_buffers(
+            arrow_type, len(column), [None, pa.py_buffer(column)]
+        )
+    try:
+        return pa.array(column)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed value types in one column: fall back to their text form
+        return pa.array([None if v is None else str(v) for v in column])
+
+
+def _chunks(rows: Iterator[tuple], size: int) -> Iterator[list[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,179 @@
+"""Long-lived application services, created once per process by the lifespan."""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from fastapi import Depends, FastAPI, Request
+
+from src.db.metadata import metadata_cache
+from src.db.registry import DatabaseRegistry, DatabaseTarget
+from src.db.result_cache import ResultCache
+from src.llm.router import ProviderRouter
+from src.sql.cost_gate import CostGate
+from src.sql.example_store import ExampleStore
+from src.sql.generation_cache import GenerationCache
+from src.sql.generator import SQLGenerator
+from src.sql.validator import SQLValidator
+from src.utils.config import (
+    COST_GATE_ENABLED,
+    EXAMPLE_STORE_ENABLED,
+    EXAMPLE_STORE_PATH,
+    EXAMPLE_STORE_SIZE,
+    GENERATION_CACHE_ENABLED,
+    GENERATION_CACHE_PATH,
+    GENERATION_CACHE_SIZE,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_NOTIFY_CHANNEL,
+    RESULT_CACHE_POLL_INTERVAL,
+    RESULT_CACHE_TTL,
+)
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AppState:
+    """Clients, pools and caches shared by every request
+
+    Routes receive it through the `Services` dependency, so no request builds
+    an LLM client, connection pool, validator or schema index of its own.
+    """
+
+    def __init__(
+        self,
+        llm_provider: ProviderRouter | None = None,
+        databases: DatabaseRegistry | None = None,
+    ):
+        self.llm_provider = llm_provider or ProviderRouter.from_config()
+        self.generation_cache = (
+            GenerationCache(
+                max_entries=GENERATION_CACHE_SIZE,
+                sqlite_path=GENERATION_CACHE_PATH or None,
+            )
+            if GENERATION_CACHE_ENABLED
+            else None
+        )
+        # Holds the per-schema column indexes and the verdict cache
+        self.sql_validator = SQLValidator()
+        self.example_store = self._example_store()
+        self.sql_generator = SQLGenerator(
+            self.llm_provider,
+            cache=self.generation_cache,
+            examples=self.example_store,
+            validator=self.sql_validator,
+        )
+        self.result_cache = (
+            ResultCache(max_bytes=RESULT_CACHE_MAX_BYTES, ttl=RESULT_CACHE_TTL)
+            if RESULT_CACHE_ENABLED
+            else None
+        )
+        self.databases = databases or DatabaseRegistry.from_config(
+            on_open=self.open_target, on_close=self.close_target
+        )
+        self.metadata_cache = metadata_cache
+
+    @staticmethod
+    def _example_store() -> ExampleStore | None:
+        if not EXAMPLE_STORE_ENABLED:
+            return None
+        if not ExampleStore.available():
+            logger.warning(
+                'Few-shot examples disabled: install NumPy ("TableTalk[examples]")'
+            )
+            return None
+        return ExampleStore(
+            max_examples=EXAMPLE_STORE_SIZE, sqlite_path=EXAMPLE_STORE_PATH or None
+        )
+
+    def _schema_listeners(self) -> list:
+        caches = [self.generation_cache, self.result_cache]
+        return [cache.on_schema_change for cache in caches if cache]
+
+    async def startup(self) -> None:
+        start = time.perf_counter()
+        for listener in self._schema_listeners():
+            self.metadata_cache.add_listener(listener)
+        self.metadata_cache.load_snapshot()
+        # The default database and the LLM clients connect concurrently
+        await asyncio.gather(
+            self._open_default_database(), self.llm_provider.initialize()
+        )
+        self.metadata_cache.start()
+        logger.info(
+            f"Startup completed in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+
+    async def _open_default_database(self) -> None:
+        # Other targets open on first use
+        async with self.databases.lease():
+            logger.info("Database connection initialized")
+
+    async def shutdown(self) -> None:
+        await self.metadata_cache.stop()
+        for listener in self._schema_listeners():
+            self.metadata_cache.remove_listener(listener)
+        if self.result_cache:
+            await self.result_cache.stop()
+        await self.databases.close()
+        await self.llm_provider.shutdown()
+        if self.generation_cache:
+            self.generation_cache.close()
+        if self.example_store:
+            self.example_store.close()
+
+    async def open_target(self, target: DatabaseTarget) -> None:
+        """Attach per-database helpers once a database target is open"""
+        if COST_GATE_ENABLED:
+            target.cost_gate = CostGate(target.connection)
+        if self.result_cache:
+            result_cache = self.result_cache
+            if RESULT_CACHE_NOTIFY_CHANNEL:
+                await target.connection.listen(
+                    RESULT_CACHE_NOTIFY_CHANNEL,
+                    lambda payload: result_cache.on_notify(payload, scope=target.name),
+                )
+            result_cache.start(
+                target.connection.modification_counters,
+                RESULT_CACHE_POLL_INTERVAL,
+                scope=target.name,
+            )
+
+    async def close_target(self, target: DatabaseTarget) -> None:
+        if self.result_cache:
+            await self.result_cache.stop(target.name)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Build the AppState on startup and release its clients on shutdown"""
+    logger.info("FastAPI server starting up...")
+    state = AppState()
+    try:
+        await state.startup()
+    except Exception as e:
+        logger.error(f"Startup failed: {str(e)}")
+        # Release whatever did start (pools, client sessions)
+        with contextlib.suppress(Exception):
+            await state.shutdown()
+        raise RuntimeError("Failed to initialize application") from e
+    app.state.services = state
+    try:
+        yield
+    finally:
+        logger.info("FastAPI server shutting down...")
+        try:
+            await state.shutdown()
+        except Exception as e:
+            logger.error(f"Shutdown error: {str(e)}")
+            raise RuntimeError("Failed to shutdown application") from e
+
+
+def get_state(request: Request) -> AppState:
+    return request.app.state.services
+
+
+Services = Annotated[AppState, Depends(get_state)]
@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+
+from src.core.db import DatabaseType
+from src.utils.deadline import UNLIMITED, Deadline
 
 
 class BaseResponse:
@@ -24,6 +28,46 @@ class BaseProvider(ABC):
 
 class BaseLLMProvider(BaseProvider):
     @abstractmethod
-    async def generate_sql(self, prompt: str, metadata: dict) -> BaseResponse:
-        """Generate SQL from natural language"""
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
+        """Generate SQL from natural language
+
+        Feedback holds (SQL, validation error) pairs of earlier attempts at
+        the same question, asking for a repaired query. The database type
+        selects the SQL dialect the prompt asks for. The HTTP request is
+        given the time left before the deadline, at most config.timeout.
+        """
         pass
+
+    async def generate_sql_stream(
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> AsyncIterator[str]:
+        """Generate SQL as a stream of text deltas
+
+        Providers that cannot stream yield the whole SQL at once. Failures are
+        raised rather than returned, since part of the output may be sent.
+        """
+        response = await self.generate_sql(
+            prompt,
+            metadata,
+            examples,
+            database_type=database_type,
+            deadline=deadline,
+        )
+        if not response.success:
+            raise RuntimeError(response.error)
+        yield response.data["sql"]
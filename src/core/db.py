@@ -1,7 +1,11 @@
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable, Sequence
 from enum import Enum
 from typing import Any
 
+from src.core.results import ColumnarResult
+from src.utils.deadline import UNLIMITED, Deadline
+
 
 class DatabaseType(Enum):
     """Supported database types"""
@@ -10,6 +14,32 @@ class DatabaseType(Enum):
     TRINO = "trino"
 
 
+class QueryPlan:
+    """Planner estimates for a query, from EXPLAIN without executing it
+
+    Estimates the planner could not produce are None.
+    """
+
+    def __init__(
+        self,
+        rows: float | None = None,
+        cost: float | None = None,
+        bytes_scanned: float | None = None,
+        raw: Any = None,
+    ):
+        self.rows = rows
+        self.cost = cost
+        self.bytes_scanned = bytes_scanned
+        self.raw = raw
+
+    def to_dict(self) -> dict[str, float | None]:
+        return {
+            "rows": self.rows,
+            "cost": self.cost,
+            "bytes_scanned": self.bytes_scanned,
+        }
+
+
 class DatabaseInterface(ABC):
     """Abstract base class for database connections"""
 
@@ -24,10 +54,69 @@ class DatabaseInterface(ABC):
         pass
 
     @abstractmethod
-    async def execute_query(self, query: str) -> list[dict[str, Any]]:
-        """Execute a query and return results"""
+    async def execute_columnar(
+        self, query: str, deadline: Deadline = UNLIMITED
+    ) -> ColumnarResult:
+        """Execute a query and return its result column by column
+
+        Column names are stored once and values are packed per column, so no
+        dict is allocated per row. Raises TimeoutError at the deadline, after
+        cancelling the query on the server.
+        """
         pass
 
+    async def execute_query(
+        self, query: str, deadline: Deadline = UNLIMITED
+    ) -> Sequence[dict[str, Any]]:
+        """Execute a query and return its rows as dicts
+
+        The rows are a lazy view over the columnar result; each dict is built
+        when it is accessed.
+        """
+        return (await self.execute_columnar(query, deadline)).row_view()
+
+    @abstractmethod
+    def stream_columnar(
+        self, query: str, chunk_size: int = 1000, deadline: Deadline = UNLIMITED
+    ) -> AsyncIterator[ColumnarResult]:
+        """Execute a query and yield results in chunks of at most chunk_size rows
+
+        Implementations use server-side cursors so memory is bounded by the
+        chunk size rather than by the size of the result set. Each chunk is
+        built from driver rows without intermediate dicts. The deadline
+        bounds the time to the first chunk; after that the consumer sets the
+        pace, and closing the stream early cancels the query. A result without
+        rows is one empty chunk, so its columns are still known.
+        """
+        pass
+
+    async def stream_query(
+        self, query: str, chunk_size: int = 1000, deadline: Deadline = UNLIMITED
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Like stream_columnar, with each chunk as a list of row dicts"""
+        async for chunk in self.stream_columnar(query, chunk_size, deadline):
+            yield chunk.to_dicts()
+
+    @abstractmethod
+    async def explain(self, query: str, deadline: Deadline = UNLIMITED) -> QueryPlan:
+        """Estimate rows, cost and bytes scanned for a query without running it"""
+        pass
+
+    async def modification_counters(self) -> dict[str, int] | None:
+        """Per-table write counters that change whenever a table is modified
+
+        Used to invalidate cached results. None if the engine has no such
+        counters.
+        """
+        return None
+
+    async def listen(self, channel: str, callback: Callable[[str], None]) -> bool:
+        """Call callback with each notification payload sent on channel
+
+        Returns False if the engine does not support notifications.
+        """
+        return False
+
     @abstractmethod
     async def test_connection(self) -> bool:
         """Test if the connection is working"""
@@ -1,13 +1,37 @@
+from collections.abc import AsyncIterator
 from typing import Protocol
 
 from src.core.base import BaseResponse
+from src.core.db import DatabaseType
+from src.utils.deadline import UNLIMITED, Deadline
 
 
 class LLMProvider(Protocol):
-    async def generate_sql(self, prompt: str, metadata: dict) -> BaseResponse:
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
         """Protocol for LLM providers"""
         pass
 
+    def generate_sql_stream(
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> AsyncIterator[str]:
+        """Protocol for streaming LLM providers"""
+        pass
+
 
 class LLMConfig:
     def __init__(
@@ -15,6 +39,7 @@ class LLMConfig:
         model: str,
         temperature: float = 0.1,
         max_tokens: int = 1000,
+        # Seconds per LLM request; a request deadline can only shorten it
         timeout: int = 30,
     ):
         self.model = model
@@ -1,11 +1,18 @@
 """Module for managing prompt templates and rendering."""
 
+import hashlib
+import json
+from collections import OrderedDict
 from string import Template
 
+from src.core.schema_compiler import SCHEMA_LEGEND, schema_compiler
+
 
 class PromptTemplate:
     def __init__(self, template: str):
         self.template = Template(template)
+        # Changes whenever the template text changes; used in cache keys
+        self.version = hashlib.sha256(template.encode()).hexdigest()[:12]
 
     def render(self, variables: dict | None = None) -> str:
         """Render the template with provided variables."""
@@ -15,22 +22,51 @@ class PromptTemplate:
             raise ValueError(f"Missing required variable in template: {e}") from e
 
 
-# System prompts
-SQL_GENERATION_PROMPT = PromptTemplate(
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English and SQL)."""
+    return len(text) // 4 + 1
+
+
+def format_examples(examples: list[tuple[str, str]] | None) -> str:
+    """Few-shot block placed before the question, empty without examples"""
+    if not examples:
+        return ""
+    lines = ["Verified examples for this database:"]
+    for question, sql in examples:
+        lines.append(f"Query: {question}\nSQL: {sql}")
+    return "\n\n".join(lines) + "\n\n"
+
+
+# System prompts. Everything that is the same for every question against a
+# schema goes in the system message, ahead of the question, so providers can
+# reuse the processed prefix (OpenAI prompt caching, Ollama's KV cache).
+SQL_SYSTEM_PROMPT = PromptTemplate(
     template=(
         "You are an expert SQL generator. Generate valid SQL queries based on "
         "natural language input and database schema metadata. The target database "
-        "type is $database_type.\n\n"
-        "Additional context: $context\n"
-        "Schema metadata: $metadata\n"
-        "Query: $query\n\n"
-        "Return only valid SQL in a JSON response with a 'sql' key."
+        "type is $database_type.\n"
+        "Return only valid SQL in a JSON response with a 'sql' key.\n\n"
+        f"Schema ({SCHEMA_LEGEND}):\n$metadata"
+    )
+)
+
+# Few-shot examples vary per question, so they follow the shared prefix
+SQL_QUESTION_PROMPT = PromptTemplate(template="${examples}Query: $query")
+
+# Sent after a failed attempt, which is replayed as the assistant's answer, so
+# the system prefix and the question stay cached
+SQL_REPAIR_PROMPT = PromptTemplate(
+    template=(
+        "That SQL failed validation: $error\n"
+        "Return corrected SQL for the same query in the same JSON format."
     )
 )
 
 # Default prompts dictionary
 DEFAULT_PROMPTS = {
-    "sql_generation": SQL_GENERATION_PROMPT,
+    "sql_system": SQL_SYSTEM_PROMPT,
+    "sql_question": SQL_QUESTION_PROMPT,
+    "sql_repair": SQL_REPAIR_PROMPT,
 }
 
 
@@ -40,6 +76,15 @@ class PromptManager:
         self.prompts = DEFAULT_PROMPTS.copy()
         if custom_prompts:
             self.prompts.update(custom_prompts)
+        # Rendered system prefixes by (template version, database type, schema)
+        self._prefixes: OrderedDict[tuple[str, str, str], str] = OrderedDict()
+        self._max_prefixes = 64
+
+    @property
+    def version(self) -> str:
+        """Changes whenever any template changes; used in cache keys"""
+        versions = "".join(p.version for _, p in sorted(self.prompts.items()))
+        return hashlib.sha256(versions.encode()).hexdigest()[:12]
 
     def get_prompt(self, prompt_name: str) -> PromptTemplate:
         """Get a prompt template by name."""
@@ -52,6 +97,67 @@ class PromptManager:
         self.prompts[name] = PromptTemplate(template)
 
     def render_prompt(self, prompt_name: str, variables: dict | None = None) -> str:
-        """Render a prompt template with provided variables."""
+        """Render a prompt template with provided variables.
+
+        A metadata dict is rendered as compact schema text, compiled once per
+        schema version and table subset.
+        """
         template = self.get_prompt(prompt_name)
-        return template.render(variables)
\ No newline at end of file
+        if variables and isinstance(variables.get("metadata"), dict):
+            variables = {
+                **variables,
+                "metadata": schema_compiler.compile(variables["metadata"]),
+            }
+        return template.render(variables)
+
+    def build_messages(
+        self,
+        query: str,
+        metadata: dict,
+        database_type: str,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+    ) -> list[dict[str, str]]:
+        """System message shared by all questions on a schema, then the question
+
+        Examples are (question, SQL) pairs verified on the same database.
+        Feedback holds (SQL, error) pairs of failed attempts, each added as an
+        assistant answer followed by a repair request.
+        """
+        messages = [
+            {"role": "system", "content": self.system_prefix(metadata, database_type)},
+            {
+                "role": "user",
+                "content": self.render_prompt(
+                    "sql_question",
+                    {"query": query, "examples": format_examples(examples)},
+                ),
+            },
+        ]
+        for sql, error in feedback or []:
+            messages.append({"role": "assistant", "content": json.dumps({"sql": sql})})
+            messages.append(
+                {
+                    "role": "user",
+                    "content": self.render_prompt("sql_repair", {"error": error}),
+                }
+            )
+        return messages
+
+    def system_prefix(self, metadata: dict, database_type: str) -> str:
+        """Instructions plus compiled schema, rendered once per schema version"""
+        template = self.get_prompt("sql_system")
+        schema = schema_compiler.compile(metadata)
+        # The compiled text is memoized, so hashing it is cached by the str
+        key = (template.version, database_type, schema)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = template.render(
+                {"metadata": schema, "database_type": database_type}
+            )
+            self._prefixes[key] = prefix
+            while len(self._prefixes) > self._max_prefixes:
+                self._prefixes.popitem(last=False)
+        else:
+            self._prefixes.move_to_end(key)
+        return prefix
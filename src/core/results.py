@@ -0,0 +1,127 @@
+"""Column-oriented query results: names stored once, values in per-column arrays."""
+
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+# Signed 64-bit range of array typecode "q"
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def compact_column(values: Sequence[Any]) -> Sequence[Any]:
+    """Pack a column into the smallest representation that round-trips
+
+    Integer and float columns without NULLs become typed arrays (8 bytes per
+    value, no per-value objects). In text columns equal strings share one
+    object, so repeated values are stored once. Anything else is a tuple.
+    """
+    types = set(map(type, values))
+    if types == {int}:
+        if min(values) >= _INT64_MIN and max(values) <= _INT64_MAX:
+            return array("q", values)
+    elif types == {float}:
+        return array("d", values)
+    elif types <= {str, type(None)}:
+        shared: dict[str | None, str | None] = {}
+        return tuple(map(shared.setdefault, values, values))
+    return tuple(values)
+
+
+class RowView(Sequence):
+    """Read-only sequence of row dicts over a ColumnarResult, built on access"""
+
+    def __init__(self, result: "ColumnarResult"):
+        self._result = result
+
+    def __len__(self) -> int:
+        return self._result.row_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        result = self._result
+        return {
+            name: column[index]
+            for name, column in zip(result.columns, result.data, strict=True)
+        }
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return self._result.rows()
+
+
+class ColumnarResult:
+    """Query result stored column by column
+
+    Rows are produced lazily as dicts for callers that expect the row-oriented
+    form; nothing is materialised per row until it is asked for.
+    """
+
+    def __init__(self, columns: list[str], data: list[Sequence[Any]]):
+        if len(columns) != len(data):
+            raise ValueError("Expected one value sequence per column")
+        self.columns = columns
+        self.data = data
+        self._nbytes: int | None = None
+
+    @classmethod
+    def from_rows(cls, rows: list[dict[str, Any]]) -> "ColumnarResult":
+        """Build from row dicts; column order follows the first row"""
+        columns = list(rows[0]) if rows else []
+        return cls(
+            columns,
+            [compact_column([row.get(name) for row in rows]) for name in columns],
+        )
+
+    @classmethod
+    def from_tuples(
+        cls, columns: list[str], rows: Iterable[Sequence[Any]]
+    ) -> "ColumnarResult":
+        """Build from driver rows (tuples, Records) without per-row dicts"""
+        data = [compact_column(values) for values in zip(*rows, strict=True)]
+        return cls(columns, data or [() for _ in columns])
+
+    @property
+    def row_count(self) -> int:
+        return len(self.data[0]) if self.data else 0
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def rows(self) -> Iterator[dict[str, Any]]:
+        """Row dicts, built one at a time"""
+        for values in zip(*self.data, strict=True):
+            yield dict(zip(self.columns, values, strict=True))
+
+    def row_tuples(self) -> Iterator[tuple]:
+        return zip(*self.data, strict=True)
+
+    def row_view(self) -> RowView:
+        """Lazy list-like view of row dicts, for code written against row dicts"""
+        return RowView(self)
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return list(self.rows())
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the result (containers plus distinct values)"""
+        if self._nbytes is None:
+            total = sys.getsizeof(self.columns) + sys.getsizeof(self.data)
+            total += sum(sys.getsizeof(name) for name in self.columns)
+            seen: set[int] = set()
+            for column in self.data:
+                total += sys.getsizeof(column)
+                if isinstance(column, array):
+                    continue
+                for value in column:
+                    if id(value) not in seen:
+                        seen.add(id(value))
+                        total += sys.getsizeof(value)
+            self._nbytes = total
+        return self._nbytes
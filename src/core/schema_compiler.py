@@ -0,0 +1,117 @@
+"""Compact DDL-like schema text for prompts, compiled once per metadata snapshot."""
+
+from collections import OrderedDict
+
+# Verbose reflected type names and their usual short forms
+_TYPE_ALIASES = {
+    "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamptz",
+    "time without time zone": "time",
+    "time with time zone": "timetz",
+    "character varying": "varchar",
+    "double precision": "double",
+    "boolean": "bool",
+}
+
+SCHEMA_LEGEND = (
+    "one table per line: table(column type flags) -- comment; "
+    "PK primary key, FK→table.column foreign key, NOT NULL required"
+)
+
+
+def _type_name(type_name: str) -> str:
+    lowered = type_name.lower()
+    for verbose, short in _TYPE_ALIASES.items():
+        if lowered.startswith(verbose):
+            return short + lowered[len(verbose) :]
+    return lowered
+
+
+def _quote(comment: str) -> str:
+    return "'" + comment.replace("'", "''") + "'"
+
+
+def compile_table(name: str, info: dict) -> str:
+    """One line per table: orders(id integer PK, customer_id integer FK→customers.id)"""
+    references = {
+        fk["column"]: f"{fk['references']['table']}.{fk['references']['column']}"
+        for fk in info.get("foreign_keys") or []
+    }
+    primary_key = set(info.get("primary_key") or [])
+    columns = []
+    for column_name, column in info["columns"].items():
+        parts = [column_name, _type_name(column.get("type", ""))]
+        is_primary = column_name in primary_key or column.get("primary_key")
+        if is_primary:
+            parts.append("PK")
+        if column_name in references:
+            parts.append(f"FK→{references[column_name]}")
+        if column.get("nullable") is False and not is_primary:
+            parts.append("NOT NULL")
+        if column.get("comment"):
+            parts.append(_quote(column["comment"]))
+        columns.append(" ".join(parts))
+    line = f"{name}({', '.join(columns)})"
+    if info.get("comment"):
+        line += f" -- {info['comment']}"
+    return line
+
+
+def is_table(info: object) -> bool:
+    return isinstance(info, dict) and "columns" in info
+
+
+class SchemaCompiler:
+    """Memoized compact rendering of metadata snapshots
+
+    Metadata cache entries are never mutated: a refresh builds new dicts for
+    changed tables and keeps the objects of unchanged ones, and pruning
+    selects from the same objects. Object identity therefore identifies a
+    table version, so each table is compiled once per schema version and each
+    pruned table subset is joined once. Cached entries hold references to
+    their source dicts, so the ids in the keys cannot be reused while cached.
+    """
+
+    def __init__(self, max_tables: int = 8192, max_schemas: int = 256):
+        self.max_tables = max_tables
+        self.max_schemas = max_schemas
+        self._tables: OrderedDict[tuple[str, int], tuple[dict, str]] = OrderedDict()
+        self._schemas: OrderedDict[tuple, tuple[list[dict], str]] = OrderedDict()
+
+    def compile(self, metadata: dict) -> str:
+        """Schema text for a metadata dict (a full snapshot or a pruned subset)"""
+        key = tuple((name, id(info)) for name, info in metadata.items())
+        cached = self._schemas.get(key)
+        if cached is not None:
+            self._schemas.move_to_end(key)
+            return cached[1]
+
+        lines = []
+        for name, info in metadata.items():
+            if is_table(info):
+                lines.append(self._compile_table(name, info))
+            elif name != "database_type":
+                # Rendered by the prompt template itself
+                lines.append(f"{name}: {info}")
+        text = "\n".join(lines)
+
+        self._schemas[key] = (list(metadata.values()), text)
+        while len(self._schemas) > self.max_schemas:
+            self._schemas.popitem(last=False)
+        return text
+
+    def _compile_table(self, name: str, info: dict) -> str:
+        key = (name, id(info))
+        cached = self._tables.get(key)
+        if cached is not None:
+            self._tables.move_to_end(key)
+            return cached[1]
+        line = compile_table(name, info)
+        self._tables[key] = (info, line)
+        while len(self._tables) > self.max_tables:
+            self._tables.popitem(last=False)
+        return line
+
+
+# Shared by every PromptManager, so all providers reuse the compiled text
+schema_compiler = SchemaCompiler()
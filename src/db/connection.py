@@ -1,16 +1,20 @@
+from collections.abc import AsyncIterator, Callable, Sequence
 from urllib.parse import urlparse
 
-from src.core.db import DatabaseInterface
+from src.core.db import DatabaseInterface, QueryPlan
+from src.core.results import ColumnarResult
 from src.db.postgres_db import PostgreSQLDatabase
 from src.db.trino_db import TrinoDatabase
 from src.utils.config import DATABASE_URL
+from src.utils.deadline import UNLIMITED, Deadline
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
 class DatabaseConnection:
-    def __init__(self):
+    def __init__(self, url: str = DATABASE_URL):
+        self.url = url
         self._db: DatabaseInterface | None = None
 
     async def initialize(self) -> None:
@@ -19,18 +23,18 @@ class DatabaseConnection:
             logger.info("Initializing database connection...")
 
             # Parse the connection URL
-            parsed = urlparse(DATABASE_URL)
+            parsed = urlparse(self.url)
 
             # Create appropriate database instance based on URL scheme
             if parsed.scheme.startswith("postgresql"):
-                self._db = PostgreSQLDatabase(DATABASE_URL)
+                self._db = PostgreSQLDatabase(self.url)
             elif parsed.scheme == "trino":
-                self._db = TrinoDatabase(DATABASE_URL)
+                self._db = TrinoDatabase(self.url)
             else:
                 raise ValueError(f"Unsupported database type: {parsed.scheme}")
 
             await self._db.initialize()
-            logger.info(f"Database connection initialized: {self._db.database_type}")
+            logger.info("Database connection initialized: {}", self._db.database_type)
 
         except Exception as e:
             logger.error(f"Failed to initialize database connection: {str(e)}")
@@ -45,11 +49,57 @@ class DatabaseConnection:
             logger.error(f"Error during database shutdown: {str(e)}")
             raise
 
-    async def execute_query(self, query: str) -> list:
-        """Execute a query and return results"""
+    async def execute_query(
+        self, query: str, deadline: Deadline = UNLIMITED
+    ) -> Sequence[dict]:
+        """Execute a query and return results as a lazy view of row dicts"""
         if not self._db:
             raise ValueError("Database not initialized")
-        return await self._db.execute_query(query)
+        return await self._db.execute_query(query, deadline)
+
+    async def execute_columnar(
+        self, query: str, deadline: Deadline = UNLIMITED
+    ) -> ColumnarResult:
+        """Execute a query and return results column by column"""
+        if not self._db:
+            raise ValueError("Database not initialized")
+        return await self._db.execute_columnar(query, deadline)
+
+    async def stream_query(
+        self, query: str, chunk_size: int = 1000, deadline: Deadline = UNLIMITED
+    ) -> AsyncIterator[list[dict]]:
+        """Execute a query and yield results chunk by chunk"""
+        if not self._db:
+            raise ValueError("Database not initialized")
+        async for chunk in self._db.stream_query(query, chunk_size, deadline):
+            yield chunk
+
+    async def stream_columnar(
+        self, query: str, chunk_size: int = 1000, deadline: Deadline = UNLIMITED
+    ) -> AsyncIterator[ColumnarResult]:
+        """Execute a query and yield columnar results chunk by chunk"""
+        if not self._db:
+            raise ValueError("Database not initialized")
+        async for chunk in self._db.stream_columnar(query, chunk_size, deadline):
+            yield chunk
+
+    async def explain(self, query: str, deadline: Deadline = UNLIMITED) -> QueryPlan:
+        """Planner estimates for a query without executing it"""
+        if not self._db:
+            raise ValueError("Database not initialized")
+        return await self._db.explain(query, deadline)
+
+    async def modification_counters(self) -> dict[str, int] | None:
+        """Per-table write counters, or None if the database has none"""
+        if not self._db:
+            raise ValueError("Database not initialized")
+        return await self._db.modification_counters()
+
+    async def listen(self, channel: str, callback: Callable[[str], None]) -> bool:
+        """Subscribe to notifications on a channel, if the database supports them"""
+        if not self._db:
+            raise ValueError("Database not initialized")
+        return await self._db.listen(channel, callback)
 
     @property
     def engine(self):
@@ -64,6 +114,17 @@ class DatabaseConnection:
 
         raise ValueError(f"Unsupported database type: {type(self._db)}")
 
+    @property
+    def metadata_engine(self):
+        """Engine for schema reflection, on its own pool
+
+        An AsyncEngine on PostgreSQL; on Trino a blocking Engine over
+        SQLAlchemy's Trino dialect.
+        """
+        if isinstance(self._db, PostgreSQLDatabase | TrinoDatabase):
+            return self._db.metadata_engine
+        return self.engine
+
     @property
     def database_type(self) -> str:
         """Get the current database type"""
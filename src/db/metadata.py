@@ -1,61 +1,247 @@
+import asyncio
+import hashlib
+
 import sqlalchemy as sa
+from sqlalchemy import Connection, Engine, text
 from sqlalchemy.ext.asyncio import AsyncEngine
 
-# Using a module-level cache dictionary instead of method-level lru_cache
-_metadata_cache = {}
+from src.db.metadata_cache import CacheEntry, MetadataCache
+from src.utils.config import (
+    METADATA_CACHE_PATH,
+    METADATA_CACHE_TTL,
+    METADATA_REFRESH_INTERVAL,
+)
+from src.utils.deadline import UNLIMITED, Deadline
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Process-wide cache shared by every MetadataManager, scoped per engine URL
+metadata_cache = MetadataCache(
+    ttl=METADATA_CACHE_TTL,
+    snapshot_path=METADATA_CACHE_PATH or None,
+    refresh_interval=METADATA_REFRESH_INTERVAL,
+)
+
+# One row per table with a hash over its columns, constraints and comments.
+# Any DDL touching a table changes its hash, so only those tables are reflected.
+POSTGRES_FINGERPRINT_QUERY = text(
+    """
+    SELECT c.relname AS table_name,
+           md5(
+               string_agg(
+                   a.attname || ':' || format_type(a.atttypid, a.atttypmod)
+                   || ':' || a.attnotnull::text
+                   || ':' || coalesce(col_description(c.oid, a.attnum), ''),
+                   ',' ORDER BY a.attnum
+               )
+               || coalesce(obj_description(c.oid, 'pg_class'), '')
+               || coalesce((
+                   SELECT string_agg(
+                       con.conname || pg_get_constraintdef(con.oid), ','
+                       ORDER BY con.conname
+                   )
+                   FROM pg_constraint con
+                   WHERE con.conrelid = c.oid
+               ), '')
+           ) AS fingerprint
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a
+      ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    WHERE c.relkind IN ('r', 'p', 'f')
+      AND n.nspname = coalesce(:schema, current_schema())
+    GROUP BY c.oid, c.relname
+    """
+)
+
+TRINO_FINGERPRINT_QUERY = text(
+    """
+    SELECT table_name, column_name, data_type, is_nullable
+    FROM information_schema.columns
+    WHERE table_schema = :schema
+    ORDER BY table_name, ordinal_position
+    """
+)
 
 
 class MetadataManager:
-    def __init__(self, engine: AsyncEngine):
+    """Schema metadata of one database, reflected through SQLAlchemy
+
+    Async engines (asyncpg) reflect on the event loop; blocking ones (Trino)
+    reflect in a worker thread.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine | Engine,
+        cache: MetadataCache | None = None,
+        schema: str | None = None,
+        database_url: str | None = None,
+    ):
         self.engine = engine
-        self._metadata = sa.MetaData()
+        self.cache = cache or metadata_cache
+        self.schema = schema
+        # Cache scope: the target's configured URL, else the engine's
+        self._database_url = database_url or str(engine.url)
 
-    async def get_table_metadata(self, table_names: list[str] | None = None) -> dict:
-        """Retrieve and cache table metadata"""
-        cache_key = tuple(sorted(table_names)) if table_names else None
-        if cache_key in _metadata_cache:
-            return _metadata_cache[cache_key]
+    def _cache_key(self, table_names: list[str] | None = None) -> str:
+        return self.cache.make_key(self._database_url, self.schema, table_names)
 
-        try:
-            async with self.engine.connect() as conn:
-                await conn.run_sync(self._metadata.reflect)
-                metadata = {}
-
-                for table_name, table in self._metadata.tables.items():
-                    if table_names and table_name not in table_names:
-                        continue
-
-                    columns = {}
-                    for column in table.columns:
-                        columns[column.name] = {
-                            "type": str(column.type),
-                            "nullable": column.nullable,
-                            "primary_key": column.primary_key,
-                            "foreign_key": bool(column.foreign_keys),
-                        }
-
-                    metadata[table_name] = {
-                        "columns": columns,
-                        "primary_key": [k.name for k in table.primary_key],
-                        "foreign_keys": [
-                            {
-                                "column": fk.parent.name,
-                                "references": {
-                                    "table": fk.column.table.name,
-                                    "column": fk.column.name,
-                                },
-                            }
-                            for fk in table.foreign_keys
-                        ],
-                    }
-
-                # Cache the result
-                _metadata_cache[cache_key] = metadata
-                return metadata
+    async def get_table_metadata(
+        self, table_names: list[str] | None = None, deadline: Deadline = UNLIMITED
+    ) -> dict:
+        """Retrieve and cache table metadata
+
+        The deadline bounds only this caller's wait for a cold load; the
+        shared reflection goes on for other callers and is cancelled once
+        none is left.
+        """
+        async with deadline.timeout():
+            entry = await self.cache.get_or_load(
+                self._cache_key(table_names),
+                lambda previous: self._load(table_names, previous),
+            )
+        return entry.value
 
+    def get_schema_fingerprint(
+        self, table_names: list[str] | None = None
+    ) -> str | None:
+        """Fingerprint of the cached metadata snapshot, if one is loaded"""
+        entry = self.cache.get(self._cache_key(table_names))
+        return entry.fingerprint if entry else None
+
+    async def _load(
+        self, table_names: list[str] | None, previous: CacheEntry | None
+    ) -> tuple[dict, dict[str, str] | None]:
+        try:
+            if isinstance(self.engine, AsyncEngine):
+                async with self.engine.connect() as conn:
+                    return await conn.run_sync(self._reflect, table_names, previous)
+            return await asyncio.to_thread(
+                self._reflect_blocking, table_names, previous
+            )
         except Exception as e:
             raise Exception(f"Failed to retrieve metadata: {str(e)}") from e
 
+    def _reflect_blocking(
+        self, table_names: list[str] | None, previous: CacheEntry | None
+    ) -> tuple[dict, dict[str, str] | None]:
+        with self.engine.connect() as conn:
+            return self._reflect(conn, table_names, previous)
+
+    def _reflect(
+        self,
+        conn: Connection,
+        table_names: list[str] | None,
+        previous: CacheEntry | None,
+    ) -> tuple[dict, dict[str, str] | None]:
+        """Reflect only the tables whose catalog fingerprint changed"""
+        catalog = self._fetch_catalog(conn)
+        if catalog is None:
+            # No fingerprint support: targeted reflection of everything
+            return self._inspect(conn, table_names), None
+
+        if table_names:
+            wanted = set(table_names)
+            catalog = {t: fp for t, fp in catalog.items() if t in wanted}
+
+        old_value = previous.value if previous else {}
+        old_catalog = (previous.catalog if previous else None) or {}
+        changed = [
+            name
+            for name, fingerprint in catalog.items()
+            if old_catalog.get(name) != fingerprint or name not in old_value
+        ]
+        if not changed and old_value.keys() == catalog.keys():
+            # Returning the same object tells the cache nothing changed
+            return old_value, catalog
+
+        logger.info(
+            "Reflecting {} of {} tables ({} dropped)",
+            len(changed),
+            len(catalog),
+            len(old_value.keys() - catalog.keys()),
+        )
+        reflected = self._inspect(conn, changed)
+        metadata = {
+            name: reflected[name] if name in reflected else old_value[name]
+            for name in sorted(catalog)
+            if name in reflected or name in old_value
+        }
+        return metadata, catalog
+
+    def _fetch_catalog(self, conn: Connection) -> dict[str, str] | None:
+        """Per-table DDL fingerprints, or None if the dialect is not supported"""
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            result = conn.execute(POSTGRES_FINGERPRINT_QUERY, {"schema": self.schema})
+            return {row.table_name: row.fingerprint for row in result}
+        if dialect == "trino":
+            schema = self.schema or conn.dialect.default_schema_name
+            result = conn.execute(TRINO_FINGERPRINT_QUERY, {"schema": schema})
+            hashes = {}
+            for row in result:
+                digest = hashes.setdefault(row.table_name, hashlib.md5())
+                digest.update(
+                    f"{row.column_name}:{row.data_type}:{row.is_nullable},".encode()
+                )
+            return {name: digest.hexdigest() for name, digest in hashes.items()}
+        return None
+
+    def _inspect(self, sync_conn, table_names: list[str] | None) -> dict:
+        """Reflect the given tables (all if None) into a plain dictionary"""
+        if table_names is not None and not table_names:
+            return {}
+
+        inspector = sa.inspect(sync_conn)
+        kwargs = {"schema": self.schema, "filter_names": table_names}
+        all_columns = inspector.get_multi_columns(**kwargs)
+        primary_keys = inspector.get_multi_pk_constraint(**kwargs)
+        foreign_keys = inspector.get_multi_foreign_keys(**kwargs)
+        try:
+            comments = inspector.get_multi_table_comment(**kwargs)
+        except NotImplementedError:
+            comments = {}
+
+        metadata = {}
+        for key, table_columns in all_columns.items():
+            table_name = key[1]
+            pk_columns = primary_keys.get(key, {}).get("constrained_columns") or []
+            references = [
+                {
+                    "column": column,
+                    "references": {"table": fk["referred_table"], "column": referred},
+                }
+                for fk in foreign_keys.get(key, [])
+                for column, referred in zip(
+                    fk["constrained_columns"], fk["referred_columns"], strict=False
+                )
+            ]
+            fk_columns = {ref["column"] for ref in references}
+
+            columns = {}
+            for column in table_columns:
+                columns[column["name"]] = {
+                    "type": str(column["type"]),
+                    "nullable": column["nullable"],
+                    "primary_key": column["name"] in pk_columns,
+                    "foreign_key": column["name"] in fk_columns,
+                }
+                if column.get("comment"):
+                    columns[column["name"]]["comment"] = column["comment"]
+
+            metadata[table_name] = {
+                "columns": columns,
+                "primary_key": list(pk_columns),
+                "foreign_keys": references,
+            }
+            comment = comments.get(key, {}).get("text")
+            if comment:
+                metadata[table_name]["comment"] = comment
+
+        return metadata
+
     def invalidate_cache(self):
-        """Clear the metadata cache"""
-        _metadata_cache.clear()
+        """Clear the cached metadata for this engine and schema"""
+        self.cache.invalidate(self.cache.make_scope(self._database_url, self.schema))
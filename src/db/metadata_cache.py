@@ -0,0 +1,276 @@
+"""TTL-based schema metadata cache with on-disk snapshots and background refresh."""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import re
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from src.utils.logger import get_logger
+from src.utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+# Loaders receive the previous entry (if any) so they can refresh incrementally,
+# and return the metadata plus optional per-table catalog fingerprints
+MetadataLoader = Callable[
+    ["CacheEntry | None"], Awaitable[tuple[dict, dict[str, str] | None]]
+]
+
+# Called as listener(key, old_fingerprint, new_fingerprint) on schema changes
+SchemaChangeListener = Callable[[str, str, str], None]
+
+SNAPSHOT_VERSION = 1
+
+# URL query parameters left out of cache scopes because they hold secrets
+_SECRET_PARAM_PATTERN = re.compile(r"pass|secret|token|credential|api_?key", re.I)
+
+
+def schema_fingerprint(metadata: dict) -> str:
+    """Stable hash of a metadata snapshot"""
+    payload = json.dumps(metadata, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def redact_url(database_url: str) -> str:
+    """Drop credentials from a database URL so it can be used as a cache scope
+
+    Other query parameters are kept, sorted, since they can select what the
+    connection sees (e.g. options=-csearch_path=... or a Trino catalog).
+    """
+    parsed = urlparse(database_url)
+    netloc = parsed.hostname or ""
+    if parsed.username:
+        netloc = f"{parsed.username}@{netloc}"
+    if parsed.port:
+        netloc = f"{netloc}:{parsed.port}"
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not _SECRET_PARAM_PATTERN.search(name)
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{parsed.scheme}://{netloc}{parsed.path}{query}"
+
+
+class CacheEntry:
+    def __init__(
+        self,
+        value: dict,
+        fingerprint: str,
+        fetched_at: float,
+        catalog: dict[str, str] | None = None,
+    ):
+        self.value = value
+        self.fingerprint = fingerprint
+        self.fetched_at = fetched_at
+        self.catalog = catalog
+
+    def age(self) -> float:
+        """Seconds since the entry was reflected"""
+        return time.time() - self.fetched_at
+
+
+class MetadataCache:
+    """Metadata cache scoped by database URL, schema and table selection.
+
+    Stale entries keep being served while a background task re-reflects them,
+    so only a cold miss (nothing in memory and nothing on disk) ever waits on
+    reflection.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        snapshot_path: str | None = None,
+        refresh_interval: float = 60.0,
+    ):
+        self.ttl = ttl
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.refresh_interval = refresh_interval
+        self._entries: dict[str, CacheEntry] = {}
+        self._loaders: dict[str, MetadataLoader] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._refresher: asyncio.Task | None = None
+        self._save_lock = asyncio.Lock()
+        self._listeners: list[SchemaChangeListener] = []
+        # Concurrent cold misses for the same key share one reflection
+        self._cold_loads = SingleFlight("metadata_reflection")
+
+    @staticmethod
+    def make_scope(database_url: str, schema: str | None = None) -> str:
+        """Key prefix shared by all entries of one database and schema"""
+        return f"{redact_url(database_url)}|{schema or ''}|"
+
+    @classmethod
+    def make_key(
+        cls,
+        database_url: str,
+        schema: str | None = None,
+        table_names: list[str] | None = None,
+    ) -> str:
+        """Build a cache key from the engine URL, schema and requested tables"""
+        tables = ",".join(sorted(table_names)) if table_names else "*"
+        return cls.make_scope(database_url, schema) + tables
+
+    def add_listener(self, listener: SchemaChangeListener) -> None:
+        """Register a callback for entries whose fingerprint changes"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: SchemaChangeListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def get(self, key: str) -> CacheEntry | None:
+        return self._entries.get(key)
+
+    def set(
+        self, key: str, value: dict, catalog: dict[str, str] | None = None
+    ) -> CacheEntry:
+        previous = self._entries.get(key)
+        if previous is not None and previous.value is value:
+            # Loader reported no change: keep the fingerprint, just renew the TTL
+            fingerprint = previous.fingerprint
+        else:
+            fingerprint = schema_fingerprint(value)
+        entry = CacheEntry(value, fingerprint, time.time(), catalog)
+        self._entries[key] = entry
+        if previous is not None and previous.fingerprint != fingerprint:
+            logger.info("Schema change detected: {}", key)
+            for listener in self._listeners:
+                try:
+                    listener(key, previous.fingerprint, fingerprint)
+                except Exception as e:
+                    logger.error(f"Schema change listener failed: {str(e)}")
+        return entry
+
+    def is_stale(self, entry: CacheEntry) -> bool:
+        return entry.age() > self.ttl
+
+    def invalidate(self, scope: str | None = None) -> None:
+        """Drop entries whose key starts with scope (all entries if omitted)"""
+        if scope is None:
+            self._entries.clear()
+            self._loaders.clear()
+        else:
+            for key in [k for k in self._entries if k.startswith(scope)]:
+                del self._entries[key]
+            # Loaders hold the engine; the next get_or_load registers a new one
+            for key in [k for k in self._loaders if k.startswith(scope)]:
+                del self._loaders[key]
+        logger.info("Metadata cache invalidated: {}", scope or "all")
+
+    async def get_or_load(self, key: str, loader: MetadataLoader) -> CacheEntry:
+        """Return a cached entry, reflecting only on a cold miss"""
+        self._loaders[key] = loader
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = await self._cold_loads.do(key, lambda: self._cold_load(key))
+        elif self.is_stale(entry):
+            self._schedule_refresh(key)
+        return entry
+
+    async def _cold_load(self, key: str) -> CacheEntry:
+        logger.info("Metadata cache miss: {}", key)
+        entry = self.set(key, *await self._loaders[key](None))
+        await self.save_snapshot()
+        return entry
+
+    def _schedule_refresh(self, key: str) -> None:
+        """Refresh an entry in the background unless a refresh is running"""
+        if key in self._refreshing or key not in self._loaders:
+            return
+        task = asyncio.create_task(self._refresh(key))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str) -> None:
+        try:
+            logger.debug("Refreshing stale metadata: {}", key)
+            previous = self._entries.get(key)
+            value, catalog = await self._loaders[key](previous)
+            self.set(key, value, catalog)
+            if previous is None or previous.value is not value:
+                await self.save_snapshot()
+        except Exception as e:
+            # Keep serving the previous entry; the next cycle retries
+            logger.error(f"Background metadata refresh failed for {key}: {str(e)}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            for key, entry in list(self._entries.items()):
+                if self.is_stale(entry):
+                    self._schedule_refresh(key)
+
+    def start(self) -> None:
+        """Start the periodic background refresher"""
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop background refreshes"""
+        tasks = list(self._refreshing.values())
+        if self._refresher:
+            tasks.append(self._refresher)
+            self._refresher = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def load_snapshot(self) -> int:
+        """Load entries from the on-disk snapshot, returning how many were read"""
+        if not self.snapshot_path or not self.snapshot_path.exists():
+            return 0
+        try:
+            snapshot = json.loads(self.snapshot_path.read_text())
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                logger.warning("Ignoring metadata snapshot with unknown version")
+                return 0
+            for key, raw in snapshot["entries"].items():
+                self._entries[key] = CacheEntry(
+                    raw["value"],
+                    raw["fingerprint"],
+                    raw["fetched_at"],
+                    raw.get("catalog"),
+                )
+            logger.info("Loaded {} metadata cache entries", len(snapshot["entries"]))
+            return len(snapshot["entries"])
+        except Exception as e:
+            logger.error(f"Failed to load metadata snapshot: {str(e)}")
+            return 0
+
+    async def save_snapshot(self) -> None:
+        """Persist all entries to disk without blocking the event loop"""
+        if not self.snapshot_path:
+            return
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "entries": {
+                key: {
+                    "value": entry.value,
+                    "fingerprint": entry.fingerprint,
+                    "fetched_at": entry.fetched_at,
+                    "catalog": entry.catalog,
+                }
+                for key, entry in self._entries.items()
+            },
+        }
+        try:
+            async with self._save_lock:
+                await asyncio.to_thread(self._write_snapshot, snapshot)
+        except Exception as e:
+            logger.error(f"Failed to write metadata snapshot: {str(e)}")
+
+    def _write_snapshot(self, snapshot: dict) -> None:
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, self.snapshot_path)
@@ -1,26 +1,112 @@
-from typing import Any
+import asyncio
+import contextlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
 from urllib.parse import parse_qs, urlparse
 
-from sqlalchemy import text
+import asyncpg
+from sqlalchemy import exc, text
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from src.core.db import DatabaseInterface
+from src.core.db import DatabaseInterface, QueryPlan
+from src.core.results import ColumnarResult
+from src.utils.config import (
+    POSTGRES_MAX_OVERFLOW,
+    POSTGRES_METADATA_POOL_SIZE,
+    POSTGRES_POOL_RECYCLE,
+    POSTGRES_POOL_SIZE,
+    POSTGRES_POOL_TIMEOUT,
+    POSTGRES_POOL_WARMUP,
+    POSTGRES_STATEMENT_CACHE_SIZE,
+)
+from src.utils.deadline import UNLIMITED, Deadline
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics
 
 logger = get_logger(__name__)
 
+pool_wait = metrics.histogram(
+    "db_pool_wait_seconds",
+    "Time to check a connection out of a database pool, by pool",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+    + (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+pool_timeouts = metrics.counter(
+    "db_pool_timeouts_total",
+    "Connection checkouts that gave up waiting for a free connection, by pool",
+)
+
+# conn.info key of the per-connection prepared statement cache
+_STATEMENTS = "tabletalk_prepared_statements"
+
+# Rows inserted, updated or deleted per table since statistics were reset.
+# Backends flush these at transaction end (at most every second or so, longer
+# under sustained load), so changes show up with a short delay.
+MODIFICATION_COUNTERS_QUERY = text(
+    """
+    SELECT relname AS table_name,
+           n_tup_ins + n_tup_upd + n_tup_del AS changes
+    FROM pg_stat_user_tables
+    """
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long every checkout waits
+
+    The pool's logging name ("query", "metadata") labels the metrics. The time
+    includes opening a new connection when the pool has none idle.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_timeouts.inc(pool=self.logging_name)
+            raise
+        finally:
+            pool_wait.observe(time.perf_counter() - start, pool=self.logging_name)
+
 
 class PostgreSQLDatabase(DatabaseInterface):
-    def __init__(self, connection_url: str):
+    def __init__(  # noqa: PLR0913
+        self,
+        connection_url: str,
+        *,
+        pool_size: int = POSTGRES_POOL_SIZE,
+        max_overflow: int = POSTGRES_MAX_OVERFLOW,
+        pool_timeout: float = POSTGRES_POOL_TIMEOUT,
+        pool_recycle: int = POSTGRES_POOL_RECYCLE,
+        warmup: int = POSTGRES_POOL_WARMUP,
+        metadata_pool_size: int = POSTGRES_METADATA_POOL_SIZE,
+        statement_cache_size: int = POSTGRES_STATEMENT_CACHE_SIZE,
+    ):
         self.connection_url = connection_url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.warmup = warmup
+        self.metadata_pool_size = metadata_pool_size
+        self.statement_cache_size = statement_cache_size
         self._engine: AsyncEngine | None = None
+        # Catalog reflection and statistics, so they never wait behind queries
+        self._metadata_engine: AsyncEngine | None = None
         self._async_session: async_sessionmaker[AsyncSession] | None = None
         self._connected = False
+        self._dsn: str | None = None
+        # Dedicated connection for LISTEN, outside the pool
+        self._listener: asyncpg.Connection | None = None
 
     async def initialize(self) -> None:
         try:
@@ -38,6 +124,9 @@ class PostgreSQLDatabase(DatabaseInterface):
                     f"{k}={v}" for k, v in filtered_params.items()
                 )
 
+            # asyncpg takes a plain postgresql:// DSN
+            self._dsn = cleaned_url.replace("postgresql+asyncpg://", "postgresql://")
+
             # Convert to async format if needed
             if cleaned_url.startswith("postgresql://"):
                 cleaned_url = cleaned_url.replace(
@@ -46,13 +135,13 @@ class PostgreSQLDatabase(DatabaseInterface):
                 logger.info("Converted database URL to async format")
 
             logger.info("Creating async PostgreSQL engine...")
-            self._engine = create_async_engine(
-                cleaned_url,
-                pool_size=5,
-                max_overflow=10,
-                pool_timeout=30,
-                pool_recycle=1800,
-                echo=False,
+            self._engine = self._create_engine(
+                cleaned_url, "query", self.pool_size, self.max_overflow
+            )
+            self._metadata_engine = (
+                self._create_engine(cleaned_url, "metadata", self.metadata_pool_size, 0)
+                if self.metadata_pool_size > 0
+                else self._engine
             )
 
             self._async_session = async_sessionmaker(
@@ -60,6 +149,7 @@ class PostgreSQLDatabase(DatabaseInterface):
             )
 
             await self.test_connection()
+            await self._warm_up(min(self.warmup, self.pool_size))
             self._connected = True
             logger.info("PostgreSQL connection initialized successfully")
 
@@ -70,8 +160,13 @@ class PostgreSQLDatabase(DatabaseInterface):
 
     async def shutdown(self) -> None:
         try:
+            if self._listener:
+                await self._listener.close()
+                self._listener = None
             if self._engine:
                 logger.info("Shutting down PostgreSQL connection...")
+                if self._metadata_engine is not self._engine:
+                    await self._metadata_engine.dispose()
                 await self._engine.dispose()
                 self._connected = False
                 logger.info("PostgreSQL connection closed successfully")
@@ -79,13 +174,218 @@ class PostgreSQLDatabase(DatabaseInterface):
             logger.error(f"Error during PostgreSQL shutdown: {str(e)}")
             raise
 
-    async def execute_query(self, query: str) -> list[dict[str, Any]]:
+    async def execute_columnar(
+        self, query: str, deadline: Deadline = UNLIMITED
+    ) -> ColumnarResult:
+        if not self._engine:
+            raise ValueError("Database not initialized")
+
+        # The deadline covers the pool wait too; asyncpg cancels a fetch that
+        # is interrupted on the server as well
+        async with deadline.timeout(), self._engine.connect() as conn:
+            try:
+                statement, records = await self._fetch(conn, query)
+            except asyncpg.InvalidCachedStatementError:
+                # The statement predates a schema change; prepare it afresh
+                # (in a new transaction, since the failed one is aborted)
+                self._forget(conn, query)
+                statement, records = await self._fetch(conn, query)
+            columns = [attribute.name for attribute in statement.get_attributes()]
+        # Packing columns is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(ColumnarResult.from_tuples, columns, records)
+
+    async def _fetch(
+        self, conn: AsyncConnection, query: str
+    ) -> tuple[asyncpg.prepared_stmt.PreparedStatement, list[asyncpg.Record]]:
+        """Prepare and run query in a read-only transaction
+
+        Raw asyncpg statements run outside SQLAlchemy's transaction, in
+        autocommit mode, so without one a write that slipped past validation
+        would be committed.
+        """
+        driver = await self._driver_connection(conn)
+        async with driver.transaction(readonly=True):
+            statement = await self._prepare(conn, query)
+            return statement, await statement.fetch()
+
+    async def stream_columnar(
+        self, query: str, chunk_size: int = 1000, deadline: Deadline = UNLIMITED
+    ) -> AsyncIterator[ColumnarResult]:
         if not self._engine:
             raise ValueError("Database not initialized")
 
-        async with self._engine.connect() as conn:
-            result = await conn.execute(text(query))
-            return [dict(row) for row in result]
+        async with deadline.timeout() as first_chunk, self._engine.connect() as conn:
+            driver = await self._driver_connection(conn)
+            # A server-side cursor bounds memory by the chunk size; cursors
+            # only live inside a transaction, read-only so that SQL which
+            # slipped past validation cannot write
+            async with driver.transaction(readonly=True):
+                statement = await self._prepare(conn, query)
+                columns = [attr.name for attr in statement.get_attributes()]
+                try:
+                    cursor = await statement.cursor()
+                except asyncpg.InvalidCachedStatementError:
+                    # The transaction is aborted; the next call re-prepares
+                    self._forget(conn, query)
+                    raise
+                empty = True
+                while records := await cursor.fetch(chunk_size):
+                    # Only the first chunk must arrive by the deadline; no
+                    # timer may be pending while the consumer holds a chunk
+                    first_chunk.reschedule(None)
+                    empty = False
+                    yield ColumnarResult.from_tuples(columns, records)
+                if empty:
+                    first_chunk.reschedule(None)
+                    yield ColumnarResult.from_tuples(columns, [])
+
+    @staticmethod
+    async def _driver_connection(conn: AsyncConnection) -> asyncpg.Connection:
+        """asyncpg connection under a pooled SQLAlchemy one, for raw Records
+
+        Columns are packed straight from asyncpg Records, skipping SQLAlchemy
+        Row objects as well as dicts.
+        """
+        raw = await conn.get_raw_connection()
+        return raw.driver_connection
+
+    async def _prepare(
+        self, conn: AsyncConnection, query: str
+    ) -> asyncpg.prepared_stmt.PreparedStatement:
+        """Prepared statement for query, reused per pooled connection
+
+        Repeat queries (dashboards, retries) skip the parse/plan round trip.
+        Statements live in the connection's info dict, an LRU bounded by
+        statement_cache_size.
+        """
+        driver = await self._driver_connection(conn)
+        if self.statement_cache_size <= 0:
+            return await driver.prepare(query)
+
+        owner, statements = conn.info.get(_STATEMENTS, (None, None))
+        if owner is not driver:
+            # A reconnect replaced the driver connection and its statements
+            statements = OrderedDict()
+            conn.info[_STATEMENTS] = (driver, statements)
+        statement = statements.get(query)
+        if statement is not None:
+            statements.move_to_end(query)
+            return statement
+
+        statement = await driver.prepare(query)
+        statements[query] = statement
+        if len(statements) > self.statement_cache_size:
+            statements.popitem(last=False)
+        return statement
+
+    @staticmethod
+    def _forget(conn: AsyncConnection, query: str) -> None:
+        _, statements = conn.info.get(_STATEMENTS, (None, {}))
+        statements.pop(query, None)
+
+    def _create_engine(
+        self, url: str, name: str, pool_size: int, max_overflow: int
+    ) -> AsyncEngine:
+        return create_async_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_logging_name=name,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            # SQLAlchemy's own statement cache, used by text() queries
+            connect_args={"prepared_statement_cache_size": self.statement_cache_size},
+            echo=False,
+        )
+
+    async def _warm_up(self, count: int) -> None:
+        """Open count query connections at once and return them to the pool"""
+        if count <= 0:
+            return
+        start = time.perf_counter()
+        # Held together, so each checkout opens a new connection
+        async with contextlib.AsyncExitStack() as stack:
+            results = await asyncio.gather(
+                *(
+                    stack.enter_async_context(self._engine.connect())
+                    for _ in range(count)
+                ),
+                return_exceptions=True,
+            )
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            # Not fatal: the pool opens the rest on demand
+            logger.warning(
+                f"Pool warm-up opened {count - len(errors)} of {count} "
+                f"connections: {str(errors[0])}"
+            )
+        else:
+            logger.info(
+                f"Opened {count} PostgreSQL connections in "
+                f"{(time.perf_counter() - start) * 1000:.0f} ms"
+            )
+
+    async def explain(self, query: str, deadline: Deadline = UNLIMITED) -> QueryPlan:
+        if not self._engine:
+            raise ValueError("Database not initialized")
+
+        statement = query.strip().rstrip(";")
+        async with deadline.timeout(), self._engine.connect() as conn:
+            # Straight to asyncpg: SQLAlchemy's text() would read ":name" in
+            # the query (e.g. arr[lo :hi] or 'ETA :soon') as a bind parameter
+            driver = await self._driver_connection(conn)
+            document = await driver.fetchval(f"EXPLAIN (FORMAT JSON) {statement}")
+        # asyncpg returns the json column as text
+        if isinstance(document, str):
+            document = json.loads(document)
+        plan = document[0]["Plan"]
+        return QueryPlan(
+            rows=plan.get("Plan Rows"),
+            cost=plan.get("Total Cost"),
+            bytes_scanned=self._scanned_bytes(plan),
+            raw=document,
+        )
+
+    @classmethod
+    def _scanned_bytes(cls, plan: dict) -> float:
+        """Estimated rows x row width summed over the plan's scan nodes"""
+        total = 0.0
+        if plan.get("Node Type", "").endswith("Scan"):
+            total += plan.get("Plan Rows", 0) * plan.get("Plan Width", 0)
+        for child in plan.get("Plans", []):
+            total += cls._scanned_bytes(child)
+        return total
+
+    async def modification_counters(self) -> dict[str, int] | None:
+        if not self._engine:
+            raise ValueError("Database not initialized")
+
+        counters: dict[str, int] = {}
+        async with self._metadata_engine.connect() as conn:
+            result = await conn.execute(MODIFICATION_COUNTERS_QUERY)
+            for row in result:
+                # Same-named tables in different schemas share one counter
+                counters[row.table_name] = counters.get(row.table_name, 0) + row.changes
+        return counters
+
+    async def listen(self, channel: str, callback: Callable[[str], None]) -> bool:
+        if not self._dsn:
+            raise ValueError("Database not initialized")
+
+        if self._listener is None:
+            self._listener = await asyncpg.connect(self._dsn)
+            self._listener.add_termination_listener(self._on_listener_closed)
+        await self._listener.add_listener(
+            channel, lambda _conn, _pid, _channel, payload: callback(payload)
+        )
+        logger.info("Listening for notifications on {}", channel)
+        return True
+
+    def _on_listener_closed(self, connection: asyncpg.Connection) -> None:
+        if self._listener is connection:
+            self._listener = None
+            logger.error("PostgreSQL notification connection closed")
 
     async def test_connection(self) -> bool:
         try:
@@ -113,3 +413,10 @@ class PostgreSQLDatabase(DatabaseInterface):
         if not self._engine:
             raise ValueError("Database not initialized")
         return self._engine
+
+    @property
+    def metadata_engine(self) -> AsyncEngine:
+        """Engine for catalog reflection, on its own pool"""
+        if not self._metadata_engine:
+            raise ValueError("Database not initialized")
+        return self._metadata_engine
@@ -0,0 +1,192 @@
+"""Named database targets, opened on first use and closed when idle (LRU)."""
+
+import asyncio
+import contextlib
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from src.db.connection import DatabaseConnection
+from src.db.metadata import MetadataManager
+from src.utils.config import DATABASE_MAX_ACTIVE, DATABASE_TARGETS, DATABASE_URL
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+DEFAULT_DATABASE = "default"
+
+database_target_events = metrics.counter(
+    "database_target_events_total",
+    "Database targets opened and evicted, by event (opened/evicted/failed)",
+)
+
+
+def parse_database_targets(spec: str) -> dict[str, str]:
+    """Parse "name=url;name=url" into name -> connection URL"""
+    targets = {}
+    for entry in spec.split(";"):
+        name, _, url = entry.partition("=")
+        if name.strip() and url.strip():
+            targets[name.strip()] = url.strip()
+    return targets
+
+
+class DatabaseTarget:
+    """One database: its connection pools, metadata and per-target helpers"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.connection = DatabaseConnection(url)
+        self.metadata_manager: MetadataManager | None = None
+        # Set by the application when cost gating is enabled
+        self.cost_gate = None
+        self.leases = 0
+        self.evicted = False
+
+    async def open(self) -> None:
+        await self.connection.initialize()
+        self.metadata_manager = MetadataManager(
+            self.connection.metadata_engine, database_url=self.url
+        )
+        # Warm the cache so no request waits on a cold reflection; a failure
+        # here leaves reflection to the first request rather than the target
+        # unusable
+        try:
+            await self.metadata_manager.get_table_metadata()
+        except Exception as e:
+            logger.warning(f"Metadata warm-up failed for {self.name}: {str(e)}")
+
+    async def close(self) -> None:
+        if self.metadata_manager:
+            # Entries and loaders hold this target's engine
+            self.metadata_manager.invalidate_cache()
+        await self.connection.shutdown()
+
+    @property
+    def database_type(self) -> str:
+        return self.connection.database_type
+
+
+TargetHook = Callable[[DatabaseTarget], Awaitable[None]]
+
+
+class DatabaseRegistry:
+    """Database targets by name, each with its own pools and metadata
+
+    A target is opened on its first request. Once more than max_active are
+    open, the least recently used one is evicted; a target still serving
+    requests (leased) is closed when its last lease is released.
+    """
+
+    def __init__(
+        self,
+        urls: dict[str, str],
+        max_active: int = DATABASE_MAX_ACTIVE,
+        on_open: TargetHook | None = None,
+        on_close: TargetHook | None = None,
+    ):
+        self.urls = urls
+        self.max_active = max(1, max_active)
+        self.on_open = on_open
+        self.on_close = on_close
+        self._targets: OrderedDict[str, DatabaseTarget] = OrderedDict()
+        # Concurrent first requests for a target share one open
+        self._opening = SingleFlight("database_open")
+
+    @classmethod
+    def from_config(cls, **kwargs) -> "DatabaseRegistry":
+        urls = {DEFAULT_DATABASE: DATABASE_URL}
+        urls.update(parse_database_targets(DATABASE_TARGETS))
+        return cls(urls, **kwargs)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.urls)
+
+    @property
+    def active(self) -> list[str]:
+        """Names of the targets currently open, least recently used first"""
+        return list(self._targets)
+
+    async def acquire(self, name: str | None = None) -> DatabaseTarget:
+        """Open target for name, leased until release() is called
+
+        Raises KeyError for names that are not configured.
+        """
+        name = name or DEFAULT_DATABASE
+        if name not in self.urls:
+            raise KeyError(name)
+        while True:
+            target = self._targets.get(name)
+            if target is None:
+                target = await self._opening.do(name, lambda: self._open(name))
+            # Another open may have evicted it while this caller waited
+            if not target.evicted:
+                break
+        self._targets.move_to_end(name)
+        target.leases += 1
+        return target
+
+    async def release(self, target: DatabaseTarget) -> None:
+        target.leases -= 1
+        if target.evicted and target.leases == 0:
+            await self._shutdown(target)
+
+    @contextlib.asynccontextmanager
+    async def lease(self, name: str | None = None) -> AsyncIterator[DatabaseTarget]:
+        target = await self.acquire(name)
+        try:
+            yield target
+        finally:
+            await self.release(target)
+
+    async def _open(self, name: str) -> DatabaseTarget:
+        target = DatabaseTarget(name, self.urls[name])
+        logger.info("Opening database target: {}", name)
+        try:
+            await target.open()
+            if self.on_open:
+                await self.on_open(target)
+        except Exception:
+            database_target_events.inc(event="failed")
+            await self._shutdown(target)
+            raise
+
+        self._targets[name] = target
+        database_target_events.inc(event="opened")
+        while len(self._targets) > self.max_active:
+            await self._evict(self._eviction_candidate(target))
+        return target
+
+    def _eviction_candidate(self, opened: DatabaseTarget) -> DatabaseTarget:
+        """Least recently used target, preferring ones no request is using"""
+        targets = [target for target in self._targets.values() if target is not opened]
+        return next((t for t in targets if t.leases == 0), targets[0])
+
+    async def _evict(self, target: DatabaseTarget) -> None:
+        self._targets.pop(target.name, None)
+        target.evicted = True
+        database_target_events.inc(event="evicted")
+        logger.info("Evicting database target: {}", target.name)
+        if self.on_close:
+            try:
+                await self.on_close(target)
+            except Exception as e:
+                logger.error(f"Database target close hook failed: {str(e)}")
+        if target.leases == 0:
+            await self._shutdown(target)
+
+    async def _shutdown(self, target: DatabaseTarget) -> None:
+        try:
+            await target.close()
+        except Exception as e:
+            logger.error(f"Error closing database target {target.name}: {str(e)}")
+
+    async def close(self) -> None:
+        """Close every open target, leased or not"""
+        targets = list(self._targets.values())
+        for target in targets:
+            target.leases = 0
+        await asyncio.gather(*(self._evict(target) for target in targets))
@@ -0,0 +1,249 @@
+"""Byte-bounded cache of query results, invalidated per table."""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+
+from src.core.results import ColumnarResult
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+result_cache_lookups = metrics.counter(
+    "result_cache_lookups_total",
+    "Query result cache lookups by result (hit/miss)",
+)
+result_cache_evictions = metrics.counter(
+    "result_cache_evictions_total",
+    "Query result cache entries dropped by reason (size/ttl/table/schema)",
+)
+
+# Returns per-table write counters, or None if the database has none
+CounterSource = Callable[[], Awaitable[dict[str, int] | None]]
+
+
+def table_key(name: str, scope: str = "") -> str:
+    """Unqualified, case-folded table name used to index entries
+
+    The scope (a database name) keeps same-named tables of different
+    databases apart.
+    """
+    table = name.rsplit(".", 1)[-1].strip('"`').lower()
+    return f"{scope}/{table}" if scope else table
+
+
+class ResultEntry:
+    def __init__(self, result: ColumnarResult, tables: frozenset[str], expires: float):
+        self.result = result
+        self.tables = tables
+        self.expires = expires
+
+
+class ResultCache:
+    """LRU of query results bounded by their approximate size in bytes.
+
+    Every entry records the tables its SQL reads, so a write to one table
+    drops only the results that depend on it. Writes are learnt from
+    PostgreSQL NOTIFY payloads (table names) or by polling per-table
+    modification counters; the TTL bounds staleness when neither is available.
+    Table names are scoped per database, so one cache serves many databases.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float = 300.0,
+        max_entry_bytes: int | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # A single huge result would otherwise flush everything else
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 4
+        self._entries: OrderedDict[str, ResultEntry] = OrderedDict()
+        self._by_table: dict[str, set[str]] = {}
+        self._bytes = 0
+        # Bumped on invalidation, so results read before a write are not stored
+        self._epoch = 0
+        self._table_versions: dict[str, int] = {}
+        # Per scope: last seen modification counters and the task polling them
+        self._counters: dict[str, dict[str, int]] = {}
+        self._pollers: dict[str, asyncio.Task] = {}
+        self._in_flight = SingleFlight("query_execution")
+
+    @staticmethod
+    def make_key(
+        normalized_sql: str, params: dict | None = None, scope: str = ""
+    ) -> str:
+        payload = json.dumps(
+            [scope, normalized_sql, params or {}], sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def entry_count(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> ColumnarResult | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic():
+            self._drop(key, "ttl")
+            entry = None
+        if entry is None:
+            result_cache_lookups.inc(result="miss")
+            return None
+        self._entries.move_to_end(key)
+        result_cache_lookups.inc(result="hit")
+        return entry.result
+
+    def put(
+        self,
+        key: str,
+        result: ColumnarResult,
+        tables: Iterable[str],
+        scope: str = "",
+    ) -> bool:
+        """Store a result; False if it is too large to cache"""
+        size = result.nbytes
+        if size > self.max_entry_bytes:
+            logger.debug("Result of {} bytes is too large to cache", size)
+            return False
+
+        if key in self._entries:
+            self._drop(key, None)
+        names = frozenset(table_key(table, scope) for table in tables)
+        self._entries[key] = ResultEntry(result, names, time.monotonic() + self.ttl)
+        self._bytes += size
+        for name in names:
+            self._by_table.setdefault(name, set()).add(key)
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)), "size")
+        return True
+
+    async def get_or_execute(
+        self,
+        key: str,
+        tables: Iterable[str],
+        execute: Callable[[], Awaitable[ColumnarResult]],
+        scope: str = "",
+    ) -> tuple[ColumnarResult, bool]:
+        """Cached result for key, or run execute once for concurrent callers
+
+        Returns the result and whether it came from the cache.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+
+        tables = list(tables)
+        names = [table_key(table, scope) for table in tables]
+        started = self._versions(names)
+
+        async def run() -> ColumnarResult:
+            result = await execute()
+            if self._versions(names) == started:
+                self.put(key, result, tables, scope)
+            return result
+
+        return await self._in_flight.do(key, run), False
+
+    def invalidate_tables(
+        self, tables: Iterable[str], reason: str = "table", scope: str = ""
+    ) -> int:
+        """Drop results that read any of the tables, returning how many"""
+        keys = set()
+        for table in (table_key(name, scope) for name in tables):
+            self._table_versions[table] = self._table_versions.get(table, 0) + 1
+            keys |= self._by_table.get(table, set())
+        for key in keys:
+            self._drop(key, reason)
+        if keys:
+            logger.info("Invalidated {} cached results", len(keys))
+        return len(keys)
+
+    def invalidate(self) -> None:
+        self._epoch += 1
+        for key in list(self._entries):
+            self._drop(key, "schema")
+
+    def on_schema_change(self, key: str, old: str, new: str) -> None:
+        """Metadata cache listener: results may no longer match the schema"""
+        self.invalidate()
+
+    def on_notify(self, payload: str, scope: str = "") -> None:
+        """Handle a NOTIFY payload: comma-separated table names, or * for all"""
+        tables = [name.strip() for name in payload.split(",") if name.strip()]
+        if "*" in tables:
+            self.invalidate()
+        else:
+            self.invalidate_tables(tables, scope=scope)
+
+    def _versions(self, tables: list[str]) -> tuple[int, ...]:
+        return (self._epoch, *(self._table_versions.get(t, 0) for t in tables))
+
+    def _drop(self, key: str, reason: str | None) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.result.nbytes
+        for name in entry.tables:
+            keys = self._by_table.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[name]
+        if reason:
+            result_cache_evictions.inc(reason=reason)
+
+    async def poll_counters(self, source: CounterSource, scope: str = "") -> None:
+        """Invalidate tables whose modification counter moved since the last poll"""
+        counters = await source()
+        if counters is None:
+            return
+        counters = {table_key(name): value for name, value in counters.items()}
+        previous = self._counters.get(scope, {})
+        changed = [
+            name
+            for name, value in counters.items()
+            if name in previous and previous[name] != value
+        ]
+        self._counters[scope] = counters
+        if changed:
+            self.invalidate_tables(changed, scope=scope)
+
+    async def _poll_loop(
+        self, source: CounterSource, interval: float, scope: str
+    ) -> None:
+        while True:
+            try:
+                await self.poll_counters(source, scope)
+            except Exception as e:
+                logger.error(f"Result cache counter poll failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def start(self, source: CounterSource, interval: float, scope: str = "") -> None:
+        """Poll a database's modification counters every interval seconds"""
+        if scope not in self._pollers and interval > 0:
+            self._pollers[scope] = asyncio.create_task(
+                self._poll_loop(source, interval, scope)
+            )
+
+    async def stop(self, scope: str | None = None) -> None:
+        """Stop polling one database's counters (all databases if omitted)"""
+        scopes = list(self._pollers) if scope is None else [scope]
+        for name in scopes:
+            poller = self._pollers.pop(name, None)
+            self._counters.pop(name, None)
+            if poller:
+                poller.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await poller
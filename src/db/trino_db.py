@@ -1,18 +1,40 @@
+import asyncio
+import contextlib
+import json
+import math
+from collections.abc import AsyncIterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
+import sqlalchemy as sa
 import trino
+from sqlalchemy.pool import NullPool
 
-from src.core.db import DatabaseInterface
+from src.core.db import DatabaseInterface, QueryPlan
+from src.core.results import ColumnarResult
+from src.utils.config import TRINO_POOL_SIZE
+from src.utils.deadline import UNLIMITED, Deadline
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
 class TrinoDatabase(DatabaseInterface):
-    def __init__(self, connection_url: str):
+    """Trino backend that keeps the blocking DB-API client off the event loop.
+
+    Queries run on a bounded thread pool, each on a connection checked out of
+    a fixed-size pool. Cancelling the awaiting task cancels the Trino query.
+    """
+
+    def __init__(self, connection_url: str, pool_size: int = TRINO_POOL_SIZE):
         self.connection_url = connection_url
-        self._connection: trino.dbapi.Connection | None = None
+        self.pool_size = pool_size
+        self._connections: list[trino.dbapi.Connection] = []
+        self._pool: asyncio.Queue[trino.dbapi.Connection] | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._metadata_engine: sa.Engine | None = None
+        self._cancellations: set[asyncio.Task] = set()
         self._connected = False
         self._parsed_url = urlparse(connection_url)
 
@@ -31,9 +53,31 @@ class TrinoDatabase(DatabaseInterface):
             host = self._parsed_url.hostname
             port = self._parsed_url.port or 8080
 
-            logger.info(f"Creating Trino connection to {host}:{port}")
-            self._connection = trino.dbapi.connect(
-                host=host, port=port, user=user, catalog=catalog, schema=schema
+            logger.info(
+                f"Creating Trino connection pool to {host}:{port} "
+                f"(size={self.pool_size})"
+            )
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.pool_size, thread_name_prefix="trino"
+            )
+            self._pool = asyncio.Queue()
+            connect_args = {
+                "host": host,
+                "port": port,
+                "user": user,
+                "catalog": catalog,
+                "schema": schema,
+            }
+            for _ in range(self.pool_size):
+                connection = trino.dbapi.connect(**connect_args)
+                self._connections.append(connection)
+                self._pool.put_nowait(connection)
+            # Reflection goes through SQLAlchemy's Trino dialect, on its own
+            # short-lived connections so it never waits for a query slot
+            self._metadata_engine = sa.create_engine(
+                "trino://",
+                creator=lambda: trino.dbapi.connect(**connect_args),
+                poolclass=NullPool,
             )
 
             await self.test_connection()
@@ -47,33 +91,185 @@ class TrinoDatabase(DatabaseInterface):
 
     async def shutdown(self) -> None:
         try:
-            if self._connection:
-                logger.info("Shutting down Trino connection...")
-                self._connection.close()
+            if self._connections:
+                logger.info("Shutting down Trino connection pool...")
+                for connection in self._connections:
+                    connection.close()
+                self._connections = []
+                self._pool = None
                 self._connected = False
-                logger.info("Trino connection closed successfully")
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._metadata_engine:
+                self._metadata_engine.dispose()
+                self._metadata_engine = None
+            logger.info("Trino connection closed successfully")
         except Exception as e:
             logger.error(f"Error during Trino shutdown: {str(e)}")
             raise
 
-    async def execute_query(self, query: str) -> list[dict[str, Any]]:
-        if not self._connection:
+    async def _run(self, query: str, handler, deadline: Deadline = UNLIMITED) -> Any:
+        """Run handler(cursor) for a query on a pooled connection in a worker thread"""
+        if not self._pool or not self._executor:
             raise ValueError("Database not initialized")
 
-        with self._connection.cursor() as cursor:
+        async with deadline.timeout():
+            connection = await self._pool.get()
+            cursor = connection.cursor()
+            future = self._executor.submit(self._execute, cursor, query, handler)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # The worker thread cannot be interrupted, so cancel the query on
+                # the server and hand the connection back once the thread has
+                # unwound (also when the deadline passed)
+                logger.warning("Cancelling Trino query")
+                self._schedule_cancel(connection, cursor, future)
+                connection = None
+                raise
+            finally:
+                if connection is not None:
+                    self._pool.put_nowait(connection)
+
+    def _schedule_cancel(self, connection, cursor, future: Future | None) -> None:
+        task = asyncio.create_task(self._cancel(connection, cursor, future))
+        self._cancellations.add(task)
+        task.add_done_callback(self._cancellations.discard)
+
+    @staticmethod
+    def _execute(cursor, query: str, handler) -> Any:
+        try:
             cursor.execute(query)
-            columns = [desc[0] for desc in cursor.description]
-            return [dict(zip(columns, row, strict=False)) for row in cursor.fetchall()]
+            return handler(cursor)
+        finally:
+            cursor.close()
+
+    async def _cancel(self, connection, cursor, future: Future | None) -> None:
+        try:
+            await asyncio.to_thread(cursor.cancel)
+        except Exception as e:
+            logger.error(f"Failed to cancel Trino query: {str(e)}")
+        # The caller is gone, so the query's outcome has nobody to report to
+        if future is not None:
+            with contextlib.suppress(Exception):
+                await asyncio.wrap_future(future)
+        if self._pool is not None:
+            self._pool.put_nowait(connection)
+
+    @staticmethod
+    def _fetch_columnar(cursor) -> ColumnarResult:
+        # Runs on the worker thread, so packing columns never blocks the loop
+        rows = cursor.fetchall()
+        columns = [desc[0] for desc in cursor.description]
+        return ColumnarResult.from_tuples(columns, rows)
+
+    async def execute_columnar(
+        self, query: str, deadline: Deadline = UNLIMITED
+    ) -> ColumnarResult:
+        return await self._run(query, self._fetch_columnar, deadline)
+
+    async def stream_columnar(
+        self, query: str, chunk_size: int = 1000, deadline: Deadline = UNLIMITED
+    ) -> AsyncIterator[ColumnarResult]:
+        if not self._pool or not self._executor:
+            raise ValueError("Database not initialized")
+
+        async with deadline.timeout() as first_chunk:
+            connection = await self._pool.get()
+            cursor = connection.cursor()
+            pending: Future | None = None
+            finished = False
+            empty = True
+            try:
+                pending = self._executor.submit(cursor.execute, query)
+                await asyncio.wrap_future(pending)
+                while True:
+                    # The client fetches result pages from the coordinator
+                    # lazily, so only one chunk is held in memory at a time
+                    pending = self._executor.submit(
+                        self._fetch_chunk, cursor, chunk_size
+                    )
+                    chunk = await asyncio.wrap_future(pending)
+                    pending = None
+                    if chunk is None:
+                        break
+                    # Only the first chunk must arrive by the deadline
+                    first_chunk.reschedule(None)
+                    empty = False
+                    yield chunk
+                if empty:
+                    first_chunk.reschedule(None)
+                    columns = [desc[0] for desc in cursor.description or []]
+                    yield ColumnarResult.from_tuples(columns, [])
+                finished = True
+            finally:
+                if finished:
+                    self._pool.put_nowait(connection)
+                else:
+                    # Consumer went away, the query failed or the deadline
+                    # passed: stop it server-side
+                    self._schedule_cancel(connection, cursor, pending)
+
+    @staticmethod
+    def _fetch_chunk(cursor, chunk_size: int) -> ColumnarResult | None:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return None
+        columns = [desc[0] for desc in cursor.description]
+        return ColumnarResult.from_tuples(columns, rows)
+
+    async def explain(self, query: str, deadline: Deadline = UNLIMITED) -> QueryPlan:
+        statement = query.strip().rstrip(";")
+        row = await self._run(
+            f"EXPLAIN (TYPE DISTRIBUTED, FORMAT JSON) {statement}",
+            lambda cursor: cursor.fetchone(),
+            deadline,
+        )
+        # One JSON document mapping fragment id -> root plan node
+        fragments = json.loads(row[0])
+        nodes = []
+        for fragment in fragments.values():
+            self._collect_nodes(fragment, nodes)
+
+        root = fragments.get("0") or next(iter(fragments.values()), {})
+        rows = self._estimate(root, "outputRowCount")
+        # cpuCost is cumulative, so the largest value covers the whole plan
+        costs = [c for c in (self._estimate(n, "cpuCost") for n in nodes) if c]
+        scanned = [
+            self._estimate(node, "outputSizeInBytes")
+            for node in nodes
+            if "Scan" in node.get("name", "")
+        ]
+        return QueryPlan(
+            rows=rows,
+            cost=max(costs) if costs else None,
+            # Unknown if any scan lacks statistics
+            bytes_scanned=(sum(scanned) if scanned and None not in scanned else None),
+            raw=fragments,
+        )
+
+    @classmethod
+    def _collect_nodes(cls, node: dict, nodes: list[dict]) -> None:
+        nodes.append(node)
+        for child in node.get("children", []):
+            cls._collect_nodes(child, nodes)
+
+    @staticmethod
+    def _estimate(node: dict, key: str) -> float | None:
+        """First estimate for a plan node; Trino reports unknown values as NaN"""
+        estimates = node.get("estimates") or [{}]
+        value = estimates[0].get(key)
+        if value is None or isinstance(value, str) or math.isnan(value):
+            return None
+        return float(value)
 
     async def test_connection(self) -> bool:
         try:
-            if self._connection:
-                with self._connection.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-                    result = cursor.fetchone()
-                    if result and result[0] == 1:
-                        logger.info("Trino connection test successful")
-                        return True
+            result = await self._run("SELECT 1", lambda cursor: cursor.fetchone())
+            if result and result[0] == 1:
+                logger.info("Trino connection test successful")
+                return True
             return False
         except Exception as e:
             logger.error(f"Trino connection test failed: {str(e)}")
@@ -89,7 +285,14 @@ class TrinoDatabase(DatabaseInterface):
 
     @property
     def connection(self) -> trino.dbapi.Connection:
-        """Get the Trino connection"""
-        if not self._connection:
+        """Get a Trino connection (the first one in the pool)"""
+        if not self._connections:
+            raise ValueError("Database not initialized")
+        return self._connections[0]
+
+    @property
+    def metadata_engine(self) -> sa.Engine:
+        """Blocking SQLAlchemy engine for catalog reflection"""
+        if not self._metadata_engine:
             raise ValueError("Database not initialized")
-        return self._connection
+        return self._metadata_engine
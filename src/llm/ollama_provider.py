@@ -1,4 +1,5 @@
 import json
+from collections.abc import AsyncIterator
 from http import HTTPStatus
 
 import aiohttp
@@ -7,10 +8,20 @@ from src.core.base import BaseLLMProvider, BaseResponse
 from src.core.db import DatabaseType
 from src.core.llm_provider import LLMConfig
 from src.core.prompts import PromptManager
-from src.utils.config import OLLAMA_BASE_URL, OLLAMA_MODEL
+from src.llm.streaming import SQLStreamExtractor
+from src.llm.usage import record_prompt_tokens
+from src.utils.config import (
+    OLLAMA_BASE_URL,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_MODEL,
+    OLLAMA_REQUESTS_PER_MINUTE,
+)
+from src.utils.deadline import UNLIMITED, Deadline
 from src.utils.logger import get_logger
+from src.utils.rate_limit import RateLimiter
 
 logger = get_logger("ollama_provider")
+sampled_logger = get_logger("ollama_provider", sampled=True)
 
 
 class OllamaProvider(BaseLLMProvider):
@@ -20,13 +31,16 @@ class OllamaProvider(BaseLLMProvider):
         self.base_url = OLLAMA_BASE_URL or "http://localhost:11434"
         self.session = None
         self.prompt_manager = PromptManager()
+        self.rate_limiter = RateLimiter("ollama", OLLAMA_REQUESTS_PER_MINUTE)
 
     async def initialize(self) -> None:
         """Initialize Ollama client session"""
         try:
             logger.info("Initializing Ollama provider...")
-            logger.info(f"Using Ollama model: {self.config.model}")
-            self.session = aiohttp.ClientSession()
+            logger.info("Using Ollama model: {}", self.config.model)
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            )
             # Test connection
             async with self.session.get(f"{self.base_url}/api/version") as response:
                 if response.status != HTTPStatus.OK:
@@ -43,47 +57,91 @@ class OllamaProvider(BaseLLMProvider):
             await self.session.close()
         self.session = None
 
-    async def generate_sql(self, prompt: str, metadata: dict) -> BaseResponse:
+    def _request_body(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        database_type: str,
+        examples: list[tuple[str, str]] | None,
+        *,
+        stream: bool,
+        feedback: list[tuple[str, str]] | None = None,
+    ) -> dict:
+        system, *turns = self.prompt_manager.build_messages(
+            prompt, metadata, database_type, examples, feedback
+        )
+        # The system prompt (instructions and schema) comes first in the model
+        # template and is identical across questions, so while keep_alive holds
+        # the model loaded Ollama reuses its KV cache and only evaluates the
+        # question tokens
+        return {
+            "model": self.config.model,
+            "system": system["content"],
+            # /api/generate takes one prompt: repair turns follow the question
+            "prompt": "\n\n".join(turn["content"] for turn in turns),
+            "stream": stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {
+                "temperature": self.config.temperature,
+            },
+        }
+
+    def _timeout(self, deadline: Deadline, stream: bool) -> aiohttp.ClientTimeout:
+        """Whole request within the deadline and config.timeout
+
+        A stream only has to keep producing output within config.timeout,
+        however long the whole generation takes before the deadline.
+        """
+        if stream:
+            return aiohttp.ClientTimeout(
+                total=deadline.remaining(), sock_read=self.config.timeout
+            )
+        return aiohttp.ClientTimeout(total=deadline.budget(self.config.timeout))
+
+    @staticmethod
+    def _record_usage(result: dict) -> None:
+        # Ollama counts only the prompt tokens it evaluated; cached ones are
+        # not reported, so reuse shows up as a lower count per request
+        if "prompt_eval_count" in result:
+            record_prompt_tokens("ollama", result["prompt_eval_count"])
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
         try:
             if not self.session:
                 raise ValueError("Ollama client not initialized")
 
-            # Determine database type from metadata or fall back to PostgreSQL
-            database_type = metadata.get("database_type", DatabaseType.POSTGRESQL.value)
-
-            # Prepare variables for the prompt template
-            variables = {
-                "query": prompt,
-                "metadata": json.dumps(metadata),
-                "database_type": database_type,
-                "context": (
-                    f"Generate a {database_type} query based on the following request."
-                ),
-            }
-
-            # Generate the full prompt using the template
-            rendered_prompt = self.prompt_manager.render_prompt(
-                "sql_generation", variables
+            body = self._request_body(
+                prompt,
+                metadata,
+                database_type,
+                examples,
+                stream=False,
+                feedback=feedback,
             )
 
-            logger.debug(f"Sending request to Ollama with prompt: {prompt}")
+            await self.rate_limiter.acquire()
+            logger.debug("Sending request to Ollama with prompt: {}", prompt)
 
             # Make request to Ollama API
             async with self.session.post(
                 f"{self.base_url}/api/generate",
-                json={
-                    "model": self.config.model,
-                    "prompt": rendered_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": self.config.temperature,
-                    },
-                },
+                json=body,
+                timeout=self._timeout(deadline, stream=False),
             ) as response:
                 if response.status != HTTPStatus.OK:
                     raise RuntimeError(f"Ollama API error: {response.status}") from None
 
                 result = await response.json()
+                self._record_usage(result)
                 response_text = result.get("response", "")
 
                 # Try to extract SQL from the response
@@ -104,10 +162,55 @@ class OllamaProvider(BaseLLMProvider):
                 if not sql:
                     sql = response_text.strip()
 
-                logger.info("Successfully generated SQL query")
-                logger.debug(f"Generated SQL: {sql}")
+                sampled_logger.info("Successfully generated SQL query")
+                logger.debug("Generated SQL: {}", sql)
                 return BaseResponse(success=True, data={"sql": sql})
 
         except Exception as e:
             logger.error(f"Failed to generate SQL: {e}")
             return BaseResponse(success=False, error=str(e))
+
+    async def generate_sql_stream(
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> AsyncIterator[str]:
+        """Stream SQL deltas from Ollama's newline-delimited JSON responses"""
+        if not self.session:
+            raise ValueError("Ollama client not initialized")
+
+        body = self._request_body(
+            prompt, metadata, database_type, examples, stream=True
+        )
+
+        await self.rate_limiter.acquire()
+        logger.debug("Streaming request to Ollama with prompt: {}", prompt)
+
+        extractor = SQLStreamExtractor()
+        async with self.session.post(
+            f"{self.base_url}/api/generate",
+            json=body,
+            timeout=self._timeout(deadline, stream=True),
+        ) as response:
+            if response.status != HTTPStatus.OK:
+                raise RuntimeError(f"Ollama API error: {response.status}")
+
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama API error: {chunk['error']}")
+                delta = extractor.feed(chunk.get("response", ""))
+                if delta:
+                    yield delta
+                if chunk.get("done"):
+                    self._record_usage(chunk)
+                    break
+
+        sampled_logger.info("Successfully streamed SQL query")
+        logger.debug("Generated SQL: {}", extractor.result())
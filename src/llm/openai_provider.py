@@ -1,16 +1,27 @@
 import json
+from collections.abc import AsyncIterator
 
 from openai import AsyncOpenAI
 
 from src.core.base import BaseLLMProvider, BaseResponse
 from src.core.db import DatabaseType
 from src.core.llm_provider import LLMConfig
-from src.core.prompts import PromptManager
-from src.utils.config import OPENAI_API_KEY, OPENAI_MODEL
+from src.core.prompts import PromptManager, estimate_tokens
+from src.llm.streaming import SQLStreamExtractor
+from src.llm.usage import record_prompt_tokens
+from src.utils.config import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    OPENAI_REQUESTS_PER_MINUTE,
+    OPENAI_TOKENS_PER_MINUTE,
+)
+from src.utils.deadline import UNLIMITED, Deadline
 from src.utils.logger import get_logger
+from src.utils.rate_limit import RateLimiter
 
 # Get a named logger instance for this module
 logger = get_logger("openai_provider")
+sampled_logger = get_logger("openai_provider", sampled=True)
 
 
 class OpenAIProvider(BaseLLMProvider):
@@ -20,13 +31,18 @@ class OpenAIProvider(BaseLLMProvider):
         self.config = LLMConfig(model=OPENAI_MODEL)
         self.client = None
         self.prompt_manager = PromptManager()
+        self.rate_limiter = RateLimiter(
+            "openai", OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE
+        )
 
     async def initialize(self) -> None:
         """Initialize OpenAI client"""
         try:
             logger.info("Initializing OpenAI provider...")
-            logger.info(f"Using OpenAI model: {self.config.model}")
-            self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+            logger.info("Using OpenAI model: {}", self.config.model)
+            self.client = AsyncOpenAI(
+                api_key=OPENAI_API_KEY, timeout=self.config.timeout
+            )
             logger.info("OpenAI provider initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize OpenAI provider: {e}")
@@ -37,43 +53,111 @@ class OpenAIProvider(BaseLLMProvider):
         logger.info("Shutting down OpenAI provider")
         self.client = None
 
-    async def generate_sql(self, prompt: str, metadata: dict) -> BaseResponse:
+    def _build_messages(
+        self,
+        prompt: str,
+        metadata: dict,
+        database_type: str,
+        examples: list[tuple[str, str]] | None,
+        feedback: list[tuple[str, str]] | None = None,
+    ) -> list[dict[str, str]]:
+        # The system message is byte-identical for every question against the
+        # same schema, so OpenAI serves it from its prompt cache
+        return self.prompt_manager.build_messages(
+            prompt, metadata, database_type, examples, feedback
+        )
+
+    async def _create_completion(
+        self,
+        messages: list[dict],
+        stream: bool = False,
+        deadline: Deadline = UNLIMITED,
+    ):
+        await self.rate_limiter.acquire(
+            sum(estimate_tokens(m["content"]) for m in messages)
+            + self.config.max_tokens
+        )
+        options = {"stream_options": {"include_usage": True}} if stream else {}
+        return await self.client.chat.completions.create(
+            model=self.config.model,
+            messages=messages,
+            temperature=self.config.temperature,
+            max_tokens=self.config.max_tokens,
+            response_format={"type": "json_object"},
+            stream=stream,
+            # Waiting for the rate limiter may have used up part of the budget
+            timeout=deadline.budget(self.config.timeout),
+            **options,
+        )
+
+    @staticmethod
+    def _record_usage(usage) -> None:
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        record_prompt_tokens("openai", usage.prompt_tokens, cached)
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
         try:
             if not self.client:
                 raise ValueError("OpenAI client not initialized")
 
-            # Determine database type from metadata or fall back to PostgreSQL
-            database_type = metadata.get("database_type", DatabaseType.POSTGRESQL.value)
-
-            # Prepare variables for the prompt template
-            variables = {
-                "query": prompt,
-                "metadata": json.dumps(metadata),
-                "database_type": database_type,
-                "context": (
-                    f"Generate a {database_type} query based on the following request."
-                ),
-            }
-
-            # Generate the full prompt using the template
-            rendered_prompt = self.prompt_manager.render_prompt(
-                "sql_generation", variables
+            messages = self._build_messages(
+                prompt, metadata, database_type, examples, feedback
             )
 
-            logger.debug(f"Sending request to OpenAI with prompt: {prompt}")
-            response = await self.client.chat.completions.create(
-                model=self.config.model,
-                messages=[{"role": "user", "content": rendered_prompt}],
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                response_format={"type": "json_object"},
-            )
+            logger.debug("Sending request to OpenAI with prompt: {}", prompt)
+            response = await self._create_completion(messages, deadline=deadline)
+            self._record_usage(response.usage)
 
             sql = json.loads(response.choices[0].message.content)["sql"]
-            logger.info("Successfully generated SQL query")
-            logger.debug(f"Generated SQL: {sql}")
+            sampled_logger.info("Successfully generated SQL query")
+            logger.debug("Generated SQL: {}", sql)
             return BaseResponse(success=True, data={"sql": sql})
 
         except Exception as e:
             logger.error(f"Failed to generate SQL: {e}")
             return BaseResponse(success=False, error=str(e))
+
+    async def generate_sql_stream(
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> AsyncIterator[str]:
+        """Stream the SQL value of the JSON completion as it is generated"""
+        if not self.client:
+            raise ValueError("OpenAI client not initialized")
+
+        messages = self._build_messages(prompt, metadata, database_type, examples)
+
+        logger.debug("Streaming request to OpenAI with prompt: {}", prompt)
+        stream = await self._create_completion(messages, stream=True, deadline=deadline)
+        extractor = SQLStreamExtractor()
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    # The final chunk carries usage and no choices
+                    self._record_usage(chunk.usage)
+                    continue
+                delta = extractor.feed(chunk.choices[0].delta.content or "")
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
+
+        sampled_logger.info("Successfully streamed SQL query")
+        logger.debug("Generated SQL: {}", extractor.result())
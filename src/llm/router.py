@@ -0,0 +1,432 @@
+"""Provider registry and a router that hedges, fails over and circuit-breaks."""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+
+from src.core.base import BaseLLMProvider, BaseResponse
+from src.core.db import DatabaseType
+from src.llm.ollama_provider import OllamaProvider
+from src.llm.openai_provider import OpenAIProvider
+from src.utils.config import (
+    LLM_CIRCUIT_COOLDOWN,
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MAX_DELAY,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_PROVIDERS,
+    LLM_ROUTING_STRATEGY,
+)
+from src.utils.deadline import UNLIMITED, Deadline
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+llm_requests = metrics.counter(
+    "llm_requests_total",
+    "LLM provider attempts by provider and outcome (success/error/timeout/deadline)",
+)
+llm_request_seconds = metrics.histogram(
+    "llm_request_seconds", "Latency of successful LLM provider calls"
+)
+llm_hedges = metrics.counter(
+    "llm_hedged_requests_total", "Hedge or fallback attempts launched, by provider"
+)
+llm_circuit_transitions = metrics.counter(
+    "llm_circuit_transitions_total", "Circuit breaker state changes, by provider"
+)
+
+# Name -> factory; register additional providers here or via register_provider
+PROVIDERS: dict[str, Callable[[], BaseLLMProvider]] = {
+    "openai": OpenAIProvider,
+    "ollama": OllamaProvider,
+}
+
+
+def register_provider(name: str, factory: Callable[[], BaseLLMProvider]) -> None:
+    """Make a provider selectable by name in LLM_PROVIDERS"""
+    PROVIDERS[name] = factory
+
+
+def create_provider(name: str) -> BaseLLMProvider:
+    if name not in PROVIDERS:
+        raise ValueError(
+            f"Unknown LLM provider '{name}' (available: {', '.join(PROVIDERS)})"
+        )
+    return PROVIDERS[name]()
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one trial call through after cooldown"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, cooldown: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def available(self) -> bool:
+        """Whether a call may be attempted now (without claiming the trial)"""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.cooldown
+        return self.state == self.CLOSED
+
+    def acquire(self) -> bool:
+        """Claim permission for a call; only one trial runs while half-open"""
+        if not self.available():
+            return False
+        if self.state == self.OPEN:
+            self._transition(self.HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self._transition(self.OPEN)
+
+    def release(self) -> None:
+        """Give back an unfinished trial (e.g. a cancelled hedge) without a verdict"""
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+
+    def trip(self) -> None:
+        """Open the circuit immediately (e.g. the provider failed to initialize)"""
+        self.failures = self.failure_threshold
+        self.record_failure()
+
+    def _transition(self, state: str) -> None:
+        logger.warning(f"LLM provider {self.name} circuit {self.state} -> {state}")
+        self.state = state
+        llm_circuit_transitions.inc(provider=self.name, state=state)
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Route:
+    def __init__(self, name: str, provider: BaseLLMProvider, breaker: CircuitBreaker):
+        self.name = name
+        self.provider = provider
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+
+    @property
+    def timeout(self) -> float:
+        config = getattr(self.provider, "config", None)
+        return getattr(config, "timeout", 30)
+
+
+class ProviderRouter(BaseLLMProvider):
+    """Routes generation across providers in preference order
+
+    - Providers whose circuit is open are skipped until their cooldown ends.
+    - If the chosen provider has not answered within its recent p95 latency
+      (clamped to the hedge bounds), the request is also sent to the next
+      provider and the first successful answer wins.
+    - Errors and timeouts fall through to the next provider immediately.
+    - With the "latency" strategy, providers are tried fastest-p50 first.
+    - Each attempt gets the time left before the request deadline, at most
+      the provider's timeout. Running out of request time is not counted
+      against the provider's circuit, and no further provider is tried.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        providers: dict[str, BaseLLMProvider],
+        *,
+        strategy: str = "priority",
+        hedge: bool = True,
+        hedge_min_delay: float = 0.5,
+        hedge_max_delay: float = 10.0,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+    ):
+        if not providers:
+            raise ValueError("ProviderRouter needs at least one provider")
+        self.routes = [
+            Route(name, provider, CircuitBreaker(name, failure_threshold, cooldown))
+            for name, provider in providers.items()
+        ]
+        self.strategy = strategy
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        # Cache keys and logs refer to the preferred provider's model
+        self.config = getattr(self.routes[0].provider, "config", None)
+
+    @classmethod
+    def from_config(cls) -> "ProviderRouter":
+        """Build the router from LLM_PROVIDERS and the LLM_* routing settings"""
+        names = [name.strip() for name in LLM_PROVIDERS.split(",") if name.strip()]
+        return cls(
+            {name: create_provider(name) for name in names},
+            strategy=LLM_ROUTING_STRATEGY,
+            hedge=LLM_HEDGE_ENABLED,
+            hedge_min_delay=LLM_HEDGE_MIN_DELAY,
+            hedge_max_delay=LLM_HEDGE_MAX_DELAY,
+            failure_threshold=LLM_CIRCUIT_FAILURE_THRESHOLD,
+            cooldown=LLM_CIRCUIT_COOLDOWN,
+        )
+
+    async def initialize(self) -> None:
+        """Initialize every provider; ones that fail start with an open circuit"""
+        logger.info(
+            f"Initializing LLM router: {', '.join(r.name for r in self.routes)} "
+            f"(strategy={self.strategy}, hedge={self.hedge})"
+        )
+        initialized = 0
+        for route in self.routes:
+            try:
+                await route.provider.initialize()
+                initialized += 1
+            except Exception as e:
+                logger.error(f"LLM provider {route.name} unavailable: {e}")
+                route.breaker.trip()
+        if not initialized:
+            raise RuntimeError("No LLM provider could be initialized")
+
+    async def shutdown(self) -> None:
+        for route in self.routes:
+            try:
+                await route.provider.shutdown()
+            except Exception as e:
+                logger.error(f"Failed to shut down LLM provider {route.name}: {e}")
+
+    def _candidates(self) -> list[Route]:
+        routes = [route for route in self.routes if route.breaker.available()]
+        if self.strategy == "latency":
+            # Unmeasured providers sort first so they get sampled
+            routes.sort(key=lambda route: route.latency.quantile(0.5) or 0.0)
+        return routes
+
+    def _hedge_delay(self, route: Route) -> float:
+        p95 = route.latency.quantile(0.95)
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, p95))
+
+    async def _attempt(  # noqa: PLR0913
+        self,
+        route: Route,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None,
+        feedback: list[tuple[str, str]] | None,
+        *,
+        database_type: str,
+        deadline: Deadline,
+    ):
+        start = time.perf_counter()
+        try:
+            async with deadline.timeout(route.timeout):
+                response = await route.provider.generate_sql(
+                    prompt,
+                    metadata,
+                    examples,
+                    feedback,
+                    database_type=database_type,
+                    deadline=deadline,
+                )
+        except TimeoutError:
+            if deadline.expired():
+                # The request ran out of time, not the provider
+                llm_requests.inc(provider=route.name, outcome="deadline")
+                route.breaker.release()
+                return BaseResponse(success=False, error="request deadline passed")
+            llm_requests.inc(provider=route.name, outcome="timeout")
+            route.breaker.record_failure()
+            return BaseResponse(
+                success=False, error=f"timed out after {route.timeout}s"
+            )
+        except asyncio.CancelledError:
+            # Lost the hedge race or the caller went away: not the provider's fault
+            route.breaker.release()
+            raise
+        except Exception as e:
+            response = BaseResponse(success=False, error=str(e))
+
+        elapsed = time.perf_counter() - start
+        if response.success:
+            llm_requests.inc(provider=route.name, outcome="success")
+            llm_request_seconds.observe(elapsed, provider=route.name)
+            route.latency.observe(elapsed)
+            route.breaker.record_success()
+        else:
+            llm_requests.inc(provider=route.name, outcome="error")
+            route.breaker.record_failure()
+        return response
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        feedback: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> BaseResponse:
+        remaining = self._candidates()
+        pending: dict[asyncio.Task, Route] = {}
+        errors: list[str] = []
+
+        def launch_next() -> Route | None:
+            while remaining and not deadline.expired():
+                route = remaining.pop(0)
+                if route.breaker.acquire():
+                    if pending or errors:
+                        llm_hedges.inc(provider=route.name)
+                    task = asyncio.ensure_future(
+                        self._attempt(
+                            route,
+                            prompt,
+                            metadata,
+                            examples,
+                            feedback,
+                            database_type=database_type,
+                            deadline=deadline,
+                        )
+                    )
+                    pending[task] = route
+                    return route
+            return None
+
+        last = launch_next()
+        try:
+            while pending:
+                delay = self._hedge_delay(last) if self.hedge and remaining else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.warning(
+                        f"LLM provider {last.name} slower than {delay:.2f}s, hedging"
+                    )
+                    last = launch_next() or last
+                    continue
+
+                for task in done:
+                    route = pending.pop(task)
+                    response = task.result()
+                    if response.success:
+                        logger.debug("LLM answer from {}", route.name)
+                        return response
+                    logger.warning(
+                        f"LLM provider {route.name} failed: {response.error}"
+                    )
+                    errors.append(f"{route.name}: {response.error}")
+                if not pending:
+                    last = launch_next() or last
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if not errors:
+            if deadline.expired():
+                return BaseResponse(success=False, error="request deadline passed")
+            return BaseResponse(
+                success=False, error="No LLM provider available (all circuits open)"
+            )
+        return BaseResponse(success=False, error="; ".join(errors))
+
+    async def generate_sql_stream(
+        self,
+        prompt: str,
+        metadata: dict,
+        examples: list[tuple[str, str]] | None = None,
+        *,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        deadline: Deadline = UNLIMITED,
+    ) -> AsyncIterator[str]:
+        """Stream from the first healthy provider
+
+        Failures before the first delta fall over to the next provider; once
+        output has been sent, a failure is raised to the caller. If the
+        deadline passes before the first delta, TimeoutError is raised.
+        """
+        errors: list[str] = []
+        for route in self._candidates():
+            if not route.breaker.acquire():
+                continue
+            start = time.perf_counter()
+            stream = route.provider.generate_sql_stream(
+                prompt,
+                metadata,
+                examples,
+                database_type=database_type,
+                deadline=deadline,
+            )
+            try:
+                async with deadline.timeout(route.timeout):
+                    first = await anext(stream, None)
+            except asyncio.CancelledError:
+                route.breaker.release()
+                await stream.aclose()
+                raise
+            except Exception as e:
+                await stream.aclose()
+                if isinstance(e, TimeoutError) and deadline.expired():
+                    llm_requests.inc(provider=route.name, outcome="deadline")
+                    route.breaker.release()
+                    raise
+                outcome = "timeout" if isinstance(e, TimeoutError) else "error"
+                llm_requests.inc(provider=route.name, outcome=outcome)
+                route.breaker.record_failure()
+                logger.warning(f"LLM provider {route.name} failed to stream: {e}")
+                errors.append(f"{route.name}: {str(e) or outcome}")
+                continue
+
+            try:
+                if first is not None:
+                    yield first
+                async for delta in stream:
+                    yield delta
+            except Exception:
+                llm_requests.inc(provider=route.name, outcome="error")
+                route.breaker.record_failure()
+                raise
+            except BaseException:
+                # Consumer stopped reading (client disconnect) mid-stream
+                route.breaker.release()
+                raise
+            finally:
+                await stream.aclose()
+
+            elapsed = time.perf_counter() - start
+            llm_requests.inc(provider=route.name, outcome="success")
+            llm_request_seconds.observe(elapsed, provider=route.name)
+            route.latency.observe(elapsed)
+            route.breaker.record_success()
+            return
+
+        raise RuntimeError(
+            "; ".join(errors) or "No LLM provider available (all circuits open)"
+        )
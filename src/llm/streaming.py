@@ -0,0 +1,105 @@
+"""Incremental extraction of the generated SQL from a streamed LLM response."""
+
+import json
+import re
+
+_SQL_KEY_PATTERN = re.compile(r'"sql"\s*:\s*"')
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class SQLStreamExtractor:
+    """Turn raw response text chunks into deltas of the SQL string
+
+    Providers are asked for a JSON object with a 'sql' key. The value is
+    decoded as it arrives, so callers can show the SQL before the object is
+    complete. Responses that are not JSON (e.g. some Ollama models) are
+    passed through as raw text.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._mode = None  # None until decided, then "json" or "raw"
+        self._in_value = False
+        self._done = False
+        self.sql = ""
+        self.raw = ""
+
+    def feed(self, text: str) -> str:
+        """Consume a chunk of response text and return the new SQL delta"""
+        self.raw += text
+        if self._done or not text:
+            return ""
+
+        if self._mode is None:
+            stripped = self.raw.lstrip()
+            if not stripped:
+                return ""
+            self._mode = "json" if stripped[0] in "{`" else "raw"
+            text = self.raw
+
+        if self._mode == "raw":
+            delta = text if self.sql else text.lstrip()
+            self.sql += delta
+            return delta
+
+        self._buffer += text
+        if not self._in_value:
+            match = _SQL_KEY_PATTERN.search(self._buffer)
+            if match is None:
+                return ""
+            self._buffer = self._buffer[match.end() :]
+            self._in_value = True
+        return self._decode()
+
+    def _decode(self) -> str:
+        """Decode as much of the JSON string value as is complete"""
+        out = []
+        buffer = self._buffer
+        i = 0
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self._done = True
+                i = len(buffer)
+                break
+            if char != "\\":
+                out.append(char)
+                i += 1
+                continue
+            # Escape sequences may be split across chunks; wait for the rest
+            if i + 1 >= len(buffer):
+                break
+            code = buffer[i + 1]
+            if code == "u":
+                if i + 6 > len(buffer):
+                    break
+                out.append(chr(int(buffer[i + 2 : i + 6], 16)))
+                i += 6
+            else:
+                out.append(_ESCAPES.get(code, code))
+                i += 2
+        self._buffer = buffer[i:]
+        delta = "".join(out)
+        self.sql += delta
+        return delta
+
+    def result(self) -> str:
+        """The complete SQL once the stream has ended"""
+        if self._mode == "json" and not self._done:
+            # Fall back to parsing whatever object the response contains
+            start, end = self.raw.find("{"), self.raw.rfind("}") + 1
+            if start >= 0 and end > start:
+                try:
+                    return json.loads(self.raw[start:end]).get("sql") or self.sql
+                except json.JSONDecodeError:
+                    pass
+        return self.sql.strip() or self.raw.strip()
@@ -0,0 +1,19 @@
+"""Prompt token accounting shared by the LLM providers."""
+
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+prompt_tokens = metrics.counter(
+    "llm_prompt_tokens_total",
+    "Prompt tokens by provider and cache (hit = served from the provider's "
+    "prompt prefix cache)",
+)
+
+
+def record_prompt_tokens(provider: str, total: int, cached: int = 0) -> None:
+    prompt_tokens.inc(total - cached, provider=provider, cache="miss")
+    if cached:
+        prompt_tokens.inc(cached, provider=provider, cache="hit")
+    logger.debug("{} prompt tokens: {} ({} cached)", provider, total, cached)
@@ -0,0 +1,405 @@
+"""Single-pass SQL analysis over the sqlparse lexer (no statement grouping)."""
+
+from sqlparse import lexer
+from sqlparse.tokens import (
+    Comment,
+    Keyword,
+    Name,
+    Operator,
+    Punctuation,
+    String,
+    Whitespace,
+)
+
+# FROM/JOIN clause states, tracked per parenthesis depth
+_EXPECT_TABLE = "expect_table"
+_AFTER_TABLE = "after_table"
+_EXPECT_ALIAS = "expect_alias"
+_AFTER_ALIAS = "after_alias"
+_JOIN_CONDITION = "join_condition"
+
+# WITH list states
+_CTE_NAME = "cte_name"
+_CTE_AFTER_NAME = "cte_after_name"
+_CTE_BODY = "cte_body"
+_CTE_AFTER_BODY = "cte_after_body"
+
+# Keywords that end a FROM clause (a join condition may contain AND, OR, ...)
+_CLAUSE_END = {
+    "WHERE",
+    "GROUP BY",
+    "ORDER BY",
+    "HAVING",
+    "LIMIT",
+    "OFFSET",
+    "UNION",
+    "UNION ALL",
+    "INTERSECT",
+    "EXCEPT",
+    "WINDOW",
+    "QUALIFY",
+    "FETCH",
+    "FOR",
+    "RETURNING",
+}
+# Statements that change data (DROP, DELETE, ... are rejected by the validator);
+# INTO also covers SELECT ... INTO, which creates a table
+_WRITE_KEYWORDS = {
+    "INSERT",
+    "UPDATE",
+    "DELETE",
+    "MERGE",
+    "UPSERT",
+    "REPLACE",
+    "COPY",
+    "INTO",
+}
+# Statements that only read: everything else (CREATE, SET, CALL, DO, VACUUM, ...)
+# is not a query
+_QUERY_KEYWORDS = {"SELECT", "WITH"}
+_TABLE_PREFIXES = {"LATERAL", "ONLY", "TABLE"}
+_CTE_BODY_PREFIXES = {"MATERIALIZED", "NOT"}
+# Many common table names (events, data, account, ...) lex as plain keywords
+_NOT_TABLE_NAMES = {
+    "VALUES",
+    "SET",
+    "DEFAULT",
+    "WHERE",
+    "ON",
+    "USING",
+    "OF",
+    "NOWAIT",
+    "SKIP",
+}
+
+
+class TableRef:
+    """A table referenced in a FROM, JOIN, INTO or UPDATE clause"""
+
+    def __init__(self, parts: tuple[str, ...], alias: str | None = None):
+        self.parts = parts
+        self.alias = alias
+
+    @property
+    def name(self) -> str:
+        return self.parts[-1]
+
+    @property
+    def qualified_name(self) -> str:
+        return ".".join(self.parts)
+
+    def __repr__(self) -> str:
+        alias = f" AS {self.alias}" if self.alias else ""
+        return f"TableRef({self.qualified_name}{alias})"
+
+
+class ColumnRef:
+    """A qualified column reference such as o.customer_id or s.t.col"""
+
+    def __init__(self, qualifier: tuple[str, ...], column: str):
+        self.qualifier = qualifier
+        self.column = column
+
+    def __repr__(self) -> str:
+        return f"ColumnRef({'.'.join(self.qualifier)}.{self.column})"
+
+
+class SQLAnalysis:
+    """What validation needs to know about a (possibly multi-statement) script"""
+
+    def __init__(self):
+        self.statement_count = 0
+        # First word of the first statement, upper-cased
+        self.leading_keyword = ""
+        self.keywords: set[str] = set()
+        self.tables: list[TableRef] = []
+        self.cte_names: set[str] = set()
+        # alias -> referenced table name, or None for subqueries and functions
+        self.aliases: dict[str, str | None] = {}
+        self.derived_aliases: set[str] = set()
+        self.column_refs: list[ColumnRef] = []
+        # column = column comparisons between qualified references (joins)
+        self.join_predicates: list[tuple[ColumnRef, ColumnRef]] = []
+        # Column names referenced in WHERE or ON conditions
+        self.predicate_columns: set[str] = set()
+        # Whether the outermost query already has LIMIT or FETCH
+        self.top_level_limit = False
+        # Comments and whitespace dropped, keywords and unquoted names folded
+        self.normalized_sql = ""
+
+    @property
+    def read_only(self) -> bool:
+        """A query (SELECT or WITH ... SELECT) rather than any other statement"""
+        return (
+            self.leading_keyword in _QUERY_KEYWORDS
+            and "SELECT" in self.keywords
+            and not self.keywords & _WRITE_KEYWORDS
+        )
+
+    def base_tables(self) -> list[TableRef]:
+        """Referenced tables that are not CTEs defined in the script"""
+        return [
+            table
+            for table in self.tables
+            if len(table.parts) > 1 or table.name not in self.cte_names
+        ]
+
+
+class _Frame:
+    """Parser state for one level of parentheses"""
+
+    def __init__(self, function: bool = False, derived: bool = False):
+        self.function = function
+        self.derived = derived
+        self.cte_body = False
+        self.table_state: str | None = None
+        self.table_clause: str | None = None
+        self.cte_state: str | None = None
+        self.in_predicate = False
+
+
+def normalize_identifier(value: str) -> str:
+    """Quoted identifiers keep their case; unquoted ones fold to lower case"""
+    if len(value) > 1 and (value[0], value[-1]) in {('"', '"'), ("`", "`"), ("[", "]")}:
+        return value[1:-1]
+    return value.lower()
+
+
+def _is_name(ttype) -> bool:
+    return ttype in Name or ttype in String.Symbol
+
+
+def _is_table_name(ttype, value: str) -> bool:
+    return _is_name(ttype) or (
+        ttype is Keyword and value.upper() not in _NOT_TABLE_NAMES
+    )
+
+
+def _significant_tokens(sql: str) -> list[tuple]:
+    return [
+        (ttype, value)
+        for ttype, value in lexer.tokenize(sql)
+        if ttype not in Whitespace and ttype not in Comment
+    ]
+
+
+def _normalize(tokens: list[tuple]) -> str:
+    """Canonical text for equivalent SQL (literals and quoted names kept verbatim)"""
+    parts = []
+    for ttype, value in tokens:
+        if ttype in Keyword:
+            parts.append(value.upper())
+        elif ttype in Name:
+            parts.append(value.lower())
+        else:
+            parts.append(value)
+    while parts and parts[-1] == ";":
+        parts.pop()
+    return " ".join(parts)
+
+
+def _read_name(tokens: list[tuple], i: int) -> tuple[tuple[str, ...], int]:
+    """Read a possibly qualified name (a.b.c); returns its parts and next index"""
+    parts = [normalize_identifier(tokens[i][1])]
+    i += 1
+    while (
+        i + 1 < len(tokens)
+        and tokens[i] == (Punctuation, ".")
+        and tokens[i + 1][0] not in Punctuation
+    ):
+        parts.append(normalize_identifier(tokens[i + 1][1]))
+        i += 2
+    return tuple(parts), i
+
+
+def _is_column_start(tokens: list[tuple], i: int) -> bool:
+    return (
+        _is_name(tokens[i][0])
+        and i + 2 < len(tokens)
+        and tokens[i + 1] == (Punctuation, ".")
+    )
+
+
+def _read_column(tokens: list[tuple], i: int) -> tuple[ColumnRef | None, int]:
+    """Read a qualified column; None for wildcards and schema.function() calls"""
+    parts, i = _read_name(tokens, i)
+    if parts[-1] == "*" or (i < len(tokens) and tokens[i] == (Punctuation, "(")):
+        return None, i
+    return ColumnRef(parts[:-1], parts[-1]), i
+
+
+def _column_reference(
+    analysis: SQLAnalysis, tokens: list[tuple], i: int, in_predicate: bool
+) -> int:
+    """Record a qualified column, and a join predicate if one is compared to it"""
+    left, i = _read_column(tokens, i)
+    if left is None:
+        return i
+    analysis.column_refs.append(left)
+    if in_predicate:
+        analysis.predicate_columns.add(left.column)
+    if (
+        i + 1 < len(tokens)
+        and tokens[i] == (Operator.Comparison, "=")
+        and _is_column_start(tokens, i + 1)
+    ):
+        right, i = _read_column(tokens, i + 1)
+        if right is not None:
+            analysis.column_refs.append(right)
+            analysis.join_predicates.append((left, right))
+            if in_predicate:
+                analysis.predicate_columns.add(right.column)
+    return i
+
+
+def _opens_table_clause(tokens: list[tuple], i: int, upper: str) -> bool:
+    previous = [value.upper() for _, value in tokens[max(0, i - 2) : i]]
+    if upper == "FROM":
+        # IS [NOT] DISTINCT FROM is a comparison, not a FROM clause
+        return not (
+            previous[-1:] == ["DISTINCT"] and previous[-2:-1] in (["IS"], ["NOT"])
+        )
+    if upper == "UPDATE":
+        # FOR UPDATE, ON CONFLICT DO UPDATE and ON DUPLICATE KEY UPDATE
+        return not previous or previous[-1] not in {"FOR", "DO", "KEY"}
+    return upper == "INTO" or upper.endswith("JOIN")
+
+
+def analyze_sql(sql: str) -> SQLAnalysis:  # noqa: PLR0912, PLR0915
+    """Extract statements, keywords, tables, CTEs, aliases and columns in one pass"""
+    analysis = SQLAnalysis()
+    tokens = _significant_tokens(sql)
+    analysis.normalized_sql = _normalize(tokens)
+    frames = [_Frame()]
+    statement_open = False
+    last_table: TableRef | None = None
+    i = 0
+
+    while i < len(tokens):
+        ttype, value = tokens[i]
+        frame = frames[-1]
+
+        if ttype in Punctuation:
+            if value == ";" and len(frames) == 1:
+                statement_open = False
+                frames[0] = _Frame()
+            elif value == "(":
+                derived = frame.table_state == _EXPECT_TABLE
+                function = not derived and i > 0 and _is_name(tokens[i - 1][0])
+                child = _Frame(function=function, derived=derived)
+                child.cte_body = frame.cte_state == _CTE_BODY
+                # Function arguments and grouped conditions stay in the predicate
+                child.in_predicate = frame.in_predicate
+                frames.append(child)
+            elif value == ")" and len(frames) > 1:
+                child = frames.pop()
+                if child.derived:
+                    frames[-1].table_state = _AFTER_TABLE
+                    last_table = None
+                if child.cte_body:
+                    frames[-1].cte_state = _CTE_AFTER_BODY
+            elif value == ",":
+                if frame.table_state in (_AFTER_TABLE, _AFTER_ALIAS, _JOIN_CONDITION):
+                    frame.table_state = _EXPECT_TABLE
+                elif frame.cte_state == _CTE_AFTER_BODY:
+                    frame.cte_state = _CTE_NAME
+            i += 1
+            continue
+
+        upper = value.upper()
+        if not statement_open:
+            analysis.statement_count += 1
+            statement_open = True
+            if analysis.statement_count == 1:
+                analysis.leading_keyword = upper
+
+        if ttype in Keyword:
+            analysis.keywords.add(upper)
+            if upper in {"WHERE", "ON"}:
+                frame.in_predicate = True
+            elif upper in _CLAUSE_END or ttype in Keyword.DML:
+                frame.in_predicate = False
+            if upper in {"LIMIT", "FETCH"} and len(frames) == 1:
+                analysis.top_level_limit = True
+
+        # WITH name [(columns)] AS [NOT] [MATERIALIZED] (body) [, ...]
+        if ttype in Keyword.CTE:
+            frame.cte_state = _CTE_NAME
+            i += 1
+            continue
+        if frame.cte_state == _CTE_NAME:
+            if upper != "RECURSIVE":
+                analysis.cte_names.add(normalize_identifier(value))
+                frame.cte_state = _CTE_AFTER_NAME
+            i += 1
+            continue
+        if frame.cte_state == _CTE_AFTER_NAME and upper == "AS":
+            frame.cte_state = _CTE_BODY
+            i += 1
+            continue
+        if frame.cte_state == _CTE_BODY and upper in _CTE_BODY_PREFIXES:
+            i += 1
+            continue
+        if frame.cte_state == _CTE_AFTER_BODY:
+            frame.cte_state = None
+
+        if ttype in Keyword and _opens_table_clause(tokens, i, upper):
+            # FROM inside EXTRACT(...), SUBSTRING(...) or TRIM(...) is syntax
+            if not (frame.function and upper == "FROM"):
+                frame.table_state = _EXPECT_TABLE
+                frame.table_clause = upper
+            i += 1
+            continue
+
+        state = frame.table_state
+        if state == _EXPECT_TABLE and upper in _TABLE_PREFIXES:
+            i += 1
+        elif state == _EXPECT_TABLE and _is_table_name(ttype, value):
+            parts, i = _read_name(tokens, i)
+            if (
+                frame.table_clause != "INTO"
+                and i < len(tokens)
+                and tokens[i] == (Punctuation, "(")
+            ):
+                # Table function (generate_series, UNNEST, ...): the call is
+                # handled like a derived table so a following alias is read
+                last_table = None
+                continue
+            last_table = TableRef(parts)
+            analysis.tables.append(last_table)
+            frame.table_state = _AFTER_TABLE
+        elif state == _AFTER_TABLE and upper == "AS":
+            frame.table_state = _EXPECT_ALIAS
+            i += 1
+        elif (state == _AFTER_TABLE and _is_name(ttype)) or (
+            state == _EXPECT_ALIAS and _is_table_name(ttype, value)
+        ):
+            alias = normalize_identifier(value)
+            analysis.aliases[alias] = last_table.name if last_table else None
+            if last_table is not None:
+                last_table.alias = alias
+            else:
+                analysis.derived_aliases.add(alias)
+            frame.table_state = _AFTER_ALIAS
+            i += 1
+        elif state is not None and upper in {"ON", "USING"}:
+            frame.table_state = _JOIN_CONDITION
+            i += 1
+        elif _is_column_start(tokens, i):
+            i = _column_reference(analysis, tokens, i, frame.in_predicate)
+        else:
+            if frame.in_predicate and _is_name(ttype):
+                analysis.predicate_columns.add(normalize_identifier(value))
+            if (
+                state is not None
+                and ttype in Keyword
+                and (
+                    state != _JOIN_CONDITION
+                    or upper in _CLAUSE_END
+                    or ttype in Keyword.DML
+                )
+            ):
+                frame.table_state = None
+            i += 1
+
+    return analysis
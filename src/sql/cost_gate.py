@@ -0,0 +1,172 @@
+"""Pre-execution gate on planner estimates (EXPLAIN, never the query itself)."""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+from src.core.base import BaseResponse
+from src.core.db import QueryPlan
+from src.sql.analyzer import SQLAnalysis, analyze_sql
+from src.utils.config import (
+    COST_GATE_CACHE_SIZE,
+    COST_GATE_CACHE_TTL,
+    COST_GATE_MAX_BYTES,
+    COST_GATE_MAX_COST,
+    COST_GATE_MAX_ROWS,
+    COST_GATE_PARTITIONED_TABLES,
+    COST_GATE_REWRITE_LIMIT,
+)
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+cost_gate_decisions = metrics.counter(
+    "sql_cost_gate_decisions_total",
+    "Cost gate decisions by outcome (allowed/rewritten/rejected)",
+)
+explain_cache_lookups = metrics.counter(
+    "sql_explain_cache_lookups_total",
+    "EXPLAIN plan cache lookups by result (hit/miss)",
+)
+
+
+def parse_partitioned_tables(spec: str) -> dict[str, frozenset[str]]:
+    """Parse "table:col[,col];table:col" into table -> partition columns"""
+    tables = {}
+    for entry in spec.split(";"):
+        table, _, columns = entry.partition(":")
+        names = frozenset(c.strip().lower() for c in columns.split(",") if c.strip())
+        if table.strip() and names:
+            tables[table.strip().lower()] = names
+    return tables
+
+
+class CostGate:
+    """Reject or rewrite SQL whose EXPLAIN estimates exceed the thresholds
+
+    A threshold of 0 disables that check. Row estimates over the limit are
+    capped with a top-level LIMIT when the query is a single SELECT without
+    one; cost and bytes scanned are then checked against the rewritten plan.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        database,
+        *,
+        max_cost: float = COST_GATE_MAX_COST,
+        max_rows: int = COST_GATE_MAX_ROWS,
+        max_bytes: float = COST_GATE_MAX_BYTES,
+        rewrite_limit: bool = COST_GATE_REWRITE_LIMIT,
+        partitioned_tables: dict[str, frozenset[str]] | None = None,
+        cache_size: int = COST_GATE_CACHE_SIZE,
+        cache_ttl: float = COST_GATE_CACHE_TTL,
+    ):
+        self.database = database
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rewrite_limit = rewrite_limit
+        self.partitioned_tables = (
+            parse_partitioned_tables(COST_GATE_PARTITIONED_TABLES)
+            if partitioned_tables is None
+            else partitioned_tables
+        )
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        # sql hash -> (expiry on the monotonic clock, plan)
+        self._plans: OrderedDict[str, tuple[float, QueryPlan]] = OrderedDict()
+        self._in_flight = SingleFlight("explain")
+
+    async def check(self, sql: str) -> BaseResponse:
+        """Decide whether SQL may run; data holds the SQL to execute"""
+        try:
+            analysis = analyze_sql(sql)
+            missing = self._missing_partition_filters(analysis)
+            if missing:
+                return self._reject(
+                    "Query must filter on a partition column: " + "; ".join(missing)
+                )
+
+            plan = await self.explain(sql)
+            rewritten = False
+            if self._too_many_rows(plan) and self._can_add_limit(analysis):
+                sql = f"{sql.strip().rstrip(';').rstrip()}\nLIMIT {self.max_rows}"
+                plan = await self.explain(sql)
+                rewritten = True
+
+            error = self._over_threshold(plan)
+            if error:
+                return self._reject(error)
+
+            outcome = "rewritten" if rewritten else "allowed"
+            cost_gate_decisions.inc(outcome=outcome)
+            if rewritten:
+                logger.info("Cost gate added LIMIT {}", self.max_rows)
+            return BaseResponse(
+                success=True,
+                data={"sql": sql, "rewritten": rewritten, "estimates": plan.to_dict()},
+            )
+
+        except Exception as e:
+            logger.error(f"Cost gate error: {e}")
+            return BaseResponse(success=False, error=str(e))
+
+    async def explain(self, sql: str) -> QueryPlan:
+        """Planner estimates for SQL, cached per SQL hash for cache_ttl seconds"""
+        key = hashlib.sha256(sql.encode()).hexdigest()
+        cached = self._plans.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._plans.move_to_end(key)
+            explain_cache_lookups.inc(result="hit")
+            return cached[1]
+
+        explain_cache_lookups.inc(result="miss")
+        plan = await self._in_flight.do(key, lambda: self.database.explain(sql))
+        self._plans[key] = (time.monotonic() + self.cache_ttl, plan)
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.cache_size:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _missing_partition_filters(self, analysis: SQLAnalysis) -> list[str]:
+        missing = set()
+        for table in analysis.base_tables():
+            columns = self.partitioned_tables.get(
+                table.qualified_name
+            ) or self.partitioned_tables.get(table.name)
+            if columns and not columns & analysis.predicate_columns:
+                missing.add(f"{table.qualified_name} ({', '.join(sorted(columns))})")
+        return sorted(missing)
+
+    def _too_many_rows(self, plan: QueryPlan) -> bool:
+        return bool(self.max_rows) and (plan.rows or 0) > self.max_rows
+
+    def _can_add_limit(self, analysis: SQLAnalysis) -> bool:
+        return (
+            self.rewrite_limit
+            and analysis.statement_count == 1
+            and not analysis.top_level_limit
+            and analysis.read_only
+        )
+
+    def _over_threshold(self, plan: QueryPlan) -> str | None:
+        """Description of the first exceeded threshold, or None"""
+        if self._too_many_rows(plan):
+            return f"Estimated {plan.rows:,.0f} rows exceeds limit of {self.max_rows:,}"
+        if self.max_cost and (plan.cost or 0) > self.max_cost:
+            return (
+                f"Estimated cost {plan.cost:,.0f} exceeds limit of {self.max_cost:,.0f}"
+            )
+        if self.max_bytes and (plan.bytes_scanned or 0) > self.max_bytes:
+            return (
+                f"Estimated {plan.bytes_scanned:,.0f} bytes scanned exceeds "
+                f"limit of {self.max_bytes:,.0f}"
+            )
+        return None
+
+    def _reject(self, error: str) -> BaseResponse:
+        cost_gate_decisions.inc(outcome="rejected")
+        logger.warning(f"Cost gate rejected query: {error}")
+        return BaseResponse(success=False, error=error)
@@ -0,0 +1,314 @@
+"""Verified (question, SQL) pairs, retrieved by similarity for few-shot prompts."""
+
+import asyncio
+import json
+import math
+import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+
+from src.sql.analyzer import analyze_sql
+from src.sql.generation_cache import normalize_question
+from src.sql.schema_retriever import tokenize
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+try:
+    import numpy as np
+except ImportError:  # Optional: pip install "TableTalk[examples]"
+    np = None
+
+logger = get_logger(__name__)
+
+example_lookups = metrics.counter(
+    "example_store_lookups_total",
+    "Few-shot example lookups by result (hit = at least one example injected)",
+)
+
+# Postings scored in full per search; rarer terms are taken first, and more
+# frequent ones only add to the scores of candidates already found
+_CANDIDATE_BUDGET = 4096
+# Terms in more examples than this also keep a bitmap of them (1 bit each)
+_BITMAP_MIN_POSTINGS = 1024
+# Candidates checked per requested example when filtering by known tables
+_OVERFETCH = 4
+
+
+def question_terms(question: str) -> set[str]:
+    """Stemmed words plus word bigrams of a question"""
+    words = tokenize(question)
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:], strict=False)}
+
+
+class Example:
+    def __init__(self, question: str, sql: str, tables: frozenset[str]):
+        self.question = question
+        self.sql = sql
+        # Tables the SQL reads, so examples for dropped tables can be skipped
+        self.tables = tables
+
+
+class ExampleIndex:
+    """Inverted index from question terms to examples of one database
+
+    Postings are int32 arrays in insertion order (so sorted), read through
+    NumPy views at search time. A search scores the postings of the rarest
+    query terms within a candidate budget, then adds the weight of each
+    frequent term to those candidates. Frequent terms also keep a bitmap of
+    their examples, so that step is a gather rather than a binary search,
+    which keeps lookups under a millisecond at 100k examples.
+    """
+
+    def __init__(self):
+        self.examples: list[Example] = []
+        self._ids: dict[str, int] = {}
+        self._postings: dict[str, array] = {}
+        self._bitmaps: dict[str, bytearray] = {}
+        self._bitmap_bytes = 0
+        # 1 / sqrt(number of terms) per example
+        self._norms = array("f")
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+    def add(self, question: str, sql: str, tables: frozenset[str]) -> None:
+        key = normalize_question(question)[0]
+        example = Example(question, sql, tables)
+        if key in self._ids:
+            # Same question verified again: keep the newest SQL
+            self.examples[self._ids[key]] = example
+            return
+        terms = question_terms(question)
+        if not terms:
+            return
+        example_id = len(self.examples)
+        self._ids[key] = example_id
+        self.examples.append(example)
+        self._norms.append(1 / math.sqrt(len(terms)))
+        if example_id >> 3 >= self._bitmap_bytes:
+            self._grow_bitmaps()
+        for term in terms:
+            posting = self._postings.setdefault(term, array("i"))
+            posting.append(example_id)
+            bitmap = self._bitmaps.get(term)
+            if bitmap is not None:
+                bitmap[example_id >> 3] |= 1 << (example_id & 7)
+            elif len(posting) > _BITMAP_MIN_POSTINGS:
+                bitmap = self._bitmaps[term] = bytearray(self._bitmap_bytes)
+                for i in posting:
+                    bitmap[i >> 3] |= 1 << (i & 7)
+
+    def _grow_bitmaps(self) -> None:
+        size = max(1024, self._bitmap_bytes * 2)
+        for bitmap in self._bitmaps.values():
+            bitmap.extend(bytes(size - len(bitmap)))
+        self._bitmap_bytes = size
+
+    def search(
+        self,
+        question: str,
+        k: int,
+        table_exists: Callable[[str], bool] | None = None,
+    ) -> list[Example]:
+        """Up to k examples sharing terms with the question, best first"""
+        count = len(self.examples)
+        terms = sorted(
+            (term for term in question_terms(question) if term in self._postings),
+            key=lambda term: len(self._postings[term]),
+        )
+        if not terms or k <= 0:
+            return []
+
+        scored, frequent, total = [], [], 0
+        for term in terms:
+            size = len(self._postings[term])
+            if scored and total + size > _CANDIDATE_BUDGET:
+                frequent.append(term)
+            else:
+                scored.append(term)
+                total += size
+
+        postings = [self._postings[term] for term in scored]
+        sizes = [len(posting) for posting in postings]
+        ids = np.concatenate([np.frombuffer(p, dtype=np.int32) for p in postings])
+        weights = np.repeat([math.log(1 + count / n) for n in sizes], sizes)
+        candidates, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights)
+        if frequent:
+            byte, bit = candidates >> 3, (candidates & 7).astype(np.uint8)
+        for term in frequent:
+            posting = self._postings[term]
+            bitmap = self._bitmaps.get(term)
+            if bitmap is not None:
+                hits = (np.frombuffer(bitmap, dtype=np.uint8)[byte] >> bit) & 1
+            else:
+                view = np.frombuffer(posting, dtype=np.int32)
+                positions = np.searchsorted(view, candidates)
+                hits = view[np.minimum(positions, len(view) - 1)] == candidates
+            scores += hits * math.log(1 + count / len(posting))
+        scores *= np.frombuffer(self._norms, dtype=np.float32)[candidates]
+
+        wanted = min(k * _OVERFETCH if table_exists else k, len(scores))
+        top = np.argpartition(scores, -wanted)[-wanted:]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for example_id in candidates[top]:
+            example = self.examples[example_id]
+            if table_exists is None or all(map(table_exists, example.tables)):
+                results.append(example)
+                if len(results) == k:
+                    break
+        return results
+
+
+class ExampleStore:
+    """Few-shot examples per database, optionally persisted in SQLite
+
+    Examples are added once SQL generated for a question has passed
+    validation. Each database target has its own index; when a store
+    reaches max_examples, the oldest examples of that database are dropped.
+    """
+
+    def __init__(self, max_examples: int = 100_000, sqlite_path: str | None = None):
+        self.max_examples = max_examples
+        self._indexes: dict[str, ExampleIndex] = {}
+        # Scopes whose index is being rebuilt off the event loop
+        self._compacting: set[str] = set()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        if sqlite_path:
+            self._open(sqlite_path)
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def _open(self, sqlite_path: str) -> None:
+        Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS examples ("
+            "scope TEXT NOT NULL, question_key TEXT NOT NULL, question TEXT NOT NULL, "
+            "sql TEXT NOT NULL, tables TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (scope, question_key))"
+        )
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT scope, question, sql, tables FROM examples ORDER BY created_at"
+        ).fetchall()
+        for scope, question, sql, tables in rows:
+            # Table names are stored so loading does not parse every query
+            self._index(scope).add(question, sql, frozenset(json.loads(tables)))
+        for scope, index in list(self._indexes.items()):
+            if len(index) > self.max_examples:
+                self._indexes[scope] = self._rebuild(index.examples)
+                self._db_prune(scope, len(self._indexes[scope]))
+        logger.info("Loaded {} few-shot examples from {}", len(rows), sqlite_path)
+
+    def _index(self, scope: str) -> ExampleIndex:
+        index = self._indexes.get(scope)
+        if index is None:
+            index = self._indexes[scope] = ExampleIndex()
+        return index
+
+    @staticmethod
+    def _tables(sql: str) -> frozenset[str]:
+        try:
+            return frozenset(ref.name for ref in analyze_sql(sql).base_tables())
+        except Exception:
+            return frozenset()
+
+    async def add(self, question: str, sql: str, scope: str = "") -> None:
+        """Record SQL that passed validation for a question"""
+        tables = self._tables(sql)
+        index = self._index(scope)
+        index.add(question, sql, tables)
+        compacted = len(index) > self.max_examples and scope not in self._compacting
+        if compacted:
+            await self._compact(scope)
+        if self._db is not None:
+            await asyncio.to_thread(self._db_put, scope, question, sql, tables)
+            if compacted:
+                await asyncio.to_thread(
+                    self._db_prune, scope, len(self._indexes[scope])
+                )
+
+    def search(
+        self,
+        question: str,
+        k: int,
+        scope: str = "",
+        table_exists: Callable[[str], bool] | None = None,
+    ) -> list[Example]:
+        """Most similar verified examples whose tables all pass table_exists"""
+        index = self._indexes.get(scope)
+        examples = index.search(question, k, table_exists) if index else []
+        example_lookups.inc(result="hit" if examples else "miss")
+        return examples
+
+    def _rebuild(self, examples: list[Example]) -> ExampleIndex:
+        """A new index of the newest examples, leaving room to grow"""
+        index = ExampleIndex()
+        for example in examples[len(examples) - int(self.max_examples * 0.9) :]:
+            index.add(example.question, example.sql, example.tables)
+        return index
+
+    async def _compact(self, scope: str) -> None:
+        """Rebuild an index in a worker thread, then swap it in
+
+        The old index keeps serving searches and taking new examples in the
+        meantime; those added or replaced during the rebuild are replayed
+        into the new index before the swap.
+        """
+        self._compacting.add(scope)
+        try:
+            old = self._indexes[scope]
+            snapshot = list(old.examples)
+            index = await asyncio.to_thread(self._rebuild, snapshot)
+            changed = [
+                example
+                for example, before in zip(old.examples, snapshot, strict=False)
+                if example is not before
+            ]
+            for example in changed + old.examples[len(snapshot) :]:
+                index.add(example.question, example.sql, example.tables)
+            self._indexes[scope] = index
+        finally:
+            self._compacting.discard(scope)
+        logger.info("Compacted few-shot examples for {} to {}", scope, len(index))
+
+    def _db_put(
+        self, scope: str, question: str, sql: str, tables: frozenset[str]
+    ) -> None:
+        row = (
+            scope,
+            normalize_question(question)[0],
+            question,
+            sql,
+            json.dumps(sorted(tables)),
+            time.time(),
+        )
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO examples VALUES (?, ?, ?, ?, ?, ?)", row
+            )
+            self._db.commit()
+
+    def _db_prune(self, scope: str, keep: int) -> None:
+        """Delete all but the newest `keep` examples of a database"""
+        with self._db_lock:
+            self._db.execute(
+                "DELETE FROM examples WHERE scope = ? AND rowid NOT IN ("
+                "SELECT rowid FROM examples WHERE scope = ? "
+                "ORDER BY created_at DESC LIMIT ?)",
+                (scope, scope, keep),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,195 @@
+"""Cache of generated SQL keyed on normalized question text and schema version."""
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+cache_lookups = metrics.counter(
+    "generation_cache_lookups_total", "Generation cache lookups by result (hit/miss)"
+)
+
+_NUMBER_PATTERN = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+# Comparisons change a question's meaning, so they stay as tokens
+_OPERATOR_PATTERN = re.compile(r"<=|>=|<>|!=|[<>=!]")
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s#<>=!]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_PLACEHOLDER = "{{#%d}}"
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{#(\d+)\}\}")
+
+
+def normalize_question(question: str) -> tuple[str, list[str]]:
+    """Normalize case, punctuation and whitespace; lift numbers into placeholders
+
+    Returns the normalized text and the numeric literals in order, so
+    "Top 10 customers?" and "top 25 customers" share the key "top # customers".
+    Comparison operators are kept, so "total > 100" and "total < 100" differ.
+    """
+    literals = _NUMBER_PATTERN.findall(question)
+    text = _NUMBER_PATTERN.sub(" # ", question.lower())
+    text = _OPERATOR_PATTERN.sub(lambda match: f" {match.group()} ", text)
+    text = _PUNCTUATION_PATTERN.sub(" ", text)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip(), literals
+
+
+def _literal_pattern(literal: str) -> re.Pattern:
+    return re.compile(rf"(?<![\w.]){re.escape(literal)}(?![\w.])")
+
+
+def to_template(sql: str, literals: list[str]) -> str | None:
+    """Replace the question's literals in the SQL with positional placeholders
+
+    Returns None unless every literal maps to exactly one place in the SQL: a
+    literal repeated in the question, missing from the SQL (e.g. "top 5" with
+    a hard-coded LIMIT 10) or appearing more than once is not cached rather
+    than risk replaying a value the next question did not ask for.
+    """
+    if len(set(literals)) != len(literals):
+        return None
+    template = sql
+    for index, literal in enumerate(literals):
+        pattern = _literal_pattern(literal)
+        if len(pattern.findall(sql)) != 1:
+            return None
+        template = pattern.sub(_PLACEHOLDER % index, template)
+    return template
+
+
+def from_template(template: str, literals: list[str]) -> str | None:
+    """Fill placeholders with the current question's literals"""
+    try:
+        return _PLACEHOLDER_PATTERN.sub(
+            lambda match: literals[int(match.group(1))], template
+        )
+    except IndexError:
+        return None
+
+
+class GenerationCache:
+    """Two-tier (LRU memory, optional SQLite) cache of generated SQL templates"""
+
+    def __init__(self, max_entries: int = 1024, sqlite_path: str | None = None):
+        self.max_entries = max_entries
+        # key -> (sql template, schema fingerprint)
+        self._memory: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if sqlite_path:
+            self._open(sqlite_path)
+
+    def _open(self, sqlite_path: str) -> None:
+        Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS generation_cache ("
+            "key TEXT PRIMARY KEY, template TEXT NOT NULL, "
+            "schema_fingerprint TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS generation_cache_fingerprint "
+            "ON generation_cache (schema_fingerprint)"
+        )
+        self._db.commit()
+        logger.info("Generation cache SQLite tier at {}", sqlite_path)
+
+    @staticmethod
+    def make_key(*parts: object) -> str:
+        """Hash the key parts: normalized question, schema fingerprint, database
+        type, model, prompt version and request context"""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str, literals: list[str]) -> str | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        elif self._db is not None:
+            entry = await asyncio.to_thread(self._db_get, key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        sql = from_template(entry[0], literals) if entry else None
+        if sql is None:
+            self.misses += 1
+            cache_lookups.inc(result="miss")
+        else:
+            self.hits += 1
+            cache_lookups.inc(result="hit")
+        return sql
+
+    async def put(
+        self, key: str, sql: str, literals: list[str], schema_fingerprint: str
+    ) -> None:
+        template = to_template(sql, literals)
+        if template is None:
+            logger.debug("Skipping generation cache: ambiguous numeric literals")
+            return
+        self._remember(key, (template, schema_fingerprint))
+        if self._db is not None:
+            await asyncio.to_thread(self._db_put, key, template, schema_fingerprint)
+
+    def _remember(self, key: str, entry: tuple[str, str]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key: str) -> tuple[str, str] | None:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT template, schema_fingerprint FROM generation_cache "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _db_put(self, key: str, template: str, schema_fingerprint: str) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO generation_cache VALUES (?, ?, ?, ?)",
+                (key, template, schema_fingerprint, time.time()),
+            )
+            self._db.commit()
+
+    def invalidate(self, schema_fingerprint: str | None = None) -> None:
+        """Drop entries generated against a schema version (all if omitted)"""
+        if schema_fingerprint is None:
+            self._memory.clear()
+        else:
+            for key in [
+                k for k, (_, fp) in self._memory.items() if fp == schema_fingerprint
+            ]:
+                del self._memory[key]
+
+        if self._db is not None:
+            with self._db_lock:
+                if schema_fingerprint is None:
+                    self._db.execute("DELETE FROM generation_cache")
+                else:
+                    self._db.execute(
+                        "DELETE FROM generation_cache WHERE schema_fingerprint = ?",
+                        (schema_fingerprint,),
+                    )
+                self._db.commit()
+        logger.info("Generation cache invalidated: {}", schema_fingerprint or "all")
+
+    def on_schema_change(self, key: str, old_fingerprint: str, new_fingerprint: str):
+        """MetadataCache listener: forget SQL generated for the old schema"""
+        self.invalidate(old_fingerprint)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,34 +1,396 @@
+import time
+from collections.abc import AsyncIterator
+
 from src.core.base import BaseResponse
+from src.core.db import DatabaseType
 from src.core.llm_provider import LLMProvider
 from src.core.prompts import PromptManager
+from src.sql.example_store import ExampleStore
+from src.sql.generation_cache import GenerationCache, normalize_question
+from src.sql.schema_index import get_schema_index
+from src.sql.schema_retriever import SchemaRetriever
+from src.sql.validator import SQLValidator
+from src.utils.config import (
+    EXAMPLE_TOP_K,
+    GENERATION_MAX_ATTEMPTS,
+    GENERATION_TIMEOUT,
+    SCHEMA_PRUNING_ENABLED,
+    SCHEMA_TOKEN_BUDGET,
+    SCHEMA_TOP_K,
+)
+from src.utils.deadline import UNLIMITED, Deadline
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+from src.utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+time_to_first_token = metrics.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from request to the first streamed SQL token, by provider",
+)
+generation_seconds = metrics.histogram(
+    "llm_stream_duration_seconds", "Time to stream a complete SQL query, by provider"
+)
+stage_seconds = metrics.histogram(
+    "sql_generation_stage_seconds",
+    "Time per stage of answering a question (generate, validate, repair)",
+)
+answer_seconds = metrics.histogram(
+    "sql_generation_seconds",
+    "Time to valid SQL or to giving up, by outcome (valid, invalid, timeout, error)",
+)
+answer_attempts = metrics.histogram(
+    "sql_generation_attempts",
+    "LLM answers per question (1 = no repair), by outcome",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10),
+)
 
 
 class SQLGenerator:
-    def __init__(self, llm_provider: LLMProvider):
+    def __init__(  # noqa: PLR0913
+        self,
+        llm_provider: LLMProvider,
+        cache: GenerationCache | None = None,
+        examples: ExampleStore | None = None,
+        validator: SQLValidator | None = None,
+        *,
+        max_attempts: int = GENERATION_MAX_ATTEMPTS,
+        timeout: float = GENERATION_TIMEOUT,
+    ):
         self.llm_provider = llm_provider
         self.prompt_manager = PromptManager()
+        self.cache = cache
+        self.examples = examples
+        self.validator = validator or SQLValidator()
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        # Identical questions arriving together share one LLM call
+        self._in_flight = SingleFlight("llm_generation")
+        self._retriever: SchemaRetriever | None = None
+        self._retriever_source: dict | None = None
+
+    def _prune_metadata(self, query: str, metadata: dict) -> dict:
+        """Keep only the tables relevant to the query, within the token budget"""
+        if not SCHEMA_PRUNING_ENABLED:
+            return metadata
+
+        # The index is rebuilt only when a new metadata snapshot comes in
+        if self._retriever is None or self._retriever_source is not metadata:
+            self._retriever = SchemaRetriever(
+                metadata, top_k=SCHEMA_TOP_K, token_budget=SCHEMA_TOKEN_BUDGET
+            )
+            self._retriever_source = metadata
+
+        return self._retriever.retrieve(query)
+
+    def _examples_for(
+        self,
+        query: str,
+        metadata: dict,
+        database: str,
+        schema_fingerprint: str | None,
+    ) -> list[tuple[str, str]]:
+        """Verified examples of similar questions on tables that still exist"""
+        if self.examples is None or EXAMPLE_TOP_K <= 0:
+            return []
+        index = get_schema_index(metadata, schema_fingerprint)
+        found = self.examples.search(
+            query,
+            EXAMPLE_TOP_K,
+            scope=database,
+            table_exists=lambda name: index.resolve_table(name) is not None,
+        )
+        return [(example.question, example.sql) for example in found]
+
+    def _cache_key(
+        self,
+        normalized_query: str,
+        context: dict | None,
+        schema_fingerprint: str,
+        database_type: str,
+    ) -> str:
+        config = getattr(self.llm_provider, "config", None)
+        return GenerationCache.make_key(
+            normalized_query,
+            schema_fingerprint,
+            database_type,
+            getattr(config, "model", type(self.llm_provider).__name__),
+            self.prompt_manager.version,
+            context or {},
+        )
+
+    async def cached_sql(
+        self,
+        query: str,
+        context: dict | None = None,
+        *,
+        schema_fingerprint: str | None = None,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        database: str = "",
+    ) -> str | None:
+        """SQL previously generated for the same normalized question, if any
 
-    async def generate_sql(
-        self, query: str, metadata: dict, context: dict | None = None
+        Entries are keyed by schema fingerprint rather than database name, so
+        databases with identical schemas share them.
+        """
+        if self.cache is None or not schema_fingerprint:
+            return None
+        normalized_query, literals = normalize_question(query)
+        cache_key = self._cache_key(
+            normalized_query, context, schema_fingerprint, database_type
+        )
+        return await self.cache.get(cache_key, literals)
+
+    async def generate_sql(  # noqa: PLR0913
+        self,
+        query: str,
+        metadata: dict,
+        context: dict | None = None,
+        *,
+        schema_fingerprint: str | None = None,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        database: str = "",
     ) -> BaseResponse:
-        """Generate SQL from natural language query"""
+        """Generate SQL from natural language query
+
+        When a schema fingerprint is given, a cached result for the same
+        normalized question is returned without calling the LLM. Otherwise
+        verified examples from the same database are added to the prompt.
+        The LLM call is shared with identical concurrent questions, so it is
+        bounded by the provider timeout rather than a caller's deadline;
+        callers bound their own wait (see generate_valid_sql).
+        """
         try:
-            # Prepare variables for the prompt template
-            variables = {
-                "query": query,
-                "metadata": metadata,
-                "context": context or {},
-            }
+            sql = await self.cached_sql(
+                query,
+                context,
+                schema_fingerprint=schema_fingerprint,
+                database_type=database_type,
+            )
+            if sql is not None:
+                return BaseResponse(success=True, data={"sql": sql, "cached": True})
 
             # Generate SQL using LLM
-            response = await self.llm_provider.generate_sql(
-                prompt=query, metadata=metadata
+            flight_key = GenerationCache.make_key(
+                query,
+                context or {},
+                schema_fingerprint or id(metadata),
+                database_type,
+                database,
+            )
+            response = await self._in_flight.do(
+                flight_key,
+                lambda: self.llm_provider.generate_sql(
+                    prompt=query,
+                    metadata=self._prune_metadata(query, metadata),
+                    examples=self._examples_for(
+                        query, metadata, database, schema_fingerprint
+                    ),
+                    database_type=database_type,
+                ),
             )
 
             if not response.success:
                 return response
 
-            return BaseResponse(success=True, data={"sql": response.data["sql"]})
+            return BaseResponse(
+                success=True, data={"sql": response.data["sql"], "cached": False}
+            )
+
+        except Exception as e:
+            return BaseResponse(success=False, error=str(e))
+
+    async def generate_sql_stream(  # noqa: PLR0913
+        self,
+        query: str,
+        metadata: dict,
+        *,
+        schema_fingerprint: str | None = None,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        database: str = "",
+        deadline: Deadline = UNLIMITED,
+    ) -> AsyncIterator[str]:
+        """Stream SQL deltas from the LLM provider
+
+        Streams are not coalesced or cached here; callers check cached_sql
+        first and remember the joined SQL once it has been validated. The
+        deadline bounds the time to the first delta.
+        """
+        provider = type(self.llm_provider).__name__
+        start = time.perf_counter()
+        first_token = True
+        async for delta in self.llm_provider.generate_sql_stream(
+            prompt=query,
+            metadata=self._prune_metadata(query, metadata),
+            examples=self._examples_for(query, metadata, database, schema_fingerprint),
+            database_type=database_type,
+            deadline=deadline,
+        ):
+            if first_token:
+                time_to_first_token.observe(
+                    time.perf_counter() - start, provider=provider
+                )
+                first_token = False
+            yield delta
+        generation_seconds.observe(time.perf_counter() - start, provider=provider)
+
+    async def remember(  # noqa: PLR0913
+        self,
+        query: str,
+        sql: str,
+        context: dict | None = None,
+        *,
+        schema_fingerprint: str | None = None,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        database: str = "",
+    ) -> None:
+        """Store SQL that passed validation in the cache and as a few-shot example"""
+        if self.examples is not None:
+            await self.examples.add(query, sql, scope=database)
+        if self.cache is None or not schema_fingerprint:
+            return
+        normalized_query, literals = normalize_question(query)
+        cache_key = self._cache_key(
+            normalized_query, context, schema_fingerprint, database_type
+        )
+        await self.cache.put(cache_key, sql, literals, schema_fingerprint)
 
+    def deadline(self, request_deadline: Deadline = UNLIMITED) -> Deadline:
+        """Deadline for a question started now
+
+        Timeout seconds from now, or the request's deadline if that is earlier.
+        """
+        return request_deadline.within(self.timeout)
+
+    async def generate_valid_sql(  # noqa: PLR0913
+        self,
+        query: str,
+        metadata: dict,
+        context: dict | None = None,
+        *,
+        draft: str | None = None,
+        cached: bool = False,
+        deadline: Deadline = UNLIMITED,
+        schema_fingerprint: str | None = None,
+        database_type: str = DatabaseType.POSTGRESQL.value,
+        database: str = "",
+    ) -> BaseResponse:
+        """Generate SQL, then validate it and have the LLM repair it until it passes
+
+        A draft (SQL already streamed to the client) replaces the first
+        generation. Gives up after max_attempts LLM answers or at the
+        deadline (see deadline()); the LLM call in flight is then cancelled.
+        Valid SQL is remembered; data holds sql, cached, warnings and attempts.
+        """
+        start = time.perf_counter()
+        deadline = self.deadline(deadline)
+        options = {
+            "schema_fingerprint": schema_fingerprint,
+            "database_type": database_type,
+            "database": database,
+        }
+        sql, attempts, outcome = draft, 0 if draft is None else 1, "error"
+        feedback: list[tuple[str, str]] = []
+        try:
+            async with deadline.timeout():
+                while True:
+                    if sql is None:
+                        stage_start = time.perf_counter()
+                        response = await self.generate_sql(
+                            query, metadata, context, **options
+                        )
+                        attempts += 1
+                        _observe_stage("generate", stage_start)
+                        if not response.success:
+                            return _with_attempts(response, attempts)
+                        sql, cached = response.data["sql"], response.data["cached"]
+
+                    stage_start = time.perf_counter()
+                    validation = await self.validator.validate_sql(
+                        sql, metadata, schema_fingerprint
+                    )
+                    _observe_stage("validate", stage_start)
+                    if validation.success:
+                        outcome = "valid"
+                        if not cached:
+                            await self.remember(query, sql, context, **options)
+                        return BaseResponse(
+                            success=True,
+                            data={
+                                "sql": sql,
+                                "cached": cached,
+                                "warnings": validation.data.get("warnings", []),
+                                "attempts": attempts,
+                            },
+                        )
+                    if attempts >= self.max_attempts:
+                        outcome = "invalid"
+                        return _with_attempts(validation, attempts)
+
+                    feedback.append((sql, validation.error))
+                    logger.info(
+                        "Repairing SQL (attempt {}): {}", attempts + 1, validation.error
+                    )
+                    stage_start = time.perf_counter()
+                    response = await self._repair(
+                        query, metadata, feedback, options, deadline
+                    )
+                    attempts += 1
+                    _observe_stage("repair", stage_start)
+                    if not response.success:
+                        return _with_attempts(response, attempts)
+                    sql, cached = response.data["sql"], False
+
+        except TimeoutError:
+            outcome = "timeout"
+            return BaseResponse(
+                success=False,
+                error=f"No valid SQL before the deadline after {attempts} answers",
+                data={"attempts": attempts},
+            )
+        except Exception as e:
+            return BaseResponse(
+                success=False, error=str(e), data={"attempts": attempts}
+            )
+        finally:
+            answer_attempts.observe(attempts, outcome=outcome)
+            answer_seconds.observe(time.perf_counter() - start, outcome=outcome)
+
+    async def _repair(
+        self,
+        query: str,
+        metadata: dict,
+        feedback: list[tuple[str, str]],
+        options: dict,
+        deadline: Deadline,
+    ) -> BaseResponse:
+        """Ask for corrected SQL, replaying the failed attempts
+
+        The prompt starts with the same system prefix, schema subset and
+        examples as the first attempt, so providers serve it from their
+        prompt cache and only the repair turns are new.
+        """
+        try:
+            return await self.llm_provider.generate_sql(
+                prompt=query,
+                metadata=self._prune_metadata(query, metadata),
+                examples=self._examples_for(
+                    query, metadata, options["database"], options["schema_fingerprint"]
+                ),
+                feedback=feedback,
+                database_type=options["database_type"],
+                deadline=deadline,
+            )
         except Exception as e:
-            return BaseResponse(success=False, error=str(e))
\ No newline at end of file
+            return BaseResponse(success=False, error=str(e))
+
+
+def _observe_stage(stage: str, start: float) -> None:
+    stage_seconds.observe(time.perf_counter() - start, stage=stage)
+
+
+def _with_attempts(response: BaseResponse, attempts: int) -> BaseResponse:
+    return BaseResponse(
+        success=False, error=response.error, data={"attempts": attempts}
+    )
@@ -0,0 +1,103 @@
+"""Immutable lookups over a metadata snapshot, built once per schema version."""
+
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from src.db.metadata_cache import schema_fingerprint
+
+# Column endpoint of a foreign key: (table, column)
+Endpoint = tuple[str, str]
+
+
+class SchemaIndex:
+    """Table/column hash sets, case-folded lookups and the FK graph
+
+    Built from the dict MetadataManager produces; never mutated afterwards,
+    so one instance can be shared by concurrent requests.
+    """
+
+    def __init__(self, metadata: dict, fingerprint: str | None = None):
+        self.fingerprint = fingerprint or schema_fingerprint(metadata)
+
+        tables = {}
+        folded_tables = {}
+        folded_columns = {}
+        for table, info in metadata.items():
+            names = frozenset((info.get("columns") or {}).keys())
+            tables[table] = names
+            folded_tables.setdefault(table.casefold(), table)
+            folded_columns[table] = MappingProxyType(
+                {name.casefold(): name for name in names}
+            )
+
+        self.columns: MappingProxyType[str, frozenset[str]] = MappingProxyType(tables)
+        self._folded_tables = MappingProxyType(folded_tables)
+        self._folded_columns = MappingProxyType(folded_columns)
+
+        # Undirected FK adjacency between column endpoints, and between tables
+        edges: dict[Endpoint, set[Endpoint]] = {}
+        neighbours: dict[str, set[str]] = {}
+        for table, info in metadata.items():
+            for fk in info.get("foreign_keys") or []:
+                target = fk.get("references") or {}
+                referred_table = self.resolve_table(target.get("table", ""))
+                if referred_table is None:
+                    continue
+                source = (table, fk.get("column", ""))
+                referred = (referred_table, target.get("column", ""))
+                edges.setdefault(source, set()).add(referred)
+                edges.setdefault(referred, set()).add(source)
+                neighbours.setdefault(table, set()).add(referred_table)
+                neighbours.setdefault(referred_table, set()).add(table)
+
+        self._fk_edges = MappingProxyType(
+            {endpoint: frozenset(linked) for endpoint, linked in edges.items()}
+        )
+        self.fk_neighbours: MappingProxyType[str, frozenset[str]] = MappingProxyType(
+            {table: frozenset(linked) for table, linked in neighbours.items()}
+        )
+
+    def resolve_table(self, name: str) -> str | None:
+        """Metadata key for a table name (exact match first, then case-folded)"""
+        if name in self.columns:
+            return name
+        return self._folded_tables.get(name.casefold())
+
+    def resolve_column(self, table: str, column: str) -> str | None:
+        """Column name as stored in metadata, or None if the table lacks it"""
+        names = self.columns.get(table)
+        if names is None:
+            return None
+        if column in names:
+            return column
+        return self._folded_columns[table].get(column.casefold())
+
+    def has_foreign_keys(self, table: str) -> bool:
+        return table in self.fk_neighbours
+
+    def related(self, left: Endpoint, right: Endpoint) -> bool:
+        """Whether two columns are linked by a foreign key (either direction)"""
+        return right in self._fk_edges.get(left, ())
+
+
+_lock = threading.Lock()
+_indexes: OrderedDict[str, SchemaIndex] = OrderedDict()
+_MAX_INDEXES = 8
+
+
+def get_schema_index(metadata: dict, fingerprint: str | None = None) -> SchemaIndex:
+    """Shared index for a schema version, built on first use"""
+    fingerprint = fingerprint or schema_fingerprint(metadata)
+    with _lock:
+        index = _indexes.get(fingerprint)
+        if index is not None:
+            _indexes.move_to_end(fingerprint)
+            return index
+
+    index = SchemaIndex(metadata, fingerprint)
+    with _lock:
+        _indexes[fingerprint] = index
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
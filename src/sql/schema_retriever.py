@@ -0,0 +1,193 @@
+"""Lexical schema retrieval used to prune metadata before prompt rendering."""
+
+import math
+import re
+from collections import Counter, defaultdict
+
+from src.core.prompts import estimate_tokens
+from src.core.schema_compiler import compile_table, is_table
+
+_WORD_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+_STOP_WORDS = frozenset(
+    {
+        "a",
+        "all",
+        "an",
+        "and",
+        "are",
+        "by",
+        "each",
+        "for",
+        "from",
+        "get",
+        "how",
+        "in",
+        "is",
+        "list",
+        "many",
+        "me",
+        "of",
+        "on",
+        "or",
+        "show",
+        "the",
+        "to",
+        "what",
+        "which",
+        "who",
+        "with",
+    }
+)
+
+# Field weights are applied by repeating tokens in the table "document"
+_TABLE_NAME_WEIGHT = 3
+_COLUMN_NAME_WEIGHT = 1
+_COMMENT_WEIGHT = 1
+_NEIGHBOUR_WEIGHT = 1
+
+# Words this short are left alone by the plural stemmer ("bus", "gas")
+_MIN_STEM_LENGTH = 3
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+
+def _stem(word: str) -> str:
+    """Strip common plural suffixes so 'orders' matches 'order'"""
+    if len(word) <= _MIN_STEM_LENGTH:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Split identifiers and free text into normalized lexical tokens"""
+    tokens = []
+    for word in _WORD_PATTERN.findall(text or ""):
+        lowered = word.lower()
+        if lowered not in _STOP_WORDS:
+            tokens.append(_stem(lowered))
+    return tokens
+
+
+class SchemaRetriever:
+    """BM25 index over table names, column names, comments and FK neighbours.
+
+    The index is built once per metadata snapshot; ``retrieve`` then returns
+    the top-k tables for a question plus the tables they reference through
+    foreign keys, trimmed to a token budget.
+    """
+
+    def __init__(self, metadata: dict, top_k: int = 8, token_budget: int = 6000):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self._tables = {name: info for name, info in metadata.items() if is_table(info)}
+        # Non-table entries (e.g. "database_type") are always carried over
+        self._extras = {
+            name: value for name, value in metadata.items() if name not in self._tables
+        }
+        self._references = self._build_references()
+        # Priced as they appear in the prompt
+        self._table_tokens = {
+            name: estimate_tokens(compile_table(name, info))
+            for name, info in self._tables.items()
+        }
+        self.total_tokens = sum(self._table_tokens.values())
+        self._build_index()
+
+    def _build_references(self) -> dict[str, list[str]]:
+        """Map each table to the tables its foreign keys point at"""
+        references: dict[str, list[str]] = {}
+        for name, info in self._tables.items():
+            targets = []
+            for fk in info.get("foreign_keys", []):
+                target = fk["references"]["table"]
+                if target in self._tables and target != name and target not in targets:
+                    targets.append(target)
+            references[name] = targets
+        return references
+
+    def _build_index(self) -> None:
+        neighbours: dict[str, set[str]] = defaultdict(set)
+        for name, targets in self._references.items():
+            for target in targets:
+                neighbours[name].add(target)
+                neighbours[target].add(name)
+
+        self._postings: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        self._doc_lengths: dict[str, int] = {}
+        for name, info in self._tables.items():
+            terms = tokenize(name) * _TABLE_NAME_WEIGHT
+            for column_name, column in info["columns"].items():
+                terms += tokenize(column_name) * _COLUMN_NAME_WEIGHT
+                terms += tokenize(column.get("comment", "")) * _COMMENT_WEIGHT
+            terms += tokenize(info.get("comment", "")) * _COMMENT_WEIGHT
+            for neighbour in sorted(neighbours[name]):
+                terms += tokenize(neighbour) * _NEIGHBOUR_WEIGHT
+
+            self._doc_lengths[name] = len(terms)
+            for term, frequency in Counter(terms).items():
+                self._postings[term].append((name, frequency))
+
+        self._avg_doc_length = (
+            sum(self._doc_lengths.values()) / len(self._doc_lengths)
+            if self._doc_lengths
+            else 0.0
+        )
+        doc_count = len(self._tables)
+        self._idf = {
+            term: math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self._postings.items()
+        }
+
+    def score(self, question: str) -> list[tuple[str, float]]:
+        """Rank tables by BM25 relevance to the question"""
+        scores: dict[str, float] = defaultdict(float)
+        for term in set(tokenize(question)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for name, frequency in self._postings[term]:
+                norm = 1 - _B + _B * self._doc_lengths[name] / self._avg_doc_length
+                scores[name] += idf * frequency * (_K1 + 1) / (frequency + _K1 * norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _closure(self, seeds: list[str]) -> list[str]:
+        """Seeds in rank order, each followed by its transitive FK references"""
+        ordered: list[str] = []
+        seen: set[str] = set()
+        for seed in seeds:
+            stack = [seed]
+            while stack:
+                name = stack.pop()
+                if name in seen:
+                    continue
+                seen.add(name)
+                ordered.append(name)
+                stack.extend(reversed(self._references[name]))
+        return ordered
+
+    def retrieve(self, question: str) -> dict:
+        """Return the metadata subset relevant to the question"""
+        if self.total_tokens <= self.token_budget:
+            return {**self._extras, **self._tables}
+
+        seeds = [name for name, _ in self.score(question)[: self.top_k]]
+        if not seeds:
+            # Nothing matched lexically: fall back to declaration order
+            seeds = list(self._tables)
+
+        selected = {}
+        used = 0
+        for name in self._closure(seeds):
+            cost = self._table_tokens[name]
+            if selected and used + cost > self.token_budget:
+                continue
+            selected[name] = self._tables[name]
+            used += cost
+        return {**self._extras, **selected}
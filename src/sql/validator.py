@@ -1,14 +1,29 @@
-import sqlparse
+import hashlib
+from collections import OrderedDict
 
 from src.core.base import BaseResponse
+from src.db.metadata_cache import schema_fingerprint as compute_fingerprint
+from src.sql.analyzer import SQLAnalysis, analyze_sql
+from src.sql.schema_index import SchemaIndex, get_schema_index
+from src.utils.config import VALIDATION_CACHE_SIZE, VALIDATION_STRICT_JOINS
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics
 
 # Get a named logger instance for this module
 logger = get_logger("sql_validator")
 
+validation_cache_lookups = metrics.counter(
+    "sql_validation_cache_lookups_total",
+    "SQL validation verdict cache lookups by result (hit/miss)",
+)
+
 
 class SQLValidator:
-    def __init__(self):
+    def __init__(
+        self,
+        cache_size: int = VALIDATION_CACHE_SIZE,
+        strict_joins: bool = VALIDATION_STRICT_JOINS,
+    ):
         self.dangerous_keywords = {
             "DROP",
             "DELETE",
@@ -21,70 +36,178 @@ class SQLValidator:
             "COMMIT",
             "ROLLBACK",
         }
-
-    async def validate_sql(self, sql: str, metadata: dict) -> BaseResponse:
-        """Validate generated SQL query"""
+        self.cache_size = cache_size
+        self.strict_joins = strict_joins
+        # (sql hash, schema fingerprint) -> (error or None if valid, warnings)
+        self._verdicts: OrderedDict[
+            tuple[str, str], tuple[str | None, tuple[str, ...]]
+        ] = OrderedDict()
+        # Fingerprint of the last metadata dict seen
+        self._schema_source: dict | None = None
+        self._schema_fingerprint = ""
+
+    async def validate_sql(
+        self, sql: str, metadata: dict, schema_fingerprint: str | None = None
+    ) -> BaseResponse:
+        """Validate generated SQL query
+
+        Verdicts are cached per (SQL, schema version). Pass the schema
+        fingerprint when it is known; otherwise it is derived from metadata.
+        """
         try:
-            logger.debug(f"Validating SQL query: {sql}")
-
-            # Basic SQL parsing
-            parsed = sqlparse.parse(sql)
-            if not parsed:
-                logger.warning("Empty or invalid SQL received")
-                return BaseResponse(success=False, error="Empty or invalid SQL")
-
-            # Check for dangerous operations
-            if self._contains_dangerous_operations(parsed[0]):
-                logger.warning("SQL contains dangerous operations")
-                return BaseResponse(
-                    success=False, error="SQL contains potentially dangerous operations"
-                )
-
-            # Validate against metadata
-            tables_valid, error = self._validate_tables(parsed[0], metadata)
-            if not tables_valid:
-                logger.warning(f"Table validation failed: {error}")
+            logger.debug("Validating SQL query: {}", sql)
+
+            fingerprint = schema_fingerprint or self._fingerprint(metadata)
+            key = (hashlib.sha256(sql.encode()).hexdigest(), fingerprint)
+            if key in self._verdicts:
+                self._verdicts.move_to_end(key)
+                validation_cache_lookups.inc(result="hit")
+                error, warnings = self._verdicts[key]
+            else:
+                validation_cache_lookups.inc(result="miss")
+                index = get_schema_index(metadata, fingerprint)
+                error, warnings = self._check(analyze_sql(sql), index)
+                self._remember(key, (error, warnings))
+
+            if error:
+                logger.warning(f"SQL validation failed: {error}")
                 return BaseResponse(success=False, error=error)
 
-            logger.info("SQL validation successful")
-            return BaseResponse(success=True, data={"sql": sql})
+            for warning in warnings:
+                logger.warning(f"SQL validation warning: {warning}")
+            logger.debug("SQL validation successful")
+            return BaseResponse(
+                success=True, data={"sql": sql, "warnings": list(warnings)}
+            )
 
         except Exception as e:
             logger.error(f"SQL validation error: {e}")
             return BaseResponse(success=False, error=str(e))
 
-    def _contains_dangerous_operations(
-        self, parsed_sql: sqlparse.sql.Statement
-    ) -> bool:
-        """Check for dangerous SQL operations"""
-        tokens = parsed_sql.flatten()
-        dangerous_ops = [
-            token.value.upper()
-            for token in tokens
-            if token.ttype in sqlparse.tokens.Keyword
-            and token.value.upper() in self.dangerous_keywords
-        ]
+    def _fingerprint(self, metadata: dict) -> str:
+        """Fingerprint computed once per metadata snapshot"""
+        if self._schema_source is not metadata:
+            self._schema_fingerprint = compute_fingerprint(metadata)
+            self._schema_source = metadata
+        return self._schema_fingerprint
+
+    def _remember(
+        self, key: tuple[str, str], verdict: tuple[str | None, tuple[str, ...]]
+    ) -> None:
+        self._verdicts[key] = verdict
+        while len(self._verdicts) > self.cache_size:
+            self._verdicts.popitem(last=False)
+
+    def _check(
+        self, analysis: SQLAnalysis, index: SchemaIndex
+    ) -> tuple[str | None, tuple[str, ...]]:
+        """First failed check (or None if the SQL is valid) and any warnings"""
+        if not analysis.statement_count:
+            return "Empty or invalid SQL", ()
+
+        if self._contains_dangerous_operations(analysis):
+            return "SQL contains potentially dangerous operations", ()
+
+        invalid_tables = self._invalid_tables(analysis, index)
+        if invalid_tables:
+            return f"Invalid table(s): {', '.join(invalid_tables)}", ()
 
-        if dangerous_ops:
-            logger.warning(f"Found dangerous operations: {', '.join(dangerous_ops)}")
+        qualifiers = self._qualifier_tables(analysis, index)
+        invalid_columns = self._invalid_columns(analysis, index, qualifiers)
+        if invalid_columns:
+            return f"Invalid column(s): {', '.join(invalid_columns)}", ()
 
-        return bool(dangerous_ops)
+        warnings = tuple(self._unrelated_joins(analysis, index, qualifiers))
+        if warnings and self.strict_joins:
+            return "; ".join(warnings), ()
 
-    def _validate_tables(
-        self, parsed_sql: sqlparse.sql.Statement, metadata: dict
-    ) -> tuple[bool, str]:
-        """Validate table names against metadata"""
-        tables = set(metadata.keys())
-        sql_tables = set()
+        return None, warnings
 
-        for token in parsed_sql.flatten():
-            if token.ttype is None and isinstance(token, sqlparse.sql.Identifier):
-                table_name = token.get_real_name()
-                if table_name:
-                    sql_tables.add(table_name)
-
-        invalid_tables = sql_tables - tables
-        if invalid_tables:
-            return False, f"Invalid table(s): {', '.join(invalid_tables)}"
+    def _contains_dangerous_operations(self, analysis: SQLAnalysis) -> bool:
+        """Check every statement for dangerous SQL operations"""
+        dangerous_ops = sorted(analysis.keywords & self.dangerous_keywords)
+        if dangerous_ops:
+            logger.warning(f"Found dangerous operations: {', '.join(dangerous_ops)}")
+        return bool(dangerous_ops)
 
-        return True, ""
+    def _invalid_tables(self, analysis: SQLAnalysis, index: SchemaIndex) -> list[str]:
+        """Referenced tables (excluding CTEs) that are missing from metadata"""
+        invalid = {
+            table.qualified_name
+            for table in analysis.base_tables()
+            # Catalog/schema qualifiers are not part of the metadata keys
+            if index.resolve_table(table.name) is None
+            and index.resolve_table(table.qualified_name) is None
+        }
+        return sorted(invalid)
+
+    def _qualifier_tables(
+        self, analysis: SQLAnalysis, index: SchemaIndex
+    ) -> dict[str, list[str]]:
+        """Metadata tables each alias or table-name qualifier may refer to
+
+        CTEs, subqueries and unrecognised qualifiers are absent, so their
+        columns are not checked.
+        """
+        by_alias: dict[str, list[str]] = {}
+        by_name: dict[str, list[str]] = {}
+        for table in analysis.base_tables():
+            resolved = index.resolve_table(table.name)
+            if resolved is None:
+                continue
+            by_name.setdefault(table.name, []).append(resolved)
+            if table.alias:
+                by_alias.setdefault(table.alias, []).append(resolved)
+
+        qualifiers = {**by_name, **by_alias}
+        for name in analysis.cte_names | analysis.derived_aliases:
+            qualifiers.pop(name, None)
+        return qualifiers
+
+    def _invalid_columns(
+        self,
+        analysis: SQLAnalysis,
+        index: SchemaIndex,
+        qualifiers: dict[str, list[str]],
+    ) -> list[str]:
+        """Qualified columns that none of their candidate tables define"""
+        invalid = set()
+        for column in analysis.column_refs:
+            tables = qualifiers.get(column.qualifier[-1], [])
+            if tables and not any(
+                index.resolve_column(table, column.column) for table in tables
+            ):
+                invalid.add(f"{'.'.join(column.qualifier)}.{column.column}")
+        return sorted(invalid)
+
+    def _unrelated_joins(
+        self,
+        analysis: SQLAnalysis,
+        index: SchemaIndex,
+        qualifiers: dict[str, list[str]],
+    ) -> list[str]:
+        """Equality joins between tables whose key columns share no foreign key
+
+        Only reported when one of the tables has FK metadata at all; schemas
+        without declared keys (common on warehouses) would flag every join.
+        """
+        warnings = []
+        for left, right in analysis.join_predicates:
+            left_tables = qualifiers.get(left.qualifier[-1], [])
+            right_tables = qualifiers.get(right.qualifier[-1], [])
+            if len(left_tables) != 1 or len(right_tables) != 1:
+                continue
+            left_table, right_table = left_tables[0], right_tables[0]
+            if left_table == right_table or not (
+                index.has_foreign_keys(left_table)
+                or index.has_foreign_keys(right_table)
+            ):
+                continue
+            left_key = (left_table, index.resolve_column(left_table, left.column))
+            right_key = (right_table, index.resolve_column(right_table, right.column))
+            if not index.related(left_key, right_key):
+                warnings.append(
+                    f"Join {left_table}.{left.column} = "
+                    f"{right_table}.{right.column} does not follow a foreign key"
+                )
+        return warnings
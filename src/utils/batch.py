@@ -0,0 +1,47 @@
+"""Bounded-concurrency fan-out that yields results as they complete."""
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def fan_out(
+    items: Sequence[T],
+    worker: Callable[[int, T], Awaitable[R]],
+    concurrency: int,
+) -> AsyncIterator[tuple[int, R]]:
+    """Run worker(index, item) with at most `concurrency` calls in flight
+
+    Yields (index, result) in completion order. If the consumer stops early
+    (e.g. the client disconnected), the outstanding work is cancelled. An
+    exception raised by a worker is re-raised to the consumer.
+    """
+    pending: asyncio.Queue[tuple[int, T]] = asyncio.Queue()
+    for pair in enumerate(items):
+        pending.put_nowait(pair)
+    done: asyncio.Queue[tuple[int, R | None, BaseException | None]] = asyncio.Queue()
+
+    async def run() -> None:
+        while not pending.empty():
+            index, item = pending.get_nowait()
+            try:
+                done.put_nowait((index, await worker(index, item), None))
+            except Exception as e:
+                done.put_nowait((index, None, e))
+
+    workers = [
+        asyncio.create_task(run()) for _ in range(max(1, min(concurrency, len(items))))
+    ]
+    try:
+        for _ in range(len(items)):
+            index, result, error = await done.get()
+            if error is not None:
+                raise error
+            yield index, result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -19,13 +19,142 @@ def get_env_variable(key: str, default: str | None = None) -> str:
     return value
 
 
+def get_bool_env_variable(key: str, default: bool) -> bool:
+    """
+    Get a boolean environment variable ("1", "true", "yes" and "on" are truthy)
+    """
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 # OpenAI Configuration
 OPENAI_API_KEY = get_env_variable("OPENAI_API_KEY")
 OPENAI_MODEL = get_env_variable("OPENAI_MODEL", "gpt-4o")
+# Rate limits (0 disables the limit)
+OPENAI_REQUESTS_PER_MINUTE = int(get_env_variable("OPENAI_REQUESTS_PER_MINUTE", "0"))
+OPENAI_TOKENS_PER_MINUTE = int(get_env_variable("OPENAI_TOKENS_PER_MINUTE", "0"))
 
 # Ollama Configuration
 OLLAMA_BASE_URL = get_env_variable("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = get_env_variable("OLLAMA_MODEL", "llama2")
+OLLAMA_REQUESTS_PER_MINUTE = int(get_env_variable("OLLAMA_REQUESTS_PER_MINUTE", "0"))
+# How long Ollama keeps the model (and its prompt KV cache) loaded between requests
+OLLAMA_KEEP_ALIVE = get_env_variable("OLLAMA_KEEP_ALIVE", "30m")
+
+# LLM Routing Configuration
+# Comma-separated provider names in preference order (see src/llm/router.py)
+LLM_PROVIDERS = get_env_variable("LLM_PROVIDERS", "openai")
+# "priority" keeps LLM_PROVIDERS order; "latency" prefers the fastest p50
+LLM_ROUTING_STRATEGY = get_env_variable("LLM_ROUTING_STRATEGY", "priority")
+LLM_HEDGE_ENABLED = get_bool_env_variable("LLM_HEDGE_ENABLED", True)
+# Hedge after the provider's recent p95 latency, clamped to these bounds
+LLM_HEDGE_MIN_DELAY = float(get_env_variable("LLM_HEDGE_MIN_DELAY", "0.5"))
+LLM_HEDGE_MAX_DELAY = float(get_env_variable("LLM_HEDGE_MAX_DELAY", "10"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(
+    get_env_variable("LLM_CIRCUIT_FAILURE_THRESHOLD", "5")
+)
+LLM_CIRCUIT_COOLDOWN = float(get_env_variable("LLM_CIRCUIT_COOLDOWN", "30"))
 
 # Database Configuration
 DATABASE_URL = get_env_variable("DATABASE_URL")
+# Further databases selectable per request: "name=url;name=url"
+# (DATABASE_URL is the one named "default")
+DATABASE_TARGETS = get_env_variable("DATABASE_TARGETS", "")
+# Databases kept open at once; the least recently used idle one is closed
+DATABASE_MAX_ACTIVE = int(get_env_variable("DATABASE_MAX_ACTIVE", "16"))
+# PostgreSQL pool for query execution
+POSTGRES_POOL_SIZE = int(get_env_variable("POSTGRES_POOL_SIZE", "5"))
+POSTGRES_MAX_OVERFLOW = int(get_env_variable("POSTGRES_MAX_OVERFLOW", "10"))
+POSTGRES_POOL_TIMEOUT = float(get_env_variable("POSTGRES_POOL_TIMEOUT", "30"))
+POSTGRES_POOL_RECYCLE = int(get_env_variable("POSTGRES_POOL_RECYCLE", "1800"))
+# Connections opened at startup, so the first burst skips connect and TLS
+POSTGRES_POOL_WARMUP = int(
+    get_env_variable("POSTGRES_POOL_WARMUP", str(POSTGRES_POOL_SIZE))
+)
+# Separate pool for catalog reflection and statistics (0 shares the query pool)
+POSTGRES_METADATA_POOL_SIZE = int(get_env_variable("POSTGRES_METADATA_POOL_SIZE", "2"))
+# Prepared statements kept per connection (0 disables, e.g. behind PgBouncer)
+POSTGRES_STATEMENT_CACHE_SIZE = int(
+    get_env_variable("POSTGRES_STATEMENT_CACHE_SIZE", "100")
+)
+TRINO_POOL_SIZE = int(get_env_variable("TRINO_POOL_SIZE", "8"))
+STREAM_CHUNK_SIZE = int(get_env_variable("STREAM_CHUNK_SIZE", "1000"))
+# Codec for Parquet results: zstd, snappy, gzip, lz4 or none
+PARQUET_COMPRESSION = get_env_variable("PARQUET_COMPRESSION", "zstd")
+
+# Batch Query Configuration
+BATCH_CONCURRENCY = int(get_env_variable("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_QUERIES = int(get_env_variable("BATCH_MAX_QUERIES", "5000"))
+
+# Schema Retrieval Configuration
+SCHEMA_PRUNING_ENABLED = get_bool_env_variable("SCHEMA_PRUNING_ENABLED", True)
+SCHEMA_TOP_K = int(get_env_variable("SCHEMA_TOP_K", "8"))
+SCHEMA_TOKEN_BUDGET = int(get_env_variable("SCHEMA_TOKEN_BUDGET", "6000"))
+
+# SQL Validation Configuration
+VALIDATION_CACHE_SIZE = int(get_env_variable("VALIDATION_CACHE_SIZE", "4096"))
+# Reject (instead of warn about) joins whose keys are not related by a foreign key
+VALIDATION_STRICT_JOINS = get_bool_env_variable("VALIDATION_STRICT_JOINS", False)
+
+# SQL Repair Configuration
+# LLM answers per question: the first plus repairs of SQL that failed validation
+GENERATION_MAX_ATTEMPTS = int(get_env_variable("GENERATION_MAX_ATTEMPTS", "3"))
+# Seconds to produce valid SQL, repairs included (0 disables the deadline)
+GENERATION_TIMEOUT = float(get_env_variable("GENERATION_TIMEOUT", "60"))
+
+# Request Deadline Configuration
+# Seconds a request may take end to end (0 disables the deadline); clients can
+# ask for less with the X-Request-Timeout header
+REQUEST_TIMEOUT = float(get_env_variable("REQUEST_TIMEOUT", "120"))
+
+# Cost Gate Configuration (EXPLAIN before executing SQL)
+COST_GATE_ENABLED = get_bool_env_variable("COST_GATE_ENABLED", False)
+# Thresholds on planner estimates; 0 disables a check
+COST_GATE_MAX_COST = float(get_env_variable("COST_GATE_MAX_COST", "0"))
+COST_GATE_MAX_ROWS = int(get_env_variable("COST_GATE_MAX_ROWS", "100000"))
+COST_GATE_MAX_BYTES = float(get_env_variable("COST_GATE_MAX_BYTES", "0"))
+# Cap oversized row estimates with LIMIT instead of rejecting the query
+COST_GATE_REWRITE_LIMIT = get_bool_env_variable("COST_GATE_REWRITE_LIMIT", True)
+# Tables that must be filtered on a partition column: "table:col,col;table:col"
+COST_GATE_PARTITIONED_TABLES = get_env_variable("COST_GATE_PARTITIONED_TABLES", "")
+COST_GATE_CACHE_SIZE = int(get_env_variable("COST_GATE_CACHE_SIZE", "1024"))
+COST_GATE_CACHE_TTL = float(get_env_variable("COST_GATE_CACHE_TTL", "300"))
+
+# Result Cache Configuration (POST /api/execute)
+RESULT_CACHE_ENABLED = get_bool_env_variable("RESULT_CACHE_ENABLED", False)
+RESULT_CACHE_MAX_BYTES = int(get_env_variable("RESULT_CACHE_MAX_BYTES", "268435456"))
+RESULT_CACHE_TTL = float(get_env_variable("RESULT_CACHE_TTL", "300"))
+# PostgreSQL channel whose NOTIFY payloads name modified tables ("" disables)
+RESULT_CACHE_NOTIFY_CHANNEL = get_env_variable("RESULT_CACHE_NOTIFY_CHANNEL", "")
+# Seconds between polls of per-table modification counters (0 disables)
+RESULT_CACHE_POLL_INTERVAL = float(get_env_variable("RESULT_CACHE_POLL_INTERVAL", "5"))
+
+# Generation Cache Configuration
+GENERATION_CACHE_ENABLED = get_bool_env_variable("GENERATION_CACHE_ENABLED", True)
+GENERATION_CACHE_SIZE = int(get_env_variable("GENERATION_CACHE_SIZE", "1024"))
+GENERATION_CACHE_PATH = get_env_variable("GENERATION_CACHE_PATH", "")
+
+# Few-shot Example Store Configuration (needs the "examples" extra, NumPy)
+EXAMPLE_STORE_ENABLED = get_bool_env_variable("EXAMPLE_STORE_ENABLED", True)
+# Verified examples kept per database; the oldest are dropped beyond this
+EXAMPLE_STORE_SIZE = int(get_env_variable("EXAMPLE_STORE_SIZE", "100000"))
+# SQLite file the examples are kept in ("" keeps them in memory only)
+EXAMPLE_STORE_PATH = get_env_variable("EXAMPLE_STORE_PATH", ".cache/examples.sqlite")
+# Examples added to each prompt (0 disables retrieval)
+EXAMPLE_TOP_K = int(get_env_variable("EXAMPLE_TOP_K", "3"))
+
+# Metadata Cache Configuration
+METADATA_CACHE_TTL = float(get_env_variable("METADATA_CACHE_TTL", "300"))
+METADATA_CACHE_PATH = get_env_variable(
+    "METADATA_CACHE_PATH", ".cache/metadata_snapshot.json"
+)
+METADATA_REFRESH_INTERVAL = float(get_env_variable("METADATA_REFRESH_INTERVAL", "60"))
+
+# Logging Configuration
+LOG_LEVEL = get_env_variable("LOG_LEVEL", "INFO").upper()
+# "text" for people, "json" (one object per line) for log pipelines
+LOG_FORMAT = get_env_variable("LOG_FORMAT", "text")
+# Share of per-request events kept (warnings and errors are never sampled)
+LOG_SAMPLE_RATE = float(get_env_variable("LOG_SAMPLE_RATE", "1"))
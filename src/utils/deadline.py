@@ -0,0 +1,61 @@
+"""Per-request deadlines, passed from the route handler down to every stage.
+
+A stage bounds its own work with `async with deadline.timeout(limit):`,
+getting the time left on the request, capped by the stage's own limit. When
+the deadline passes, the awaited LLM call or query is cancelled, which
+aborts the HTTP request or cancels the query on the server.
+"""
+
+import asyncio
+import time
+
+
+class Deadline:
+    """Point in time (time.monotonic) by which a request must be answered
+
+    None means no deadline. The same monotonic clock backs the event loop,
+    so a Deadline can be created outside a running loop.
+    """
+
+    def __init__(self, expires_at: float | None = None):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float | None) -> "Deadline":
+        """Deadline seconds from now; None or a value <= 0 means none"""
+        if not seconds or seconds <= 0:
+            return cls()
+        return cls(time.monotonic() + seconds)
+
+    def within(self, seconds: float | None) -> "Deadline":
+        """This deadline, or seconds from now if that is earlier"""
+        other = Deadline.after(seconds)
+        if other.expires_at is None:
+            return self
+        if self.expires_at is None or other.expires_at < self.expires_at:
+            return other
+        return self
+
+    def remaining(self) -> float | None:
+        """Seconds left (never negative), or None without a deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def budget(self, limit: float | None = None) -> float | None:
+        """Seconds a stage may take: the time left, capped at limit"""
+        remaining = self.remaining()
+        if limit is None or limit <= 0:
+            return remaining
+        return limit if remaining is None else min(limit, remaining)
+
+    def timeout(self, limit: float | None = None) -> asyncio.Timeout:
+        """Context manager raising TimeoutError once budget(limit) runs out"""
+        return asyncio.timeout(self.budget(limit))
+
+
+# Default for callers that have no request deadline (background work, scripts)
+UNLIMITED = Deadline()
@@ -1,37 +1,134 @@
+"""Process-wide Loguru setup: level, text or JSON lines, sampling and request IDs.
+
+Pass values as arguments (`logger.debug("SQL: {}", sql)`) rather than
+f-strings: Loguru returns before formatting when no sink accepts the level.
+"""
+
+import json
+import queue
+import random
 import sys
+import threading
+from typing import TextIO
 
 from loguru import logger
 
+from src.utils.config import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_RATE
 
-def setup_logger(
-    name: str | None = None,
-    level: str | int = "DEBUG",
-    format_string: str | None = None,
-    **kwargs: dict,
-) -> logger:
-    """Configure and return a logger instance with custom settings"""
-    # Remove default handler
-    logger.remove()
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+    "<level>{level: <8}</level> | "
+    "{extra[request_id]} | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+
+# Extra keys that are logging plumbing rather than event fields
+_INTERNAL_EXTRA = {"name", "sampled"}
+
+# Loguru handler IDs installed by configure_logging
+_handlers: list[int] = []
+
+
+def _json_line(record: dict, exception: str) -> str:
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    for key, value in record["extra"].items():
+        if key not in _INTERNAL_EXTRA:
+            entry[key] = value
+    if exception:
+        entry["exception"] = exception
+    return json.dumps(entry, default=str) + "\n"
+
+
+class BackgroundWriter:
+    """Stream sink that writes lines from a daemon thread
+
+    Unlike Loguru's enqueue=True nothing is pickled: the caller only puts the
+    formatted message on an in-process queue. In JSON mode the record is also
+    serialized on the writer thread rather than in the request.
+    """
 
-    # Default format if none provided
-    if not format_string:
-        format_string = (
-            "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-            "<level>{level: <8}</level> | "
-            "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
-            "<level>{message}</level>"
+    def __init__(self, stream: TextIO, serialize: bool = False):
+        self._stream = stream
+        self._serialize = serialize
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
         )
+        self._thread.start()
 
-    # Add a new handler with custom format
-    logger.add(
-        sink=sys.stderr, format=format_string, level=level, enqueue=True, **kwargs
+    def write(self, message: str) -> None:
+        self._queue.put(message)
+
+    def _run(self) -> None:
+        while (message := self._queue.get()) is not None:
+            try:
+                if self._serialize:
+                    # The handler formats only the traceback in JSON mode
+                    self._stream.write(_json_line(message.record, str(message)))
+                else:
+                    self._stream.write(message)
+                if self._queue.empty():
+                    self._stream.flush()
+            except Exception as e:
+                sys.__stderr__.write(f"Log writer failed: {e}\n")
+
+    def stop(self) -> None:
+        """Drain queued lines; called by Loguru when the handler is removed"""
+        self._queue.put(None)
+        self._thread.join()
+        self._stream.flush()
+
+
+def _sampler(rate: float):
+    warning = logger.level("WARNING").no
+
+    def keep(record: dict) -> bool:
+        return (
+            not record["extra"].get("sampled")
+            or record["level"].no >= warning
+            or random.random() < rate
+        )
+
+    return keep
+
+
+def configure_logging(
+    level: str | int = LOG_LEVEL,
+    log_format: str = LOG_FORMAT,
+    sample_rate: float = LOG_SAMPLE_RATE,
+    stream: TextIO | None = None,
+) -> None:
+    """Replace all sinks with one background sink (text or JSON lines)"""
+    logger.remove()
+    _handlers.clear()
+    logger.configure(extra={"request_id": "-"})
+    stream = stream or sys.stderr
+    serialize = log_format == "json"
+    handler = logger.add(
+        BackgroundWriter(stream, serialize=serialize),
+        level=level,
+        format=(lambda _: "{exception}") if serialize else TEXT_FORMAT,
+        colorize=not serialize and stream.isatty(),
+        filter=_sampler(sample_rate) if sample_rate < 1 else None,
     )
+    _handlers.append(handler)
 
-    if name:
-        return logger.bind(name=name)
-    return logger
 
+def get_logger(name: str | None = None, *, sampled: bool = False) -> logger:
+    """Get the shared logger, configuring the sink on first use
 
-def get_logger(name: str | None = None) -> logger:
-    """Get a configured logger instance"""
-    return setup_logger(name=name)
+    Records logged through a sampled logger are per-request events, kept at
+    LOG_SAMPLE_RATE.
+    """
+    if not _handlers:
+        configure_logging()
+    bound = logger.bind(name=name) if name else logger
+    return bound.bind(sampled=True) if sampled else bound
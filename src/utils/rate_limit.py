@@ -0,0 +1,70 @@
+"""Token-bucket rate limiting for outbound LLM requests."""
+
+import asyncio
+import time
+
+from src.utils.metrics import metrics
+
+rate_limit_wait = metrics.histogram(
+    "llm_rate_limit_wait_seconds", "Time spent waiting for LLM rate limit capacity"
+)
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (capped at the bucket capacity)"""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one provider
+
+    A limit of 0 disables that dimension. Waiters are served in FIFO order.
+    """
+
+    def __init__(
+        self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0
+    ):
+        self.name = name
+        self._requests = _Bucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request costing the given tokens fits both budgets"""
+        if not self.enabled:
+            return
+
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait = 0.0
+                for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                    if bucket is not None:
+                        bucket.refill(now)
+                        wait = max(wait, bucket.wait_time(amount))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                if bucket is not None:
+                    bucket.level -= min(amount, bucket.capacity)
+
+        rate_limit_wait.observe(time.monotonic() - start, provider=self.name)
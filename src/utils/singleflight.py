@@ -0,0 +1,68 @@
+"""Coalesce concurrent identical async calls onto one in-flight future."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+from src.utils.metrics import metrics
+
+T = TypeVar("T")
+
+singleflight_calls = metrics.counter(
+    "singleflight_calls_total",
+    "Calls per single-flight group, by outcome (originated, coalesced, abandoned)",
+)
+
+
+class SingleFlight:
+    """While a call for a key is in flight, later callers await the same result.
+
+    The underlying work runs as its own task, so a caller that is cancelled
+    (e.g. its client disconnected or its deadline passed) does not cancel the
+    work for the others. Once every caller has gone, the work is cancelled.
+    Callers bound their own wait; the shared work gets no caller's deadline.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        # Callers still awaiting each in-flight task
+        self._waiters: dict[asyncio.Task, int] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is not None:
+            singleflight_calls.inc(group=self.group, outcome="coalesced")
+            return await self._wait(key, task)
+
+        singleflight_calls.inc(group=self.group, outcome="originated")
+        task = asyncio.ensure_future(func())
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await self._wait(key, task)
+
+    async def _wait(self, key: Hashable, task: asyncio.Task) -> T:
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody is left to use the result; later callers start afresh
+                    singleflight_calls.inc(group=self.group, outcome="abandoned")
+                    task.cancel()
+                    if self._calls.get(key) is task:
+                        del self._calls[key]
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
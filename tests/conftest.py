@@ -0,0 +1,12 @@
+import os
+
+from loguru import logger
+
+# src.utils.config requires these at import time; tests never connect
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+
+
+def pytest_sessionfinish():
+    # Flush the log writer while pytest's captured stderr is still open
+    logger.remove()
@@ -0,0 +1,34 @@
+import pytest
+
+from src.sql.example_store import ExampleIndex
+from src.sql.generation_cache import normalize_question
+
+COMPARISON_PAIRS = [
+    ("orders with total > 100", "orders with total < 100"),
+    ("orders with total >= 100", "orders with total <= 100"),
+    ("orders with total = 100", "orders with total != 100"),
+    ("orders with total = 100", "orders with total <> 100"),
+    ("orders with total > 100", "orders with total 100"),
+]
+
+
+@pytest.mark.parametrize(("first", "second"), COMPARISON_PAIRS)
+def test_comparisons_get_different_keys(first, second):
+    assert normalize_question(first)[0] != normalize_question(second)[0]
+
+
+def test_operator_spacing_does_not_matter():
+    assert normalize_question("total>=100") == normalize_question("Total >= 100")
+
+
+def test_numbers_are_lifted_into_placeholders():
+    assert normalize_question("Top 10 customers?") == ("top # customers", ["10"])
+    assert normalize_question("top 25 customers")[0] == "top # customers"
+
+
+@pytest.mark.parametrize(("first", "second"), COMPARISON_PAIRS)
+def test_example_for_one_comparison_does_not_replace_the_other(first, second):
+    index = ExampleIndex()
+    index.add(first, "SELECT 1", frozenset())
+    index.add(second, "SELECT 2", frozenset())
+    assert [example.sql for example in index.examples] == ["SELECT 1", "SELECT 2"]